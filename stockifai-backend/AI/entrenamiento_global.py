@@ -0,0 +1,200 @@
+# entrenamiento_global.py
+# -*- coding: utf-8 -*-
+"""
+Modo de entrenamiento global (FORECAST_MODO_ENTRENAMIENTO = "global").
+
+En lugar de un modelo por taller y segmento, se entrena un único modelo por segmento
+con los datasets preprocesados de todos los talleres (muestreados por taller) más
+features a nivel taller. Opcionalmente cada taller ajusta el modelo global con sus
+propios datos (FORECAST_AJUSTE_POR_TALLER), guardado como modelo "ajustado" del taller.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from AI.model_training import evaluar_modelo, get_features_for_segment, guardar_ultimo_registro_a_db, nuevo_regresor
+from AI.services.modelos_lgbm import MODO_GLOBAL, MODO_POR_TALLER, RUTA_BASE_MODELOS, borrar_modelo, \
+    cargar_modelo, existe_modelo, guardar_modelo, leer_metadata_global, modo_entrenamiento, ruta_metadata_global, \
+    ruta_modelo_global, ruta_modelo_taller
+
+SEGMENTOS_ENTRENABLES = ("frecuencia_alta", "intermitente")
+FEATURES_TALLER = ["taller_media_demanda", "taller_cantidad_skus", "taller_proporcion_con_venta"]
+PREFIJOS_DUMMIES = ("mes_", "semana_", "trimestre_")
+ARBOLES_AJUSTE_TALLER = 100
+TARGET = "Cantidad"
+
+
+class ModeloGlobalInexistente(Exception):
+    """Se pidió actualizar talleres sobre un modelo global que todavía no se entrenó."""
+
+
+def _guardar_metadata_global(segmento: str, metadata: Dict) -> None:
+    ruta = ruta_metadata_global(segmento)
+    tmp = f"{ruta}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, default=str)
+    os.replace(tmp, ruta)
+
+
+def calcular_features_taller(df: pd.DataFrame) -> Dict[str, float]:
+    """Features que describen al taller dentro del segmento (escala y densidad de demanda)."""
+    return {
+        "taller_media_demanda": float(df[TARGET].mean()),
+        "taller_cantidad_skus": float(df["numero_pieza"].nunique()),
+        "taller_proporcion_con_venta": float((df[TARGET] > 0).mean()),
+    }
+
+
+def _rutas_csv(taller_id: int, segmento: str, directorio_datos: str) -> List[str]:
+    ruta_segmento = os.path.join(directorio_datos, str(taller_id), segmento)
+    return [
+        os.path.join(ruta_segmento, f"demanda_preprocesada_{segmento}_{parte}.csv")
+        for parte in ("train", "val", "test")
+    ]
+
+
+def _leer_taller(taller_id: int, segmento: str, max_filas: int,
+                 directorio_datos: str) -> Optional[Tuple[pd.DataFrame, ...]]:
+    rutas = _rutas_csv(taller_id, segmento, directorio_datos)
+    if not all(os.path.isfile(r) for r in rutas):
+        return None
+
+    partes = []
+    for ruta in rutas:
+        df = pd.read_csv(ruta)
+        df["fecha"] = pd.to_datetime(df["fecha"])
+        # float32 para que el dataset combinado entre en memoria
+        numericas = df.select_dtypes(include="float64").columns
+        df[numericas] = df[numericas].astype(np.float32)
+        partes.append(df)
+    train, val, test = partes
+
+    # Muestreo: se conservan las semanas más recientes de cada taller
+    if max_filas and len(train) > max_filas:
+        train = train.sort_values("fecha").tail(max_filas)
+
+    feats = calcular_features_taller(pd.concat([train, val]))
+    for parte in (train, val, test):
+        for col, valor in feats.items():
+            parte[col] = valor
+    return train, val, test, feats
+
+
+def _completar_dummies(df: pd.DataFrame, features: List[str]) -> pd.DataFrame:
+    # Cada taller genera solo las dummies de calendario de sus fechas; las faltantes valen 0
+    for col in features:
+        if col not in df.columns:
+            df[col] = 0
+        elif col.startswith(PREFIJOS_DUMMIES):
+            df[col] = df[col].fillna(0)
+    return df
+
+
+def _borrar_csv(taller_id: int, segmento: str, directorio_datos: str) -> None:
+    for ruta in _rutas_csv(taller_id, segmento, directorio_datos):
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+
+def _ajustar_para_taller(booster_global, taller_id: int, segmento: str, df: pd.DataFrame, features: List[str]):
+    modelo = nuevo_regresor(n_estimators=ARBOLES_AJUSTE_TALLER)
+    modelo.fit(df[features], df[TARGET], init_model=booster_global)
+    guardar_modelo(modelo, ruta_modelo_taller(taller_id, segmento, "ajustado"), {"segmento": segmento, "base": "global"})
+
+
+def entrenar_modelos_globales(taller_ids: Iterable[int], reentrenar: bool = True,
+                              directorio_datos: Optional[str] = None) -> Dict[str, List[int]]:
+    """
+    Entrena un modelo por segmento con los datos preprocesados de todos los talleres
+    (leídos de ``directorio_datos``, por defecto la carpeta de modelos).
+    Con reentrenar=False reutiliza el modelo global vigente y solo actualiza los
+    talleres indicados (features de taller, últimos registros y ajuste opcional); si
+    no hay modelo global para un segmento con datos lanza ModeloGlobalInexistente en
+    lugar de entrenar un "global" con esos talleres solos.
+    Devuelve {segmento: [talleres procesados]}.
+    """
+    directorio_datos = directorio_datos or RUTA_BASE_MODELOS
+    max_filas = getattr(settings, "FORECAST_GLOBAL_MAX_FILAS_TALLER", 50000)
+    ajuste_por_taller = getattr(settings, "FORECAST_AJUSTE_POR_TALLER", False)
+    taller_ids = list(taller_ids)
+    procesados: Dict[str, List[int]] = {}
+
+    for segmento in SEGMENTOS_ENTRENABLES:
+        datos: Dict[int, Tuple[pd.DataFrame, ...]] = {}
+        for taller_id in taller_ids:
+            leido = _leer_taller(taller_id, segmento, max_filas, directorio_datos)
+            if leido is not None:
+                datos[taller_id] = leido
+        if not datos:
+            continue
+
+        metadata = leer_metadata_global(segmento) if not reentrenar else None
+        ruta_modelo = ruta_modelo_global(segmento)
+        if not reentrenar and (metadata is None or not existe_modelo(ruta_modelo)):
+            raise ModeloGlobalInexistente(
+                f"No hay modelo global para '{segmento}': ejecutar primero el forecast de todos los talleres"
+            )
+
+        if reentrenar:
+            print(f"\n--- ENTRENAMIENTO GLOBAL PARA '{segmento.upper()}' ({len(datos)} talleres) ---")
+            train = pd.concat([d[0] for d in datos.values()], ignore_index=True)
+            val = pd.concat([d[1] for d in datos.values()], ignore_index=True)
+            test = pd.concat([d[2] for d in datos.values()], ignore_index=True)
+
+            features = get_features_for_segment(segmento, train.columns) + FEATURES_TALLER
+            for df in (train, val, test):
+                _completar_dummies(df, features)
+
+            # Una pasada con early stopping sobre validación fija la cantidad de árboles,
+            # y el modelo final se entrena con train + val.
+            exploratorio = nuevo_regresor()
+            exploratorio.fit(train[features], train[TARGET], eval_set=[(val[features], val[TARGET])],
+                             eval_metric="mae", callbacks=[lgb.early_stopping(50, verbose=False)])
+            arboles = exploratorio.best_iteration_ or exploratorio.n_estimators
+
+            full = pd.concat([train, val], ignore_index=True)
+            modelo = nuevo_regresor(n_estimators=arboles)
+            modelo.fit(full[features], full[TARGET])
+            del train, val, full
+
+            mae, rmse = evaluar_modelo(modelo, test, features, TARGET)
+            print(f"Modelo global '{segmento}': {arboles} árboles, MAE {mae:.2f}, RMSE {rmse:.2f}")
+
+            guardar_modelo(modelo, ruta_modelo, {"segmento": segmento, "base": "global"})
+            booster = modelo.booster_
+            metadata = {
+                "fecha_entrenamiento": datetime.now().isoformat(),
+                "features": features,
+                "mae": mae,
+                "rmse": rmse,
+                "talleres": {},
+            }
+        else:
+            booster = cargar_modelo(ruta_modelo).booster
+            features = metadata["features"]
+
+        for taller_id, (train_t, val_t, test_t, feats) in datos.items():
+            metadata["talleres"][str(taller_id)] = feats
+            guardar_ultimo_registro_a_db(test_t, segmento, taller_id=taller_id)
+            if ajuste_por_taller:
+                _ajustar_para_taller(booster, taller_id, segmento,
+                                     _completar_dummies(pd.concat([train_t, val_t]), features), features)
+            else:
+                # Un ajuste viejo no debe tapar al modelo global nuevo
+                borrar_modelo(ruta_modelo_taller(taller_id, segmento, "ajustado"))
+            _borrar_csv(taller_id, segmento, directorio_datos)
+        _guardar_metadata_global(segmento, metadata)
+        procesados[segmento] = list(datos)
+
+    return procesados
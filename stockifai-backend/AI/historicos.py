@@ -13,8 +13,8 @@ import pandas as pd
 import holidays
 from django.db import transaction
 
-from d_externo.repositories.dataexterna import obtener_todas_las_inflaciones, obtener_todos_los_patentamientos, \
-    obtener_todos_los_ipsa, obtener_todas_las_prendas, obtener_todas_las_tasas_interes, obtener_todos_los_tipos_cambio
+from AI.services.instrumentacion import etapa, registrar_filas
+from d_externo.repositories.dataexterna import SERIES_EXTERNAS, huella_datos_externos, obtener_serie_externa
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
 
@@ -184,7 +184,7 @@ def clasificar_demanda(demanda_semanal: pd.DataFrame) -> pd.DataFrame:
         return "ERROR_CLASIFICACION"
 
     volumen_historico["frecuencia_rotacion"] = volumen_historico.apply(
-        lambda row: frecuencia_rotacion(row, fecha_final), axis=1
+        lambda row: frecuencia_rotacion_ajustada(row, fecha_final), axis=1
     )
 
     df_full = df_full.merge(
@@ -371,79 +371,88 @@ def generar_caracteristicas(df_segment: pd.DataFrame) -> pd.DataFrame:
     return df_s
 
 
-def integrar_datos_externos_base() -> pd.DataFrame:
+def _features_serie_externa(nombre: str, valores: np.ndarray, tipo: str) -> Dict[str, np.ndarray]:
+    """Lags, EMAs y delta de una serie ya ordenada por fecha."""
+    if tipo == "anual":
+        lags = [12, 24, 36]
+        ema_spans = [12, 24]
+    else:
+        lags = [1, 2, 3, 6]
+        ema_spans = [3, 6, 12]
+
+    n = len(valores)
+    columnas: Dict[str, np.ndarray] = {}
+    for lag in lags:
+        col = np.full(n, np.nan)
+        if lag < n:
+            col[lag:] = valores[:n - lag]
+        columnas[f"{nombre}_lag_{lag}"] = col
+    for span in ema_spans:
+        alpha = 2.0 / (span + 1)
+        col = np.empty(n)
+        acumulado = valores[0]
+        for i, valor in enumerate(valores):
+            acumulado = valor if i == 0 else (1 - alpha) * acumulado + alpha * valor
+            col[i] = acumulado
+        columnas[f"{nombre}_ema_{span}"] = col
+    delta = np.full(n, np.nan)
+    delta[1:] = np.diff(valores)
+    columnas[f"{nombre}_delta"] = delta
+    return columnas
+
+
+_cache_externos: Dict[str, object] = {"huella": None, "df": None}
+
+
+def integrar_datos_externos_base(usar_cache: bool = True) -> pd.DataFrame:
     """
     Obtiene datos externos, calcula features y los retorna.
     Esta función NO fusiona con los datos de demanda.
+
+    El resultado se cachea en memoria por la huella de las tablas de indicadores,
+    así todos los talleres de una corrida comparten el mismo DataFrame (no modificarlo).
     """
+    huella = huella_datos_externos()
+    if usar_cache and _cache_externos["huella"] == huella:
+        return _cache_externos["df"]
+
     print("\n--- Procesando datos externos para su futura integración ---")
-    modelos_externos = [
-        {"function": obtener_todas_las_inflaciones, "nombre": "inflacion", "tipo": "mensual"},
-        {"function": obtener_todos_los_patentamientos, "nombre": "patentamientos", "tipo": "anual"},
-        {"function": obtener_todos_los_ipsa, "nombre": "ipsa", "tipo": "mensual"},
-        {"function": obtener_todas_las_prendas, "nombre": "prenda", "tipo": "mensual"},
-        {"function": obtener_todas_las_tasas_interes, "nombre": "tasa_de_interes", "tipo": "mensual"},
-        {"function": obtener_todos_los_tipos_cambio, "nombre": "tipo_de_cambio", "tipo": "mensual"},
-    ]
-
-    df_final = pd.DataFrame()
-    for config in modelos_externos:
-        helper_function = config["function"]
-        new_col_name = config["nombre"]
-        print(f" - Procesando: {helper_function.__name__}...")
+    fechas_base = None
+    columnas: Dict[str, np.ndarray] = {}
+    for nombre, modelo, campo, tipo in SERIES_EXTERNAS:
+        print(f" - Procesando: {nombre}...")
 
         try:
-            data_list = helper_function()
-            if not data_list:
-                warnings.warn(f"No se encontraron datos usando '{helper_function.__name__}'. Se omite.")
+            fechas, valores = obtener_serie_externa(modelo, campo)
+            if not len(fechas):
+                warnings.warn(f"No se encontraron datos para '{nombre}'. Se omite.")
                 continue
 
-            df_ext = pd.DataFrame(data_list)
-
-            if new_col_name == 'inflacion':
-                df_ext = df_ext.rename(columns={'ipc': new_col_name})
-            elif new_col_name == 'patentamientos':
-                df_ext = df_ext.rename(columns={'cantidad': new_col_name})
-            elif new_col_name == 'ipsa':
-                df_ext = df_ext.rename(columns={'ipsa': new_col_name})
-            elif new_col_name == 'tasa_de_interes':
-                df_ext = df_ext.rename(columns={'tasa_interes': new_col_name})
-            elif new_col_name == 'prenda':
-                df_ext = df_ext.rename(columns={'prenda': new_col_name})
-            elif new_col_name == 'tipo_de_cambio':
-                df_ext = df_ext.rename(columns={'tipo_cambio': new_col_name})
-
-            df_ext["fecha"] = pd.to_datetime(df_ext["fecha"])
-            df_ext[new_col_name] = pd.to_numeric(df_ext[new_col_name], errors='coerce')
-            df_ext = df_ext.dropna().sort_values("fecha")
-
-            if config["tipo"] == "anual":
-                lags = [12, 24, 36]
-                ema_spans = [12, 24]
-            else:
-                lags = [1, 2, 3, 6]
-                ema_spans = [3, 6, 12]
-
-            for lag in lags:
-                df_ext[f"{new_col_name}_lag_{lag}"] = df_ext[new_col_name].shift(lag)
-            for span in ema_spans:
-                df_ext[f"{new_col_name}_ema_{span}"] = df_ext[new_col_name].ewm(span=span, adjust=False).mean()
-            df_ext[f"{new_col_name}_delta"] = df_ext[new_col_name].diff()
-
-            df_ext = df_ext.drop(columns=[new_col_name])
-            if df_final.empty:
-                df_final = df_ext
-            else:
-                df_final = pd.merge_asof(
-                    df_final.sort_values("fecha"),
-                    df_ext.sort_values("fecha"),
-                    on="fecha",
-                    direction="backward"
-                )
+            features = _features_serie_externa(nombre, valores, tipo)
+            if fechas_base is None:
+                # La primera serie define las fechas del resultado
+                fechas_base = fechas
+                columnas.update(features)
+                continue
+
+            # merge_asof "backward": último registro con fecha <= fecha base
+            idx = np.searchsorted(fechas, fechas_base, side="right") - 1
+            validos = idx >= 0
+            for col, arr in features.items():
+                out = np.full(len(fechas_base), np.nan)
+                out[validos] = arr[idx[validos]]
+                columnas[col] = out
         except Exception as e:
-            warnings.warn(f"Error procesando '{helper_function.__name__}': {e}. Se omite.")
+            warnings.warn(f"Error procesando '{nombre}': {e}. Se omite.")
             continue
 
+    if fechas_base is None:
+        df_final = pd.DataFrame()
+    else:
+        df_final = pd.DataFrame({"fecha": fechas_base, **columnas})
+
+    _cache_externos["huella"] = huella
+    _cache_externos["df"] = df_final
     return df_final
 
 
@@ -489,12 +498,15 @@ def dividir_datos(
 def ejecutar_preproceso(
         taller_id: int,
         output_dir_base: str = "models",
+        df_externos: pd.DataFrame | None = None,
 ) -> Dict[str, Dict[str, pd.DataFrame]]:
     print(f"\n--- INICIANDO PIPELINE DE PREPROCESAMIENTO PARA EL TALLER: (id={taller_id}) ---")
 
     # 1) Extraer y agregar semanal
     try:
-        demanda_semanal = cargar_y_limpiar_datos_desde_repo(taller_id)
+        with etapa("cargar_demanda", taller_id=taller_id):
+            demanda_semanal = cargar_y_limpiar_datos_desde_repo(taller_id)
+            registrar_filas(len(demanda_semanal))
         if demanda_semanal.empty:
             raise ValueError("No hay datos de demanda semanal.")
     except ValueError as e:
@@ -502,13 +514,18 @@ def ejecutar_preproceso(
         return {}
 
     # 2) Clasificar
-    df_full, clasificacion_rotacion_df = clasificar_demanda(demanda_semanal)
+    with etapa("clasificar_demanda", taller_id=taller_id):
+        df_full, clasificacion_rotacion_df = clasificar_demanda(demanda_semanal)
+        registrar_filas(len(df_full))
     print("Guardando clasificaciones...")
     # 3) Guardar la clasificación de rotación en la DB
-    guardar_clasificacion_rotacion_en_db(taller_id, clasificacion_rotacion_df)
+    with etapa("guardar_clasificacion", taller_id=taller_id):
+        registrar_filas(len(clasificacion_rotacion_df))
+        guardar_clasificacion_rotacion_en_db(taller_id, clasificacion_rotacion_df)
 
-    # 4) Obtener y preprocesar los datos externos una sola vez
-    df_externos = integrar_datos_externos_base()
+    # 4) Obtener y preprocesar los datos externos (compartidos entre talleres de la corrida)
+    if df_externos is None:
+        df_externos = integrar_datos_externos_base()
 
     # 5) Bucle por cada segmento (ML: frecuencia_alta, intermitente)
     print("\n--- PASO 3: PROCESANDO DATOS Y GUARDANDO EN CARPETAS POR SEGMENTO ---")
@@ -533,7 +550,9 @@ def ejecutar_preproceso(
             )
 
             # Genera las características específicas del segmento
-            df_modelo_segmento = generar_caracteristicas(df_segmento)
+            with etapa("features_segmento", taller_id=taller_id, segmento=segmento):
+                df_modelo_segmento = generar_caracteristicas(df_segmento)
+                registrar_filas(len(df_modelo_segmento))
 
             # Divide y guarda el resultado
             split_data = dividir_datos(df_modelo_segmento)
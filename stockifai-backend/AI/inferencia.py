@@ -4,7 +4,6 @@
 import os
 import warnings
 
-import joblib
 import numpy as np
 import pandas as pd
 import holidays
@@ -15,17 +14,18 @@ from django.db import transaction
 from catalogo.models import RepuestoTaller
 CHUNK_SIZE = 1000
 
+from AI.services.instrumentacion import etapa, registrar_filas
+from AI.services.modelos_lgbm import cargar_modelo, resolver_modelo
 from catalogo.models import Repuesto
 from d_externo.repositories.dataexterna import obtener_registroentrenamiento_intermitente, \
     obtener_registroentrenamiento_frecuencia_alta
 from inventario.repositories.repuesto_taller_repo import RepuestoTallerRepo
+from inventario.services.version_datos import incrementar_version_taller
 from user.models import Taller
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
 warnings.simplefilter(action="ignore", category=UserWarning)
 
-# Directorio donde se guardaron los modelos entrenados
-RUTA_BASE_MODELOS = "models"
 
 def get_features_for_segment(segmento: str, df_columns: list) -> list:
     """
@@ -238,6 +238,9 @@ def guardar_predicciones_db(taller_id: int, predicciones: list):
                 )
                 total_creados += len(chunk)
 
+    # Invalida el cache HTTP de los listados del taller
+    incrementar_version_taller(taller_id)
+
     total_guardados = total_actualizados + total_creados
     print(
         f"Predicciones guardadas en DB (Bulk) para {total_guardados} repuestos/taller. ({total_actualizados} act, {total_creados} cre)")
@@ -248,8 +251,10 @@ def ejecutar_inferencia(taller_id: int, fecha_prediccion_str: str):
     print(f"Fecha de inicio de predicción: {fecha_prediccion_str}")
 
     # --- 1. Cargar el último registro de cada SKU desde Django ---
-    registros_frecuencia_alta = obtener_registroentrenamiento_frecuencia_alta(taller_id)
-    registros_intermitente = obtener_registroentrenamiento_intermitente(taller_id)
+    with etapa("cargar_ultimos_registros", taller_id=taller_id):
+        registros_frecuencia_alta = obtener_registroentrenamiento_frecuencia_alta(taller_id)
+        registros_intermitente = obtener_registroentrenamiento_intermitente(taller_id)
+        registrar_filas(len(registros_frecuencia_alta) + len(registros_intermitente))
 
     # Convertir a DataFrame
     df_frecuencia_alta = pd.DataFrame(registros_frecuencia_alta)
@@ -279,6 +284,7 @@ def ejecutar_inferencia(taller_id: int, fecha_prediccion_str: str):
     ar_holidays = holidays.AR(years=np.arange(fecha_inicio.year, fecha_inicio.year + 2))
 
     resultados_finales = []
+    modelos = {}
 
     for sku in df_ultimos_registros['numero_pieza'].unique():
         historia_sku = df_ultimos_registros[df_ultimos_registros['numero_pieza'] == sku].copy()
@@ -288,14 +294,17 @@ def ejecutar_inferencia(taller_id: int, fecha_prediccion_str: str):
             print(f"SKU {sku} pertenece al segmento '{segmento}', se omite predicción.")
             continue
 
-        # Cargar el modelo correspondiente
-        ruta_modelo = os.path.join(RUTA_BASE_MODELOS, str(taller_id), segmento, f"modelo_lightgbm_{segmento}_final.pkl")
-        if not os.path.exists(ruta_modelo):
+        # Cargar el modelo correspondiente (una sola vez por segmento)
+        if segmento not in modelos:
+            ruta_modelo, features_taller = resolver_modelo(taller_id, segmento)
+            modelo = cargar_modelo(ruta_modelo)
+            modelos[segmento] = (modelo, features_taller) if modelo is not None else None
+        if modelos[segmento] is None:
             print(f"Advertencia: No se encontró el modelo para el segmento '{segmento}'. Se omite SKU {sku}.")
             continue
 
-        modelo = joblib.load(ruta_modelo)
-        features_del_modelo = modelo.feature_name_
+        modelo, features_taller = modelos[segmento]
+        features_del_modelo = modelo.features
 
         print(f"\nProcesando SKU: {sku} (Segmento: {segmento})")
         predicciones_sku = {'numero_pieza': sku}
@@ -303,6 +312,8 @@ def ejecutar_inferencia(taller_id: int, fecha_prediccion_str: str):
 
         for i, fecha_futura in enumerate(fechas_a_predecir):
             features_para_predecir_df = generar_features_futuras(historia_temporal, fecha_futura, ar_holidays)
+            for col, valor in features_taller.items():
+                features_para_predecir_df[col] = valor
             features_para_predecir_df = features_para_predecir_df[features_del_modelo]
             prediccion_raw = modelo.predict(features_para_predecir_df)
             prediccion_final = np.maximum(0, prediccion_raw).round().astype(int)[0]
@@ -322,7 +333,9 @@ def ejecutar_inferencia(taller_id: int, fecha_prediccion_str: str):
 
     if resultados_finales:
         print("\n--- Guardando predicciones en la base de datos ---")
-        guardar_predicciones_db(taller_id, resultados_finales)
+        with etapa("guardar_predicciones", taller_id=taller_id):
+            registrar_filas(len(resultados_finales))
+            guardar_predicciones_db(taller_id, resultados_finales)
 
 
     else:
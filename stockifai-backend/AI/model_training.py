@@ -1,13 +1,18 @@
 import os
+from datetime import datetime
+
 import pandas as pd
 import numpy as np
 import lightgbm as lgb
 from sklearn.metrics import mean_squared_error, mean_absolute_error
-import joblib
 import warnings
 import django
 from django.db import transaction  # Import transaction
 
+from AI.services.instrumentacion import etapa, registrar_filas
+from AI.services.modelos_lgbm import RUTA_BASE_MODELOS, cargar_modelo, guardar_modelo, ruta_modelo_taller
+from AI.services.politica_reentrenamiento import FULL, INFERENCIA, WARM_START, Decision, decidir, \
+    guardar_metadata, leer_metadata
 from d_externo.models import RegistroEntrenamiento_Frecuencia_Alta, RegistroEntrenamiento_intermitente
 from d_externo.repositories.dataexterna import borrar_registroentrenamiento_frecuencia_alta, \
     borrar_registroentrenamiento_intermitente
@@ -16,7 +21,9 @@ from user.models import Taller
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
 CHUNK_SIZE = 1000
-RUTA_BASE_MODELOS = "models"
+ARBOLES_WARM_START = 100
+# Sin semanas para validar el incremento no hay early stopping: se agregan pocos árboles
+ARBOLES_WARM_START_SIN_VALIDACION = 20
 
 
 def get_features_for_segment(segmento: str, df_columns: list) -> list:
@@ -60,6 +67,11 @@ def guardar_ultimo_registro_a_db(df: pd.DataFrame, segmento: str, taller_id: int
     Guarda el último registro de cada SKU en la base de datos de Django
     usando bulk_create, asegurando que solo los campos válidos se pasen al constructor.
     """
+    with etapa("guardar_ultimos_registros", taller_id=taller_id, segmento=segmento):
+        _guardar_ultimo_registro_a_db(df, segmento, taller_id)
+
+
+def _guardar_ultimo_registro_a_db(df: pd.DataFrame, segmento: str, taller_id: int):
     try:
         taller = Taller.objects.get(id=taller_id)
     except Taller.DoesNotExist:
@@ -140,6 +152,7 @@ def guardar_ultimo_registro_a_db(df: pd.DataFrame, segmento: str, taller_id: int
                     )
 
         total_guardados = len(objetos_a_crear)
+        registrar_filas(total_guardados)
         print(f"Últimos registros de {total_guardados} SKUs guardados con éxito mediante BULK CREATE en '{segmento}'.")
 
     except Exception as e:
@@ -149,19 +162,121 @@ def guardar_ultimo_registro_a_db(df: pd.DataFrame, segmento: str, taller_id: int
             f"Error al guardar los últimos registros en la base de datos mediante bulk_create. Se ha realizado ROLLBACK: {e}")
 
 
-def train_segment_model(taller: int, segmento: str):
+def nuevo_regresor(n_estimators: int = 1000) -> lgb.LGBMRegressor:
+    """Regresor con los hiperparámetros del forecast (también lo usa el modo global)."""
+    return lgb.LGBMRegressor(
+        objective='regression_l1',
+        metric='mae',
+        random_state=42,
+        n_jobs=-1,
+        learning_rate=0.05,
+        n_estimators=n_estimators,
+        max_depth=8
+    )
+
+
+def evaluar_modelo(modelo, df: pd.DataFrame, features: list, target: str):
+    """(MAE, RMSE) de las predicciones redondeadas y sin negativos."""
+    y_pred = np.maximum(0, modelo.predict(df[features])).round().astype(int)
+    mae = mean_absolute_error(df[target], y_pred)
+    rmse = np.sqrt(mean_squared_error(df[target], y_pred))
+    return mae, rmse
+
+
+def _cargar_modelo_vigente(ruta_modelo: str, metadata):
+    if not metadata:
+        return None
+    try:
+        return cargar_modelo(ruta_modelo)
+    except Exception as e:
+        print(f"Advertencia: No se pudo cargar el modelo vigente '{ruta_modelo}': {e}")
+        return None
+
+
+def _entrenamiento_completo(df_train: pd.DataFrame, df_val: pd.DataFrame, features: list, target: str):
+    # Validación (rolling forecast) - Se mantiene el código de entrenamiento y validación
+    fechas_val_unicas = sorted(df_val['fecha'].unique())
+    all_val_predictions = pd.DataFrame()
+
+    if len(fechas_val_unicas) >= 4:
+        for i in range(len(fechas_val_unicas)):
+            current_fecha_val = fechas_val_unicas[i]
+
+            df_train_temp = pd.concat([df_train, df_val[df_val['fecha'] < current_fecha_val]]).copy()
+            df_test_temp = df_val[df_val['fecha'] == current_fecha_val].copy()
+
+            X_train, y_train = df_train_temp[features], df_train_temp[target]
+            X_test, y_test = df_test_temp[features], df_test_temp[target]
+
+            if X_train.empty or X_test.empty:
+                continue
+
+            lgb_model_val = nuevo_regresor()
+
+            lgb_model_val.fit(X_train, y_train,
+                              eval_set=[(X_test, y_test)],
+                              eval_metric='mae',
+                              callbacks=[lgb.early_stopping(50, verbose=False)])
+
+            y_pred_val = lgb_model_val.predict(X_test)
+            y_pred_clipped = np.maximum(0, y_pred_val).round().astype(int)
+
+            df_test_temp['pred'] = y_pred_clipped
+            all_val_predictions = pd.concat([all_val_predictions, df_test_temp], ignore_index=True)
+    else:
+        print("Advertencia: No hay suficientes semanas para la validación. Saltando la validación.")
+
+    # Entrenamiento final
+    df_full_train = pd.concat([df_train, df_val]).copy()
+    X_full_train, y_full_train = df_full_train[features], df_full_train[target]
+
+    lgb_final_model = nuevo_regresor()
+    lgb_final_model.fit(X_full_train, y_full_train)
+    return lgb_final_model
+
+
+def _warm_start(modelo_vigente, df_nuevo: pd.DataFrame, features: list, target: str):
+    """
+    Agrega árboles al modelo vigente con las semanas nuevas. Como en el entrenamiento
+    completo, la última semana nueva valida una pasada con early stopping que fija
+    cuántos árboles agregar, y el incremento final se entrena con todas las semanas nuevas.
     """
-    Carga datos preprocesados y entrena un modelo LightGBM para un segmento específico.
+    booster = modelo_vigente.booster
+    arboles = ARBOLES_WARM_START_SIN_VALIDACION
+    ultima_semana = df_nuevo['fecha'].max()
+    df_fit = df_nuevo[df_nuevo['fecha'] < ultima_semana]
+    df_val = df_nuevo[df_nuevo['fecha'] == ultima_semana]
+    if not df_fit.empty:
+        exploratorio = nuevo_regresor(n_estimators=ARBOLES_WARM_START)
+        exploratorio.fit(df_fit[features], df_fit[target], init_model=booster,
+                         eval_set=[(df_val[features], df_val[target])], eval_metric='mae',
+                         callbacks=[lgb.early_stopping(10, verbose=False)])
+        # best_iteration_ cuenta también los árboles del modelo vigente
+        if exploratorio.best_iteration_:
+            arboles = max(exploratorio.best_iteration_ - booster.current_iteration(), 1)
+
+    modelo = nuevo_regresor(n_estimators=arboles)
+    modelo.fit(df_nuevo[features], df_nuevo[target], init_model=booster)
+    return modelo
+
+
+def train_segment_model(taller: int, segmento: str, directorio_datos: str = None):
+    """
+    Carga datos preprocesados (de ``directorio_datos``, por defecto la carpeta de modelos)
+    y, según la política de reentrenamiento, reentrena desde cero, continúa el modelo
+    vigente (warm start) o solo lo reutiliza para inferencia.
+    Devuelve la acción aplicada o None si el segmento no se pudo procesar.
     """
     ruta_segmento_data = os.path.join(RUTA_BASE_MODELOS, str(taller), segmento)
-    ruta_archivo_train = os.path.join(ruta_segmento_data, f"demanda_preprocesada_{segmento}_train.csv")
-    ruta_archivo_val = os.path.join(ruta_segmento_data, f"demanda_preprocesada_{segmento}_val.csv")
-    ruta_archivo_test = os.path.join(ruta_segmento_data, f"demanda_preprocesada_{segmento}_test.csv")
+    ruta_csv = os.path.join(directorio_datos or RUTA_BASE_MODELOS, str(taller), segmento)
+    ruta_archivo_train = os.path.join(ruta_csv, f"demanda_preprocesada_{segmento}_train.csv")
+    ruta_archivo_val = os.path.join(ruta_csv, f"demanda_preprocesada_{segmento}_val.csv")
+    ruta_archivo_test = os.path.join(ruta_csv, f"demanda_preprocesada_{segmento}_test.csv")
 
     if not os.path.isfile(ruta_archivo_train) or not os.path.isfile(ruta_archivo_val) or not os.path.isfile(
             ruta_archivo_test):
         print(f"Advertencia: No se encontraron todos los archivos de datos para el segmento '{segmento}'. Saltando.")
-        return
+        return None
 
     try:
         print(f"\n--- INICIANDO ENTRENAMIENTO PARA EL SEGMENTO: '{segmento.upper()}' ---")
@@ -178,105 +293,102 @@ def train_segment_model(taller: int, segmento: str):
 
         if TARGET not in df_train.columns or not features:
             print(f"Error: No se encontraron las columnas necesarias en los archivos de datos para '{segmento}'.")
-            return
-
-        # Validación (rolling forecast) - Se mantiene el código de entrenamiento y validación
-        fechas_val_unicas = sorted(df_val['fecha'].unique())
-        all_val_predictions = pd.DataFrame()
-
-        if len(fechas_val_unicas) >= 4:
-            for i in range(len(fechas_val_unicas)):
-                current_fecha_val = fechas_val_unicas[i]
-
-                df_train_temp = pd.concat([df_train, df_val[df_val['fecha'] < current_fecha_val]]).copy()
-                df_test_temp = df_val[df_val['fecha'] == current_fecha_val].copy()
-
-                X_train, y_train = df_train_temp[features], df_train_temp[TARGET]
-                X_test, y_test = df_test_temp[features], df_test_temp[TARGET]
-
-                if X_train.empty or X_test.empty:
-                    continue
-
-                lgb_model_val = lgb.LGBMRegressor(
-                    objective='regression_l1',
-                    metric='mae',
-                    random_state=42,
-                    n_jobs=-1,
-                    learning_rate=0.05,
-                    n_estimators=1000,
-                    max_depth=8
-                )
+            return None
 
-                lgb_model_val.fit(X_train, y_train,
-                                  eval_set=[(X_test, y_test)],
-                                  eval_metric='mae',
-                                  callbacks=[lgb.early_stopping(50, verbose=False)])
+        ruta_guardado_modelo = ruta_modelo_taller(taller, segmento)
 
-                y_pred_val = lgb_model_val.predict(X_test)
-                y_pred_clipped = np.maximum(0, y_pred_val).round().astype(int)
+        # Política: evaluar el modelo vigente con las semanas más recientes
+        metadata = leer_metadata(ruta_segmento_data)
+        modelo_vigente = _cargar_modelo_vigente(ruta_guardado_modelo, metadata)
+        mae_vigente = None
+        if modelo_vigente is not None and modelo_vigente.features == features:
+            mae_vigente, _ = evaluar_modelo(modelo_vigente, df_test, features, TARGET)
+        media_reciente = float(pd.concat([df_val[TARGET], df_test[TARGET]]).mean())
 
-                df_test_temp['pred'] = y_pred_clipped
-                all_val_predictions = pd.concat([all_val_predictions, df_test_temp], ignore_index=True)
-        else:
-            print("Advertencia: No hay suficientes semanas para la validación. Saltando la validación.")
-
-        # Entrenamiento final
         df_full_train = pd.concat([df_train, df_val]).copy()
-        X_full_train, y_full_train = df_full_train[features], df_full_train[TARGET]
-
-        lgb_final_model = lgb.LGBMRegressor(
-            objective='regression_l1',
-            metric='mae',
-            random_state=42,
-            n_jobs=-1,
-            learning_rate=0.05,
-            n_estimators=1000,
-            max_depth=8
-        )
-
-        lgb_final_model.fit(X_full_train, y_full_train)
+        registrar_filas(len(df_full_train))
+        fecha_max_datos = df_full_train['fecha'].max()
+
+        decision = decidir(metadata, features, mae_vigente, media_reciente)
+        if decision.accion == WARM_START:
+            df_nuevo = df_full_train[df_full_train['fecha'] > pd.Timestamp(metadata["fecha_max_datos"])]
+            if df_nuevo.empty:
+                decision = Decision(INFERENCIA, "sin semanas nuevas para warm start", decision.metricas)
+        print(f"Política de reentrenamiento para '{segmento}': {decision.accion} ({decision.motivo})")
+
+        ahora = datetime.now()
+        if decision.accion == INFERENCIA:
+            metadata["ultima_evaluacion"] = {"fecha": ahora.isoformat(), "accion": INFERENCIA, **decision.metricas}
+            guardar_metadata(ruta_segmento_data, metadata)
+            guardar_ultimo_registro_a_db(df_test, segmento, taller_id=taller)
+            return _finalizar_segmento(decision.accion, [ruta_archivo_train, ruta_archivo_val, ruta_archivo_test])
+
+        if decision.accion == WARM_START:
+            modelo = _warm_start(modelo_vigente, df_nuevo, features, TARGET)
+        else:
+            modelo = _entrenamiento_completo(df_train, df_val, features, TARGET)
 
         # Predicción en test
-        X_test, y_test = df_test[features], df_test[TARGET]
-        y_pred_test = lgb_final_model.predict(X_test)
-        y_pred_clipped_test = np.maximum(0, y_pred_test).round().astype(int)
-
-        mae_final = mean_absolute_error(y_test, y_pred_clipped_test)
-        rmse_final = np.sqrt(mean_squared_error(y_test, y_pred_clipped_test))
+        mae_final, rmse_final = evaluar_modelo(modelo, df_test, features, TARGET)
 
         print(f"Error Absoluto Medio (MAE) Final: {mae_final:.2f}")
         print(f"Raíz del Error Cuadrático Medio (RMSE) Final: {rmse_final:.2f}")
 
         # Guardar modelo
-        model_filename = f"modelo_lightgbm_{segmento}_final.pkl"
-        ruta_guardado_modelo = os.path.join(ruta_segmento_data, model_filename)
-        joblib.dump(lgb_final_model, ruta_guardado_modelo)
+        guardar_modelo(modelo, ruta_guardado_modelo, {"segmento": segmento, "accion": decision.accion})
         print(f"Modelo final para '{segmento}' guardado en '{ruta_guardado_modelo}'.")
 
+        if decision.accion == FULL:
+            metadata = {
+                "fecha_entrenamiento_full": ahora.isoformat(),
+                "mae_referencia": mae_final,
+                "media_referencia": media_reciente,
+                "features": features,
+                "warm_starts": 0,
+            }
+        else:
+            metadata["warm_starts"] = metadata.get("warm_starts", 0) + 1
+        metadata.update({
+            "fecha_entrenamiento": ahora.isoformat(),
+            "accion": decision.accion,
+            "mae": mae_final,
+            "rmse": rmse_final,
+            "fecha_max_datos": fecha_max_datos.isoformat(),
+            "filas_entrenamiento": int(len(df_full_train)),
+            "ultima_evaluacion": {"fecha": ahora.isoformat(), "accion": decision.accion, **decision.metricas},
+        })
+        guardar_metadata(ruta_segmento_data, metadata)
+
         # Guardar resultados en DB
         # Esto usará la función corregida con whitelisting
         guardar_ultimo_registro_a_db(df_test, segmento, taller_id=taller)
 
     except Exception as e:
         print(f"Error durante el entrenamiento del segmento '{segmento}': {e}")
-        return
+        return None
 
-    else:
-        # Solo si fue exitoso, eliminar archivos CSV
-        for ruta in [ruta_archivo_train, ruta_archivo_val, ruta_archivo_test]:
-            try:
-                os.remove(ruta)
-                print(f"Archivo '{ruta}' eliminado correctamente.")
-            except Exception as e:
-                print(f"No se pudo eliminar '{ruta}': {e}")
+    return _finalizar_segmento(decision.accion, [ruta_archivo_train, ruta_archivo_val, ruta_archivo_test])
+
+
+def _finalizar_segmento(accion: str, rutas_csv: list) -> str:
+    # Solo si fue exitoso, eliminar archivos CSV
+    for ruta in rutas_csv:
+        try:
+            os.remove(ruta)
+            print(f"Archivo '{ruta}' eliminado correctamente.")
+        except Exception as e:
+            print(f"No se pudo eliminar '{ruta}': {e}")
+    return accion
 
 
-def ejecutar_pipeline_entrenamiento(taller_id: int):
+def ejecutar_pipeline_entrenamiento(taller_id: int, directorio_datos: str = None):
     """
-    Ejecuta el pipeline de entrenamiento para todos los segments de un taller.
+    Ejecuta el pipeline de entrenamiento para todos los segments de un taller, con los
+    CSV preprocesados en ``directorio_datos`` (por defecto la carpeta de modelos).
+    Devuelve {segmento: acción} para los segmentos procesados con éxito.
     """
 
-    ruta_taller_output = os.path.join(RUTA_BASE_MODELOS, str(taller_id))
+    ruta_taller_output = os.path.join(directorio_datos or RUTA_BASE_MODELOS, str(taller_id))
 
     if not os.path.isdir(ruta_taller_output):
         print(f"Error: No se encontró la carpeta del taller en '{ruta_taller_output}'.")
@@ -290,10 +402,16 @@ def ejecutar_pipeline_entrenamiento(taller_id: int):
         print(f"No se encontraron subcarpetas de segmentos entrenables en '{ruta_taller_output}'.")
         return
 
+    acciones = {}
     for segmento in segmentos:
-        train_segment_model(taller_id, segmento)
+        with etapa("entrenar_segmento", taller_id=taller_id, segmento=segmento) as metricas:
+            accion = train_segment_model(taller_id, segmento, directorio_datos)
+            metricas.extra["accion"] = accion
+        if accion:
+            acciones[segmento] = accion
 
     print("\n--- PROCESO DE ENTRENAMIENTO COMPLETO ---")
+    return acciones
 
 
 if __name__ == '__main__':
@@ -0,0 +1,158 @@
+"""
+Almacén de artefactos de modelos versionados.
+
+Cada artefacto es un directorio con un ``manifest.json`` que apunta a la versión
+vigente y una carpeta ``versiones/<version>/`` inmutable por cada publicación:
+
+    <artefacto>/manifest.json
+    <artefacto>/versiones/20250106T030000123456-4242-a1b2/modelo.txt
+
+Publicar escribe la versión en una carpeta temporal, la renombra (``os.rename``
+es atómico dentro del mismo filesystem) y recién después reemplaza el manifest con
+``os.replace``. Un lector lee el manifest una vez, fija esa versión y lee solo de su
+carpeta, así nunca ve un modelo a medio escribir aunque haya un entrenamiento en
+curso. Se conservan las últimas FORECAST_VERSIONES_A_CONSERVAR versiones.
+
+Los CSV del preproceso van a un directorio de trabajo por corrida
+(``crear_directorio_corrida``) para que dos corridas del mismo taller no se pisen.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+
+RUTA_BASE_MODELOS = getattr(settings, "FORECAST_MODELOS_DIR", "models")
+
+ARCHIVO_MANIFEST = "manifest.json"
+CARPETA_VERSIONES = "versiones"
+CARPETA_CORRIDAS = "_corridas"
+PREFIJO_TEMPORAL = ".tmp-"
+# Carpetas temporales o de corridas más viejas que esto se consideran abandonadas
+SEGUNDOS_ABANDONO = 6 * 3600
+
+_manifest_lock = threading.Lock()
+
+
+def _nueva_version() -> str:
+    # Ordenable por fecha; pid y sufijo aleatorio evitan choques entre procesos
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+
+
+def ruta_version(ruta_artefacto: str, version: str) -> str:
+    return os.path.join(ruta_artefacto, CARPETA_VERSIONES, version)
+
+
+def leer_manifest(ruta_artefacto: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(ruta_artefacto, ARCHIVO_MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def version_vigente(ruta_artefacto: str) -> Optional[str]:
+    manifest = leer_manifest(ruta_artefacto)
+    return manifest.get("vigente") if manifest else None
+
+
+def _guardar_manifest(ruta_artefacto: str, version: str, metadata: Dict[str, Any]) -> None:
+    ruta = os.path.join(ruta_artefacto, ARCHIVO_MANIFEST)
+    tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with _manifest_lock:
+        actual = version_vigente(ruta_artefacto)
+        # Si una publicación más nueva terminó antes, no se la pisa con una vieja
+        if actual and actual > version:
+            return
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"vigente": version, "publicado": datetime.now().isoformat(), "metadata": metadata},
+                      f, default=str)
+        os.replace(tmp, ruta)
+
+
+def publicar(ruta_artefacto: str, escribir: Callable[[str], None],
+             metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Publica una versión nueva: ``escribir(carpeta)`` genera los archivos en una carpeta
+    temporal que luego se renombra y se marca como vigente. Devuelve la versión.
+    """
+    version = _nueva_version()
+    carpeta_versiones = os.path.join(ruta_artefacto, CARPETA_VERSIONES)
+    os.makedirs(carpeta_versiones, exist_ok=True)
+
+    temporal = os.path.join(carpeta_versiones, PREFIJO_TEMPORAL + version)
+    os.makedirs(temporal)
+    try:
+        escribir(temporal)
+        os.rename(temporal, ruta_version(ruta_artefacto, version))
+    except Exception:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+
+    _guardar_manifest(ruta_artefacto, version, metadata or {})
+    podar_versiones(ruta_artefacto)
+    return version
+
+
+def listar_versiones(ruta_artefacto: str) -> List[str]:
+    try:
+        nombres = os.listdir(os.path.join(ruta_artefacto, CARPETA_VERSIONES))
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in nombres if not n.startswith(PREFIJO_TEMPORAL))
+
+
+def _es_abandonada(ruta: str) -> bool:
+    try:
+        return time.time() - os.stat(ruta).st_mtime > SEGUNDOS_ABANDONO
+    except FileNotFoundError:
+        return False
+
+
+def podar_versiones(ruta_artefacto: str, conservar: Optional[int] = None) -> List[str]:
+    """Borra las versiones más viejas que las últimas ``conservar`` (nunca la vigente)."""
+    if conservar is None:
+        conservar = getattr(settings, "FORECAST_VERSIONES_A_CONSERVAR", 3)
+    conservar = max(conservar, 1)
+
+    vigente = version_vigente(ruta_artefacto)
+    versiones = listar_versiones(ruta_artefacto)
+    borradas = []
+    for version in versiones[:-conservar]:
+        if version == vigente:
+            continue
+        shutil.rmtree(ruta_version(ruta_artefacto, version), ignore_errors=True)
+        borradas.append(version)
+
+    carpeta_versiones = os.path.join(ruta_artefacto, CARPETA_VERSIONES)
+    for nombre in os.listdir(carpeta_versiones) if os.path.isdir(carpeta_versiones) else []:
+        ruta = os.path.join(carpeta_versiones, nombre)
+        if nombre.startswith(PREFIJO_TEMPORAL) and _es_abandonada(ruta):
+            shutil.rmtree(ruta, ignore_errors=True)
+    return borradas
+
+
+def crear_directorio_corrida() -> str:
+    """Directorio de trabajo exclusivo de una corrida del pipeline (CSV del preproceso)."""
+    base = os.path.join(RUTA_BASE_MODELOS, CARPETA_CORRIDAS)
+    os.makedirs(base, exist_ok=True)
+    for nombre in os.listdir(base):
+        ruta = os.path.join(base, nombre)
+        if _es_abandonada(ruta):
+            shutil.rmtree(ruta, ignore_errors=True)
+
+    ruta = os.path.join(base, _nueva_version())
+    os.makedirs(ruta)
+    return ruta
+
+
+def borrar_directorio_corrida(ruta: str) -> None:
+    shutil.rmtree(ruta, ignore_errors=True)
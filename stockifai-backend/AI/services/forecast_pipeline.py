@@ -2,39 +2,128 @@ from __future__ import annotations
 from datetime import datetime, date, timedelta
 from typing import Dict, Any, Optional, List
 
-from AI.historicos import ejecutar_preproceso
+from AI.entrenamiento_global import MODO_GLOBAL, entrenar_modelos_globales, modo_entrenamiento
+from AI.historicos import ejecutar_preproceso, integrar_datos_externos_base
 from AI.model_training import ejecutar_pipeline_entrenamiento
 from AI.inferencia import ejecutar_inferencia
+from AI.services.artefactos import borrar_directorio_corrida, crear_directorio_corrida
+from AI.services.instrumentacion import corrida, corrida_actual, etapa
+from AI.services.huella_datos import calcular_huella_taller, guardar_huella, huella_vigente, invalidar_huella, \
+    leer_huella
+from d_externo.repositories.dataexterna import huella_datos_externos
 from user.models import Taller
 
 
-def ejecutar_forecast_pipeline_por_taller(taller_id: int, fecha_lunes: datetime) -> Dict[str, Any]:
+def ejecutar_forecast_pipeline_por_taller(taller_id: int, fecha_lunes: datetime,
+                                          df_externos=None, huella_externos: Optional[str] = None,
+                                          forzar: bool = False) -> Dict[str, Any]:
+    if corrida_actual() is not None:
+        # Parte de una corrida de todos los talleres
+        with etapa("taller", taller_id=taller_id):
+            return _forecast_taller(taller_id, fecha_lunes, df_externos, huella_externos, forzar)
+
+    with corrida("forecast_taller") as actual:
+        with etapa("taller", taller_id=taller_id):
+            result = _forecast_taller(taller_id, fecha_lunes, df_externos, huella_externos, forzar)
+        actual.resultado = {"ok": [{"taller_id": taller_id}], "errores": []}
+        result["perfil"] = actual.resumen()
+    return result
+
+
+def _forecast_taller(taller_id: int, fecha_lunes: datetime, df_externos, huella_externos: Optional[str],
+                     forzar: bool) -> Dict[str, Any]:
     fecha_lunes = _normalize_fecha_lunes(fecha_lunes)
 
     result: Dict[str, Any] = {"taller_id": taller_id, "fecha_lunes": fecha_lunes}
 
-    print(f"\n--- PASO 1: Preproceso - Taller: {taller_id} ---")
-    pp = ejecutar_preproceso(taller_id=taller_id, output_dir_base="models")
-    result["preprocess"] = {"segmentos": list(pp.keys()) if pp else []}
+    if huella_externos is None:
+        huella_externos = huella_datos_externos()
+    huella = calcular_huella_taller(taller_id, huella_externos)
 
-    print("\n--- PASO 2: Entrenando modelos ---")
-    ejecutar_pipeline_entrenamiento(taller_id)
+    # Los CSV del preproceso van a un directorio propio de la corrida: otra corrida
+    # concurrente del mismo taller no los pisa ni los borra.
+    directorio_corrida = crear_directorio_corrida()
+    try:
+        _preprocesar_y_entrenar(taller_id, huella, result, directorio_corrida, df_externos, forzar)
+    finally:
+        borrar_directorio_corrida(directorio_corrida)
 
     print("\n--- PASO 3: Realizando inferencias ---")
-    ejecutar_inferencia(taller_id=taller_id, fecha_prediccion_str=fecha_lunes)
+    with etapa("inferencia", taller_id=taller_id):
+        ejecutar_inferencia(taller_id=taller_id, fecha_prediccion_str=fecha_lunes)
 
     print(f"\n--- Fin del forecasting - Taller: {taller_id} ---")
     return result
 
 
-def ejecutar_forecast_talleres(fecha_lunes: datetime) -> Dict[str, Any]:
+def _preprocesar_y_entrenar(taller_id: int, huella: Dict[str, Any], result: Dict[str, Any], directorio_corrida: str,
+                            df_externos, forzar: bool) -> None:
+    if modo_entrenamiento() == MODO_GLOBAL:
+        # Se reutiliza el modelo global vigente; el entrenamiento conjunto lo hace
+        # ejecutar_forecast_talleres. Si todavía no existe, entrenar_modelos_globales
+        # lanza ModeloGlobalInexistente en lugar de armarlo con este taller solo.
+        print(f"\n--- PASO 1: Preproceso - Taller: {taller_id} ---")
+        with etapa("preproceso", taller_id=taller_id):
+            pp = ejecutar_preproceso(taller_id=taller_id, output_dir_base=directorio_corrida, df_externos=df_externos)
+        result["preprocess"] = {"segmentos": list(pp.keys()) if pp else [], "cache": False}
+        print("\n--- PASO 2: Actualizando taller en el modelo global ---")
+        with etapa("entrenamiento", taller_id=taller_id):
+            result["entrenamiento"] = entrenar_modelos_globales([taller_id], reentrenar=False,
+                                                                directorio_datos=directorio_corrida)
+    elif not forzar and huella_vigente(taller_id, huella):
+        # Sin movimientos ni indicadores nuevos: se reutilizan los modelos y los
+        # últimos registros ya guardados, solo se vuelve a inferir.
+        print(f"\n--- Taller {taller_id} sin cambios desde el último entrenamiento: se omiten preproceso y entrenamiento ---")
+        result["preprocess"] = {"segmentos": leer_huella(taller_id)["segmentos"], "cache": True}
+    else:
+        invalidar_huella(taller_id)
+
+        print(f"\n--- PASO 1: Preproceso - Taller: {taller_id} ---")
+        with etapa("preproceso", taller_id=taller_id):
+            pp = ejecutar_preproceso(taller_id=taller_id, output_dir_base=directorio_corrida, df_externos=df_externos)
+        result["preprocess"] = {"segmentos": list(pp.keys()) if pp else [], "cache": False}
+
+        print("\n--- PASO 2: Entrenando modelos ---")
+        with etapa("entrenamiento", taller_id=taller_id):
+            acciones = ejecutar_pipeline_entrenamiento(taller_id, directorio_corrida) or {}
+        result["entrenamiento"] = acciones
+        if pp:
+            guardar_huella(taller_id, huella, pp.keys(), acciones.keys())
+
+
+def ejecutar_forecast_talleres(fecha_lunes: datetime, forzar: bool = False) -> Dict[str, Any]:
+    """
+    Forecast de todos los talleres. El resultado incluye ``corrida_id`` y ``perfil``
+    (resumen por etapa, también guardado como EjecucionForecast).
+    """
+    with corrida("forecast_talleres") as actual:
+        result = _forecast_talleres(fecha_lunes, forzar)
+        actual.resultado = result
+    result["corrida_id"] = actual.id
+    result["duracion_s"] = actual.duracion_s
+    result["queries"] = actual.queries
+    result["perfil"] = actual.tabla()
+    return result
+
+
+def _forecast_talleres(fecha_lunes: datetime, forzar: bool) -> Dict[str, Any]:
     ids: list[int] = list(Taller.objects.values_list("id", flat=True))
     outputs: List[Dict[str, Any]] = []
     errores: List[Dict[str, Any]] = []
 
+    # Los indicadores externos son los mismos para todos los talleres: se calculan una vez
+    with etapa("datos_externos"):
+        df_externos = integrar_datos_externos_base()
+        huella_externos = huella_datos_externos()
+
+    if modo_entrenamiento() == MODO_GLOBAL:
+        return _ejecutar_forecast_global(ids, fecha_lunes, df_externos)
+
     for taller_id in ids:
         try:
-            out = ejecutar_forecast_pipeline_por_taller(taller_id, fecha_lunes)
+            out = ejecutar_forecast_pipeline_por_taller(
+                taller_id, fecha_lunes, df_externos=df_externos, huella_externos=huella_externos, forzar=forzar
+            )
             outputs.append({"taller_id": taller_id})
         except Exception as e:
             # no frenamos toda la corrida por un taller
@@ -43,6 +132,48 @@ def ejecutar_forecast_talleres(fecha_lunes: datetime) -> Dict[str, Any]:
     return {"fecha_lunes": fecha_lunes, "talleres": ids, "ok": outputs, "errores": errores}
 
 
+def _ejecutar_forecast_global(ids: List[int], fecha_lunes: datetime, df_externos) -> Dict[str, Any]:
+    """
+    Modo global: preproceso de todos los talleres, un único entrenamiento por segmento
+    con todos los datasets y luego la inferencia de cada taller con el modelo compartido.
+    (No usa la huella por taller: el modelo conjunto necesita los datasets de todos.)
+    """
+    fecha_lunes = _normalize_fecha_lunes(fecha_lunes)
+    outputs: List[Dict[str, Any]] = []
+    errores: List[Dict[str, Any]] = []
+
+    preprocesados: List[int] = []
+    directorio_corrida = crear_directorio_corrida()
+    try:
+        for taller_id in ids:
+            try:
+                print(f"\n--- PASO 1: Preproceso - Taller: {taller_id} ---")
+                with etapa("preproceso", taller_id=taller_id):
+                    pp = ejecutar_preproceso(taller_id=taller_id, output_dir_base=directorio_corrida,
+                                             df_externos=df_externos)
+                if pp:
+                    preprocesados.append(taller_id)
+            except Exception as e:
+                errores.append({"taller_id": taller_id, "error": str(e)})
+
+        print("\n--- PASO 2: Entrenamiento global ---")
+        with etapa("entrenamiento_global"):
+            entrenar_modelos_globales(preprocesados, directorio_datos=directorio_corrida)
+    finally:
+        borrar_directorio_corrida(directorio_corrida)
+
+    print("\n--- PASO 3: Realizando inferencias ---")
+    for taller_id in preprocesados:
+        try:
+            with etapa("inferencia", taller_id=taller_id):
+                ejecutar_inferencia(taller_id=taller_id, fecha_prediccion_str=fecha_lunes)
+            outputs.append({"taller_id": taller_id})
+        except Exception as e:
+            errores.append({"taller_id": taller_id, "error": str(e)})
+
+    return {"fecha_lunes": fecha_lunes, "talleres": ids, "ok": outputs, "errores": errores}
+
+
 
 def _normalize_fecha_lunes(fecha_lunes: datetime) -> str:
     # Mover al lunes anterior si no es lunes
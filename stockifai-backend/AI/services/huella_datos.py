@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+from django.db.models import Count, Max
+
+from AI.services.modelos_lgbm import RUTA_BASE_MODELOS, existe_modelo, ruta_modelo_taller
+from inventario.repositories.movimiento_repo import MovimientoRepo
+
+# Subir este valor al cambiar el preproceso o el entrenamiento (features, hiperparámetros)
+# para invalidar los modelos cacheados de todos los talleres.
+VERSION_FEATURES = "1"
+
+ARCHIVO_HUELLA = "huella_datos.json"
+SEGMENTOS_ENTRENABLES = ("frecuencia_alta", "intermitente")
+
+
+def calcular_huella_taller(taller_id: int, huella_externos: str) -> Dict[str, Any]:
+    """
+    Huella de los datos que alimentan el entrenamiento del taller: la ventana de
+    egresos que usa el preproceso, los indicadores externos y la versión del código.
+    """
+    qs = MovimientoRepo().get_egresos_ultimos_5_anios(taller_id=taller_id).order_by()
+    agg = qs.aggregate(n=Count("id"), max_id=Max("id"), max_fecha=Max("fecha"))
+    return {
+        "movimientos": agg["n"],
+        "max_movimiento_id": agg["max_id"],
+        "max_fecha": agg["max_fecha"].isoformat() if agg["max_fecha"] else None,
+        "externos": huella_externos,
+        "version_features": VERSION_FEATURES,
+    }
+
+
+def _ruta_huella(taller_id: int) -> str:
+    return os.path.join(RUTA_BASE_MODELOS, str(taller_id), ARCHIVO_HUELLA)
+
+
+def leer_huella(taller_id: int) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_ruta_huella(taller_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def modelos_en_disco(taller_id: int) -> list[str]:
+    segmentos = []
+    for segmento in SEGMENTOS_ENTRENABLES:
+        if existe_modelo(ruta_modelo_taller(taller_id, segmento)):
+            segmentos.append(segmento)
+    return segmentos
+
+
+def invalidar_huella(taller_id: int) -> None:
+    try:
+        os.remove(_ruta_huella(taller_id))
+    except FileNotFoundError:
+        pass
+
+
+def guardar_huella(taller_id: int, huella: Dict[str, Any], segmentos_esperados, segmentos_procesados) -> bool:
+    """
+    Registra la huella solo si todos los segmentos preprocesados se procesaron con éxito
+    en esta corrida; si alguno falló, la próxima corrida vuelve a entrenar.
+    """
+    entrenados = sorted(set(segmentos_procesados) & set(modelos_en_disco(taller_id)))
+    if not entrenados or not set(segmentos_esperados) <= set(entrenados):
+        return False
+
+    ruta = _ruta_huella(taller_id)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    contenido = {"datos": huella, "segmentos": entrenados}
+    tmp = f"{ruta}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(contenido, f)
+    os.replace(tmp, ruta)
+    return True
+
+
+def huella_vigente(taller_id: int, huella: Dict[str, Any]) -> bool:
+    """
+    True si los datos no cambiaron desde el último entrenamiento y los modelos
+    que se generaron entonces siguen en disco.
+    """
+    guardada = leer_huella(taller_id)
+    if not guardada or guardada.get("datos") != huella:
+        return False
+    segmentos = guardada.get("segmentos") or []
+    return bool(segmentos) and set(segmentos) <= set(modelos_en_disco(taller_id))
@@ -0,0 +1,182 @@
+"""
+Instrumentación liviana del pipeline de forecast.
+
+``etapa(nombre, taller_id=..., segmento=...)`` mide una porción del pipeline: tiempo,
+cantidad y duración de las queries (``connection.execute_wrapper``), filas
+procesadas (``registrar_filas``) y RSS máximo del proceso. Cada etapa se emite como
+una línea JSON en el logger ``stockifai.forecast``. Dentro de ``corrida(...)`` las
+etapas además se acumulan y al cerrar se guarda un ``EjecucionForecast`` con la tabla
+resumen por etapa.
+
+Los tiempos son inclusivos: una etapa anidada también cuenta en la que la contiene.
+Este módulo no importa pandas ni LightGBM.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.db import connection
+from django.utils import timezone
+
+from stockifai.metricas import ContadorSQL, rss_max_mb
+
+logger = logging.getLogger("stockifai.forecast")
+
+
+@dataclass
+class MetricasEtapa:
+    nombre: str
+    taller_id: Optional[int] = None
+    segmento: Optional[str] = None
+    duracion_s: float = 0.0
+    queries: int = 0
+    tiempo_sql_s: float = 0.0
+    filas: int = 0
+    rss_max_mb: Optional[float] = None
+    error: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+class Corrida:
+    def __init__(self, tipo: str):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.inicio = timezone.now()
+        self.etapas: List[MetricasEtapa] = []
+        self.resultado: Dict[str, Any] = {}
+        self.duracion_s = 0.0
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def agregar(self, metricas: MetricasEtapa) -> None:
+        with self._lock:
+            self.etapas.append(metricas)
+
+    def resumen(self) -> List[Dict[str, Any]]:
+        """Totales por nombre de etapa, en el orden en que aparecieron."""
+        filas: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        for m in self.etapas:
+            fila = filas.setdefault(m.nombre, {
+                "etapa": m.nombre, "veces": 0, "duracion_s": 0.0, "queries": 0,
+                "tiempo_sql_s": 0.0, "filas": 0, "errores": 0,
+            })
+            fila["veces"] += 1
+            fila["duracion_s"] += m.duracion_s
+            fila["queries"] += m.queries
+            fila["tiempo_sql_s"] += m.tiempo_sql_s
+            fila["filas"] += m.filas
+            fila["errores"] += 1 if m.error else 0
+        return list(filas.values())
+
+    def tabla(self) -> str:
+        lineas = [f"{'Etapa':<28}{'Veces':>7}{'Tiempo (s)':>12}{'Queries':>9}{'SQL (s)':>9}{'Filas':>10}{'Errores':>9}"]
+        for f in self.resumen():
+            lineas.append(
+                f"{f['etapa']:<28}{f['veces']:>7}{f['duracion_s']:>12.2f}{f['queries']:>9}"
+                f"{f['tiempo_sql_s']:>9.2f}{f['filas']:>10}{f['errores']:>9}"
+            )
+        return "\n".join(lineas)
+
+
+_corrida_actual: contextvars.ContextVar[Optional[Corrida]] = contextvars.ContextVar("corrida_forecast", default=None)
+_etapa_actual: contextvars.ContextVar[Optional[MetricasEtapa]] = contextvars.ContextVar("etapa_forecast", default=None)
+
+
+def corrida_actual() -> Optional[Corrida]:
+    return _corrida_actual.get()
+
+
+@contextmanager
+def etapa(nombre: str, taller_id: Optional[int] = None, segmento: Optional[str] = None) -> Iterator[MetricasEtapa]:
+    metricas = MetricasEtapa(nombre, taller_id, segmento)
+    actual = _corrida_actual.get()
+    if actual is not None:
+        # Se agrega al empezar para que el resumen respete el orden de las etapas
+        actual.agregar(metricas)
+    contador = ContadorSQL()
+    token = _etapa_actual.set(metricas)
+    inicio = time.perf_counter()
+    try:
+        with connection.execute_wrapper(contador):
+            yield metricas
+    except Exception as e:
+        metricas.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _etapa_actual.reset(token)
+        metricas.duracion_s = time.perf_counter() - inicio
+        metricas.queries = contador.queries
+        metricas.tiempo_sql_s = contador.tiempo_s
+        metricas.rss_max_mb = rss_max_mb()
+        logger.info(json.dumps(
+            {"evento": "etapa", "corrida": actual.id if actual else None, **asdict(metricas)}, default=str
+        ))
+
+
+def registrar_filas(filas: int) -> None:
+    """Suma filas procesadas a la etapa en curso (si la hay)."""
+    metricas = _etapa_actual.get()
+    if metricas is not None:
+        metricas.filas += int(filas)
+
+
+@contextmanager
+def corrida(tipo: str, persistir: bool = True) -> Iterator[Corrida]:
+    """
+    Agrupa las etapas de una ejecución del pipeline. Al terminar guarda un
+    ``EjecucionForecast`` con el resumen; los talleres ok/con error se toman de
+    ``corrida.resultado`` si el bloque lo completa.
+    """
+    actual = Corrida(tipo)
+    contador = ContadorSQL()
+    token = _corrida_actual.set(actual)
+    estado = "ok"
+    inicio = time.perf_counter()
+    try:
+        with connection.execute_wrapper(contador):
+            yield actual
+    except Exception:
+        estado = "error"
+        raise
+    finally:
+        _corrida_actual.reset(token)
+        actual.duracion_s = time.perf_counter() - inicio
+        actual.queries = contador.queries
+        logger.info(json.dumps({
+            "evento": "corrida", "corrida": actual.id, "tipo": tipo, "estado": estado,
+            "duracion_s": actual.duracion_s, "queries": actual.queries, "rss_max_mb": rss_max_mb(),
+            "resumen": actual.resumen(),
+        }, default=str))
+        if persistir:
+            _persistir(actual, estado)
+
+
+def _persistir(actual: Corrida, estado: str) -> None:
+    from d_externo.models import EjecucionForecast
+
+    try:
+        EjecucionForecast.objects.create(
+            corrida_id=actual.id,
+            tipo=actual.tipo,
+            estado=estado,
+            inicio=actual.inicio,
+            duracion_s=actual.duracion_s,
+            talleres_ok=len(actual.resultado.get("ok", [])),
+            talleres_error=len(actual.resultado.get("errores", [])),
+            queries=actual.queries,
+            rss_max_mb=rss_max_mb(),
+            resumen=actual.resumen(),
+        )
+    except Exception as e:
+        # Las métricas nunca deben tirar abajo el forecast
+        logger.warning(f"No se pudo guardar la ejecución del forecast: {e}")
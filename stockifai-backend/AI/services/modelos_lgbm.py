@@ -0,0 +1,190 @@
+"""
+Persistencia de modelos LightGBM en formato nativo.
+
+Cada modelo es un artefacto versionado (ver ``AI/services/artefactos.py``): cada
+publicación guarda ``modelo.txt`` (``Booster.save_model``) más un sidecar
+``modelo.json`` con las features y metadatos en una carpeta de versión inmutable.
+Para predecir se carga un ``Booster`` crudo (sin sklearn ni pickle) de la versión
+vigente y se cachea en memoria por ruta y versión, así cada segmento se lee de disco
+una sola vez por proceso. Los ``<ruta>.txt`` / ``<ruta>.pkl`` sueltos de versiones
+anteriores se siguen pudiendo leer.
+
+Este módulo no importa sklearn: lo usa la inferencia.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from AI.services.artefactos import RUTA_BASE_MODELOS, publicar, ruta_version, version_vigente
+
+ARCHIVO_MODELO = "modelo.txt"
+ARCHIVO_SIDECAR = "modelo.json"
+EXTENSION_MODELO = ".txt"
+EXTENSION_SIDECAR = ".json"
+EXTENSION_LEGADO = ".pkl"
+
+MODO_POR_TALLER = "por_taller"
+MODO_GLOBAL = "global"
+CARPETA_GLOBAL = "global"
+
+
+@dataclass
+class ModeloCargado:
+    booster: lgb.Booster
+    features: List[str]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    version: Optional[str] = None
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        return self.booster.predict(df[self.features].to_numpy(dtype=np.float64))
+
+
+_cache: Dict[str, Tuple[str, ModeloCargado]] = {}
+_cache_lock = threading.Lock()
+
+
+def ruta_modelo_taller(taller_id: int, segmento: str, tipo: str = "final") -> str:
+    """Ruta del artefacto del modelo de un taller; tipo "final" o "ajustado"."""
+    return os.path.join(RUTA_BASE_MODELOS, str(taller_id), segmento, f"modelo_lightgbm_{segmento}_{tipo}")
+
+
+def ruta_modelo_global(segmento: str) -> str:
+    return os.path.join(RUTA_BASE_MODELOS, CARPETA_GLOBAL, segmento, f"modelo_lightgbm_{segmento}_final")
+
+
+def existe_modelo(ruta_base: str) -> bool:
+    return (version_vigente(ruta_base) is not None
+            or os.path.isfile(ruta_base + EXTENSION_MODELO)
+            or os.path.isfile(ruta_base + EXTENSION_LEGADO))
+
+
+def _borrar_legado(ruta_base: str) -> None:
+    for extension in (EXTENSION_MODELO, EXTENSION_SIDECAR, EXTENSION_LEGADO):
+        try:
+            os.remove(ruta_base + extension)
+        except FileNotFoundError:
+            pass
+
+
+def borrar_modelo(ruta_base: str) -> None:
+    """Elimina el artefacto con todas sus versiones (y los archivos legados)."""
+    shutil.rmtree(ruta_base, ignore_errors=True)
+    _borrar_legado(ruta_base)
+    with _cache_lock:
+        _cache.pop(ruta_base, None)
+
+
+def guardar_modelo(modelo, ruta_base: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Publica una versión nueva del modelo (LGBMRegressor o Booster) y devuelve su id.
+    Los lectores siguen usando la versión anterior hasta que se actualiza el manifest.
+    """
+    booster = getattr(modelo, "booster_", modelo)
+    sidecar = {
+        "features": booster.feature_name(),
+        "num_arboles": booster.num_trees(),
+        **(metadata or {}),
+    }
+
+    def escribir(carpeta: str) -> None:
+        booster.save_model(os.path.join(carpeta, ARCHIVO_MODELO))
+        with open(os.path.join(carpeta, ARCHIVO_SIDECAR), "w", encoding="utf-8") as f:
+            json.dump(sidecar, f, default=str)
+
+    version = publicar(ruta_base, escribir, metadata)
+    _borrar_legado(ruta_base)
+    return version
+
+
+def _cargar_booster(ruta_modelo: str, ruta_sidecar: str, version: Optional[str]) -> ModeloCargado:
+    booster = lgb.Booster(model_file=ruta_modelo)
+    try:
+        with open(ruta_sidecar, encoding="utf-8") as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        metadata = {}
+    return ModeloCargado(booster, metadata.get("features") or booster.feature_name(), metadata, version)
+
+
+def _cargar_legado(ruta_base: str) -> Optional[ModeloCargado]:
+    if os.path.isfile(ruta_base + EXTENSION_MODELO):
+        return _cargar_booster(ruta_base + EXTENSION_MODELO, ruta_base + EXTENSION_SIDECAR, None)
+    if not os.path.isfile(ruta_base + EXTENSION_LEGADO):
+        return None
+
+    # LGBMRegressor serializado con joblib
+    import joblib
+
+    regresor = joblib.load(ruta_base + EXTENSION_LEGADO)
+    return ModeloCargado(regresor.booster_, list(regresor.feature_name_))
+
+
+def cargar_modelo(ruta_base: str) -> Optional[ModeloCargado]:
+    """
+    Carga la versión vigente del modelo o None si no existe. La versión queda fijada
+    en el objeto devuelto; las versiones son inmutables, así que se cachean por id.
+    """
+    for _ in range(2):
+        version = version_vigente(ruta_base)
+        if version is None:
+            return _cargar_legado(ruta_base)
+
+        with _cache_lock:
+            cacheado = _cache.get(ruta_base)
+            if cacheado and cacheado[0] == version:
+                return cacheado[1]
+
+        carpeta = ruta_version(ruta_base, version)
+        try:
+            modelo = _cargar_booster(os.path.join(carpeta, ARCHIVO_MODELO),
+                                     os.path.join(carpeta, ARCHIVO_SIDECAR), version)
+        except lgb.basic.LightGBMError:
+            # La versión se podó entre la lectura del manifest y la carga: se relee
+            continue
+        with _cache_lock:
+            _cache[ruta_base] = (version, modelo)
+        return modelo
+    return None
+
+
+def modo_entrenamiento() -> str:
+    return getattr(settings, "FORECAST_MODO_ENTRENAMIENTO", MODO_POR_TALLER)
+
+
+def ruta_metadata_global(segmento: str) -> str:
+    return os.path.join(RUTA_BASE_MODELOS, CARPETA_GLOBAL, segmento, "metadata.json")
+
+
+def leer_metadata_global(segmento: str) -> Optional[Dict]:
+    try:
+        with open(ruta_metadata_global(segmento), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def resolver_modelo(taller_id: int, segmento: str) -> Tuple[str, Dict[str, float]]:
+    """
+    Ruta del artefacto a usar en inferencia y features de taller a completar.
+    En modo global: el ajustado del taller si existe, si no el global compartido.
+    """
+    if modo_entrenamiento() != MODO_GLOBAL:
+        return ruta_modelo_taller(taller_id, segmento), {}
+
+    metadata = leer_metadata_global(segmento) or {}
+    feats = metadata.get("talleres", {}).get(str(taller_id), {})
+    ruta_ajustado = ruta_modelo_taller(taller_id, segmento, "ajustado")
+    if existe_modelo(ruta_ajustado):
+        return ruta_ajustado, feats
+    return ruta_modelo_global(segmento), feats
@@ -0,0 +1,120 @@
+"""
+Política de reentrenamiento por segmento.
+
+Cada segmento guarda junto a su modelo un ``metadata.json`` con la fecha del último
+entrenamiento completo, el MAE de referencia, la media reciente del target y las
+features usadas. Con los datos nuevos se evalúa el modelo vigente y se decide:
+
+- ``inferencia``: el modelo sigue bien; solo se actualizan los últimos registros.
+- ``warm_start``: se agregan árboles al modelo vigente con las semanas nuevas.
+- ``full``: reentrenamiento completo (sin modelo, features distintas, modelo viejo,
+  demasiados warm starts seguidos o drift/error por encima de los umbrales).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+FULL = "full"
+WARM_START = "warm_start"
+INFERENCIA = "inferencia"
+
+ARCHIVO_METADATA = "metadata.json"
+
+
+@dataclass
+class Umbrales:
+    drift_inferencia: float = 0.10
+    drift_warm_start: float = 0.30
+    mae_inferencia: float = 1.10
+    mae_warm_start: float = 1.50
+    max_dias_sin_full: int = 28
+    max_warm_starts: int = 4
+
+    @classmethod
+    def desde_settings(cls) -> "Umbrales":
+        return cls(
+            drift_inferencia=getattr(settings, "FORECAST_UMBRAL_DRIFT_INFERENCIA", cls.drift_inferencia),
+            drift_warm_start=getattr(settings, "FORECAST_UMBRAL_DRIFT_WARM_START", cls.drift_warm_start),
+            mae_inferencia=getattr(settings, "FORECAST_UMBRAL_MAE_INFERENCIA", cls.mae_inferencia),
+            mae_warm_start=getattr(settings, "FORECAST_UMBRAL_MAE_WARM_START", cls.mae_warm_start),
+            max_dias_sin_full=getattr(settings, "FORECAST_MAX_DIAS_SIN_FULL", cls.max_dias_sin_full),
+            max_warm_starts=getattr(settings, "FORECAST_MAX_WARM_STARTS", cls.max_warm_starts),
+        )
+
+
+@dataclass
+class Decision:
+    accion: str
+    motivo: str
+    metricas: Dict[str, Any] = field(default_factory=dict)
+
+
+def leer_metadata(ruta_segmento: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(ruta_segmento, ARCHIVO_METADATA), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def guardar_metadata(ruta_segmento: str, metadata: Dict[str, Any]) -> None:
+    ruta = os.path.join(ruta_segmento, ARCHIVO_METADATA)
+    tmp = f"{ruta}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, default=str)
+    os.replace(tmp, ruta)
+
+
+def calcular_drift(media_referencia: float, media_reciente: float) -> float:
+    """Cambio relativo de la media del target respecto de la del último entrenamiento completo."""
+    return abs(media_reciente - media_referencia) / max(abs(media_referencia), 1e-6)
+
+
+def calcular_ratio_mae(mae_referencia: float, mae_actual: float) -> float:
+    if mae_referencia > 0:
+        return mae_actual / mae_referencia
+    return 1.0 if mae_actual == 0 else float("inf")
+
+
+def decidir(
+        metadata: Optional[Dict[str, Any]],
+        features: List[str],
+        mae_actual: Optional[float],
+        media_reciente: float,
+        ahora: Optional[datetime] = None,
+        umbrales: Optional[Umbrales] = None,
+) -> Decision:
+    umbrales = umbrales or Umbrales.desde_settings()
+    ahora = ahora or datetime.now()
+
+    if not metadata or mae_actual is None:
+        return Decision(FULL, "sin modelo previo")
+    if metadata.get("features") != list(features):
+        return Decision(FULL, "cambiaron las features")
+
+    edad_dias = (ahora - datetime.fromisoformat(metadata["fecha_entrenamiento_full"])).days
+    ratio_mae = calcular_ratio_mae(metadata["mae_referencia"], mae_actual)
+    drift = calcular_drift(metadata["media_referencia"], media_reciente)
+    metricas = {
+        "edad_dias": edad_dias,
+        "mae_actual": mae_actual,
+        "ratio_mae": ratio_mae,
+        "drift": drift,
+    }
+
+    if edad_dias > umbrales.max_dias_sin_full:
+        return Decision(FULL, f"modelo con {edad_dias} días desde el último entrenamiento completo", metricas)
+    if ratio_mae <= umbrales.mae_inferencia and drift <= umbrales.drift_inferencia:
+        return Decision(INFERENCIA, "error y drift dentro de los umbrales", metricas)
+    if metadata.get("warm_starts", 0) >= umbrales.max_warm_starts:
+        return Decision(FULL, "límite de warm starts consecutivos", metricas)
+    if ratio_mae <= umbrales.mae_warm_start and drift <= umbrales.drift_warm_start:
+        return Decision(WARM_START, "error o drift moderados", metricas)
+    return Decision(FULL, "error o drift por encima de los umbrales", metricas)
@@ -1,39 +1,162 @@
-import json
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
 import requests
-from jose import jwt
+from jose import jwk, jwt
 from django.conf import settings
 
+logger = logging.getLogger(__name__)
+
 AUTH0_DOMAIN = settings.AUTH0_DOMAIN
 API_IDENTIFIER = settings.AUTH0_AUDIENCE
 ALGORITHMS = settings.ALGORITHMS
 
-# Descarga el JWKS (JSON Web Key Set) de Auth0
-jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-jwks = requests.get(jwks_url).json()
+JWKS_URL = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
+JWKS_TTL_SEGUNDOS = int(getattr(settings, "AUTH0_JWKS_TTL_SEGUNDOS", 3600))
+# Un kid desconocido fuerza un refresco, pero no más de uno cada N segundos
+# (evita que tokens con kids inventados martillen a Auth0).
+JWKS_REFRESCO_MINIMO_SEGUNDOS = int(getattr(settings, "AUTH0_JWKS_REFRESCO_MINIMO_SEGUNDOS", 30))
+JWKS_TIMEOUT_SEGUNDOS = 5
+PAYLOAD_CACHE_MAX = int(getattr(settings, "AUTH0_PAYLOAD_CACHE_MAX", 1024))
+
+
+class ClaveNoEncontrada(Exception):
+    ...
+
+
+class JWKSCache:
+    """
+    Claves públicas de Auth0 indexadas por kid.
+    El JWKS se descarga la primera vez que se necesita (no al importar), se
+    refresca al vencer el TTL o al aparecer un kid desconocido (rotación), y
+    las claves RSA se construyen una sola vez por descarga.
+    """
+
+    def __init__(self, url, ttl=JWKS_TTL_SEGUNDOS, refresco_minimo=JWKS_REFRESCO_MINIMO_SEGUNDOS):
+        self.url = url
+        self.ttl = ttl
+        self.refresco_minimo = refresco_minimo
+        self._claves = {}
+        self._descargado_en = None
+        self._lock = threading.Lock()
+
+    def _vigente(self, ahora):
+        return self._descargado_en is not None and ahora - self._descargado_en < self.ttl
+
+    def obtener(self, kid):
+        if not self._vigente(time.monotonic()):
+            self._refrescar()
+
+        clave = self._claves.get(kid)
+        if clave is None:
+            self._refrescar(kid=kid)
+            clave = self._claves.get(kid)
+        if clave is None:
+            raise ClaveNoEncontrada("No se encontró la clave adecuada en JWKS")
+        return clave
+
+    def _refrescar(self, kid=None):
+        # Single-flight: el resto de los hilos espera el lock y, al entrar,
+        # ve que otro ya descargó y no repite la request.
+        with self._lock:
+            ahora = time.monotonic()
+            if kid is None:
+                if self._vigente(ahora):
+                    return
+            else:
+                if kid in self._claves:
+                    return
+                if self._descargado_en is not None and ahora - self._descargado_en < self.refresco_minimo:
+                    return
+
+            try:
+                resp = requests.get(self.url, timeout=JWKS_TIMEOUT_SEGUNDOS)
+                resp.raise_for_status()
+                claves = {}
+                for key in resp.json().get("keys", []):
+                    if "kid" not in key:
+                        continue
+                    claves[key["kid"]] = jwk.construct(key, algorithm=key.get("alg") or ALGORITHMS[0])
+            except Exception:
+                if not self._claves:
+                    raise
+                # Si Auth0 no responde seguimos con las claves que ya teníamos
+                logger.warning("No se pudo refrescar el JWKS; se usan las claves en cache", exc_info=True)
+                self._descargado_en = ahora
+                return
+
+            self._claves = claves
+            self._descargado_en = ahora
+
+    def limpiar(self):
+        with self._lock:
+            self._claves = {}
+            self._descargado_en = None
+
+
+class PayloadCache:
+    """
+    LRU acotado de payloads ya verificados, cada uno válido hasta su `exp`.
+    Guarda y devuelve copias: quien recibe el payload puede modificarlo sin
+    afectar a los demás requests con el mismo token.
+    """
+
+    def __init__(self, max_items=PAYLOAD_CACHE_MAX):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, token):
+        with self._lock:
+            item = self._items.get(token)
+            if item is None:
+                return None
+            expira, payload = item
+            if expira <= time.time():
+                del self._items[token]
+                return None
+            self._items.move_to_end(token)
+        return copy.deepcopy(payload)
+
+    def guardar(self, token, payload):
+        expira = payload.get("exp")
+        if not isinstance(expira, (int, float)) or self.max_items <= 0:
+            return
+        payload = copy.deepcopy(payload)
+        with self._lock:
+            self._items[token] = (expira, payload)
+            self._items.move_to_end(token)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._items.clear()
+
+
+jwks_cache = JWKSCache(JWKS_URL)
+payload_cache = PayloadCache()
+
 
 def decode_jwt(token):
+    payload = payload_cache.obtener(token)
+    if payload is not None:
+        return payload
+
     # Extrae el header del token
     header = jwt.get_unverified_header(token)
-
-    rsa_key = {}
-    for key in jwks["keys"]:
-        if key["kid"] == header["kid"]:
-            rsa_key = {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key["use"],
-                "n": key["n"],
-                "e": key["e"]
-            }
-    if not rsa_key:
-        raise Exception("No se encontró la clave adecuada en JWKS")
+    clave = jwks_cache.obtener(header.get("kid"))
 
     # Decodifica el token usando la clave pública
     payload = jwt.decode(
         token,
-        rsa_key,
+        clave,
         algorithms=ALGORITHMS,
         audience=API_IDENTIFIER,
         issuer=f"https://{AUTH0_DOMAIN}/"
     )
+    payload_cache.guardar(token, payload)
     return payload
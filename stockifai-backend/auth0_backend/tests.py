@@ -0,0 +1,92 @@
+import base64
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from auth0_backend.jwt_utils import ClaveNoEncontrada, JWKSCache, PayloadCache
+
+
+def jwks(*kids):
+    secreto = base64.urlsafe_b64encode(b"secreto-de-prueba-de-32-bytes!!!").decode().rstrip("=")
+    return {"keys": [{"kty": "oct", "kid": kid, "alg": "HS256", "k": secreto} for kid in kids]}
+
+
+def respuesta(data):
+    resp = mock.Mock()
+    resp.json.return_value = data
+    return resp
+
+
+class JWKSCacheTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch("auth0_backend.jwt_utils.requests.get")
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reloj = 1000.0
+        patcher = mock.patch("auth0_backend.jwt_utils.time.monotonic", side_effect=lambda: self.reloj)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_descarga_una_vez_mientras_esta_vigente(self):
+        self.get.return_value = respuesta(jwks("k1"))
+        cache = JWKSCache("https://auth/jwks", ttl=60)
+        clave = cache.obtener("k1")
+        self.reloj += 30
+        self.assertIs(cache.obtener("k1"), clave)
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_vence_el_ttl(self):
+        self.get.return_value = respuesta(jwks("k1"))
+        cache = JWKSCache("https://auth/jwks", ttl=60)
+        cache.obtener("k1")
+        self.reloj += 61
+        cache.obtener("k1")
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_kid_nuevo_refresca_por_rotacion(self):
+        self.get.side_effect = [respuesta(jwks("k1")), respuesta(jwks("k1", "k2"))]
+        cache = JWKSCache("https://auth/jwks", ttl=3600, refresco_minimo=30)
+        cache.obtener("k1")
+        self.reloj += 31
+        self.assertIsNotNone(cache.obtener("k2"))
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_kid_desconocido_no_refresca_antes_del_minimo(self):
+        self.get.return_value = respuesta(jwks("k1"))
+        cache = JWKSCache("https://auth/jwks", ttl=3600, refresco_minimo=30)
+        cache.obtener("k1")
+        self.reloj += 5
+        with self.assertRaises(ClaveNoEncontrada):
+            cache.obtener("inventado")
+        self.assertEqual(self.get.call_count, 1)
+
+
+class PayloadCacheTest(SimpleTestCase):
+    def test_devuelve_copias(self):
+        cache = PayloadCache()
+        payload = {"sub": "u1", "exp": time.time() + 60, "permissions": ["leer"]}
+        cache.guardar("t", payload)
+        payload["permissions"].append("escribir")
+
+        primera = cache.obtener("t")
+        self.assertEqual(primera["permissions"], ["leer"])
+        primera["permissions"].append("borrar")
+        self.assertEqual(cache.obtener("t")["permissions"], ["leer"])
+
+    def test_vencido_o_sin_exp_no_se_devuelve(self):
+        cache = PayloadCache()
+        cache.guardar("vencido", {"sub": "u1", "exp": time.time() - 1})
+        cache.guardar("sin_exp", {"sub": "u2"})
+        self.assertIsNone(cache.obtener("vencido"))
+        self.assertIsNone(cache.obtener("sin_exp"))
+
+    def test_descarta_el_menos_usado(self):
+        cache = PayloadCache(max_items=2)
+        exp = time.time() + 60
+        cache.guardar("a", {"exp": exp})
+        cache.guardar("b", {"exp": exp})
+        cache.obtener("a")
+        cache.guardar("c", {"exp": exp})
+        self.assertIsNone(cache.obtener("b"))
+        self.assertIsNotNone(cache.obtener("a"))
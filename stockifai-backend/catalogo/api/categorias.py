@@ -4,6 +4,7 @@ from rest_framework import status
 
 from catalogo.models import Categoria
 from inventario.api.serializers import CategoriaSerializer
+from inventario.services.cache_consultas import ESPACIO_CATALOGO, obtener
 
 
 class CategoriasListView(APIView):
@@ -12,6 +13,8 @@ class CategoriasListView(APIView):
     Devuelve todas las categorías.
     """
     def get(self, request):
-        queryset = Categoria.objects.all().order_by("nombre")
-        serializer = CategoriaSerializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        data = obtener(
+            ESPACIO_CATALOGO, ("categorias",),
+            lambda: CategoriaSerializer(Categoria.objects.all().order_by("nombre"), many=True).data,
+        )
+        return Response(data, status=status.HTTP_200_OK)
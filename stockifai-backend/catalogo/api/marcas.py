@@ -4,6 +4,7 @@ from rest_framework import status
 
 from catalogo.models import Marca
 from inventario.api.serializers import MarcaSerializer
+from inventario.services.cache_consultas import ESPACIO_CATALOGO, obtener
 
 class MarcasListView(APIView):
     """
@@ -11,6 +12,8 @@ class MarcasListView(APIView):
     Devuelve todas las marcas.
     """
     def get(self, request):
-        queryset = Marca.objects.all().order_by("nombre")
-        serializer = MarcaSerializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        data = obtener(
+            ESPACIO_CATALOGO, ("marcas",),
+            lambda: MarcaSerializer(Marca.objects.all().order_by("nombre"), many=True).data,
+        )
+        return Response(data, status=status.HTTP_200_OK)
\ No newline at end of file
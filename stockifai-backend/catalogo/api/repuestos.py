@@ -1,11 +1,12 @@
 from django.core.paginator import PageNotAnInteger, EmptyPage, Paginator
-from django.db.models import Q
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from catalogo.models import Repuesto
 from inventario.api.serializers import RepuestoSerializer
+from inventario.services.busqueda import filtro_busqueda
+from inventario.services.cache_consultas import ESPACIO_CATALOGO, obtener
 
 
 class RepuestosListView(APIView):
@@ -15,9 +16,11 @@ class RepuestosListView(APIView):
     Query params:
      - page: int (default 1)
      - page_size: int (default 10, máx 200)
-     - search_text: str  (numero_pieza | descripcion)
+     - search_text: str  (prefijos de palabra de numero_pieza | descripcion, todos deben
+       matchear; no busca en medio de una palabra, ver inventario/services/busqueda.py)
      - marca_id: int
      - categoria_id: int
+    Páginas y totales se cachean por filtros (ver inventario/services/cache_consultas.py).
     """
     def get(self, request):
         page = int(request.query_params.get("page", 1))
@@ -36,27 +39,31 @@ class RepuestosListView(APIView):
             queryset = queryset.filter(categoria__id=categoria_id)
 
         if search_query:
-            queryset = queryset.filter(
-                Q(numero_pieza__icontains=search_query)
-                | Q(descripcion__icontains=search_query)
-            )
+            queryset = queryset.filter(filtro_busqueda(search_query))
 
         queryset = queryset.order_by("descripcion")
+        filtros = (search_query or "", marca_id or "", categoria_id or "")
 
         paginator = Paginator(queryset, page_size)
-        try:
-            page_obj = paginator.page(page)
-        except EmptyPage:
-            page_obj = paginator.page(paginator.num_pages)
-
-        serializer = RepuestoSerializer(page_obj.object_list, many=True)
-
-        repuestos = {
-            "count": paginator.count,
-            "page": page_obj.number,
-            "page_size": page_size,
-            "total_pages": paginator.num_pages,
-            "results": serializer.data,
-        }
+        # El COUNT sobre el catálogo depende solo de los filtros: se comparte entre páginas
+        paginator.count = obtener(ESPACIO_CATALOGO, ("repuestos_count", *filtros), queryset.count)
+
+        def pagina():
+            try:
+                page_obj = paginator.page(page)
+            except EmptyPage:
+                page_obj = paginator.page(paginator.num_pages)
+
+            serializer = RepuestoSerializer(page_obj.object_list, many=True)
+
+            return {
+                "count": paginator.count,
+                "page": page_obj.number,
+                "page_size": page_size,
+                "total_pages": paginator.num_pages,
+                "results": serializer.data,
+            }
+
+        repuestos = obtener(ESPACIO_CATALOGO, ("repuestos", page, page_size, *filtros), pagina)
 
         return Response(repuestos, status=status.HTTP_200_OK)
@@ -2,3 +2,5 @@ from django.apps import AppConfig
 class CatalogoConfig(AppConfig):
     default_auto_field='django.db.models.BigAutoField'
     name='catalogo'
+    def ready(self):
+        from . import signals  # noqa: F401
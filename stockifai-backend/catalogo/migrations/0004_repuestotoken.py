@@ -0,0 +1,79 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:36
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copia congelada del tokenizador de inventario/services/busqueda.py al crear esta
+# migración: cambios posteriores al servicio no deben alterar lo que hace.
+TOKEN_MAX_LEN = 64
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenizar(texto):
+    s = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode("ascii").lower()
+    tokens = []
+    for tok in _TOKEN_RE.findall(s):
+        tok = tok[:TOKEN_MAX_LEN]
+        if tok not in tokens:
+            tokens.append(tok)
+    return tokens
+
+
+def tokens_repuesto(numero_pieza, descripcion):
+    tokens_pn = tokenizar(numero_pieza)
+    tokens = set(tokens_pn) | set(tokenizar(descripcion))
+    compacto = "".join(tokens_pn)[:TOKEN_MAX_LEN]
+    if compacto:
+        tokens.add(compacto)
+    return tokens
+
+
+def indexar_catalogo_existente(apps, schema_editor):
+    Repuesto = apps.get_model('catalogo', 'Repuesto')
+    RepuestoToken = apps.get_model('catalogo', 'RepuestoToken')
+
+    chunk = 2000
+    ultimo_id = 0
+    while True:
+        filas = list(
+            Repuesto.objects.filter(id__gt=ultimo_id)
+            .order_by('id')
+            .values_list('id', 'numero_pieza', 'descripcion')[:chunk]
+        )
+        if not filas:
+            break
+        RepuestoToken.objects.bulk_create(
+            [
+                RepuestoToken(repuesto_id=rid, token=tok)
+                for rid, numero, descripcion in filas
+                for tok in tokens_repuesto(numero, descripcion)
+            ],
+            batch_size=chunk,
+            ignore_conflicts=True,
+        )
+        ultimo_id = filas[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0003_repuestotaller_pred_1_repuestotaller_pred_2_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepuestoToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('repuesto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='catalogo.repuesto')),
+            ],
+            options={
+                'unique_together': {('token', 'repuesto')},
+            },
+        ),
+        migrations.RunPython(indexar_catalogo_existente, migrations.RunPython.noop),
+    ]
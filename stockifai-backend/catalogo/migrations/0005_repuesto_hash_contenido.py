@@ -0,0 +1,58 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:00
+
+import hashlib
+
+from django.db import migrations, models
+
+# Copia congelada de clave_contenido_repuesto/hash_clave (catalogo/models.py) al crear
+# esta migración: cambios posteriores al modelo no deben alterar lo que hace.
+SEPARADOR_HASH = "\x1f"
+
+
+def clave_contenido_repuesto(descripcion, estado, categoria_id, marca_id):
+    return SEPARADOR_HASH.join((
+        descripcion or "", estado or "",
+        "" if categoria_id is None else str(categoria_id),
+        "" if marca_id is None else str(marca_id),
+    ))
+
+
+def hash_clave(clave):
+    return hashlib.blake2b(clave.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def calcular_hashes(apps, schema_editor):
+    Repuesto = apps.get_model('catalogo', 'Repuesto')
+
+    chunk = 2000
+    ultimo_id = 0
+    while True:
+        filas = list(
+            Repuesto.objects.filter(id__gt=ultimo_id)
+            .order_by('id')
+            .only('id', 'descripcion', 'estado', 'categoria_id', 'marca_id')[:chunk]
+        )
+        if not filas:
+            break
+        for r in filas:
+            r.hash_contenido = hash_clave(
+                clave_contenido_repuesto(r.descripcion, r.estado, r.categoria_id, r.marca_id)
+            )
+        Repuesto.objects.bulk_update(filas, ['hash_contenido'], batch_size=chunk)
+        ultimo_id = filas[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0004_repuestotoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repuesto',
+            name='hash_contenido',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(calcular_hashes, migrations.RunPython.noop),
+    ]
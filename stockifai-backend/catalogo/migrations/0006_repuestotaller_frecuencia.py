@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+# Hay bases desplegadas donde la columna ya existe: la agregó una migración
+# 0004_repuestotaller_frecuencia que nunca llegó al repositorio. Ahí solo se actualiza
+# el estado; en el resto se crea la columna.
+def _columnas(schema_editor, tabla):
+    with schema_editor.connection.cursor() as cursor:
+        descripcion = schema_editor.connection.introspection.get_table_description(cursor, tabla)
+    return {columna.name for columna in descripcion}
+
+
+def agregar_frecuencia(apps, schema_editor):
+    RepuestoTaller = apps.get_model('catalogo', 'RepuestoTaller')
+    if 'frecuencia' not in _columnas(schema_editor, RepuestoTaller._meta.db_table):
+        schema_editor.add_field(RepuestoTaller, RepuestoTaller._meta.get_field('frecuencia'))
+
+
+def quitar_frecuencia(apps, schema_editor):
+    RepuestoTaller = apps.get_model('catalogo', 'RepuestoTaller')
+    if 'frecuencia' in _columnas(schema_editor, RepuestoTaller._meta.db_table):
+        schema_editor.remove_field(RepuestoTaller, RepuestoTaller._meta.get_field('frecuencia'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogo', '0005_repuesto_hash_contenido'),
+    ]
+
+    operations = [
+        # Primero el estado, así el RunPython ya ve el campo en el modelo histórico
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='repuestotaller',
+                    name='frecuencia',
+                    field=models.CharField(blank=True, max_length=100, null=True),
+                ),
+            ],
+        ),
+        migrations.RunPython(agregar_frecuencia, quitar_frecuencia),
+    ]
@@ -1,4 +1,6 @@
 
+import hashlib
+
 from django.db import models
 
 class Marca(models.Model): ####
@@ -20,14 +22,54 @@ class Modelo(models.Model):
     def __str__(self):
         return f"{self.nombre} ({self.id_marca.nombre})"
 
+SEPARADOR_HASH = "\x1f"
+
+
+def clave_contenido_repuesto(descripcion, estado, categoria_id, marca_id) -> str:
+    return SEPARADOR_HASH.join((
+        descripcion or "", estado or "",
+        "" if categoria_id is None else str(categoria_id),
+        "" if marca_id is None else str(marca_id),
+    ))
+
+
+def hash_clave(clave: str) -> str:
+    return hashlib.blake2b(clave.encode("utf-8"), digest_size=16).hexdigest()
+
+
 class Repuesto(models.Model): ####
     numero_pieza=models.CharField(max_length=120, unique=True, db_index=True)
     descripcion=models.CharField(max_length=255, blank=True)
     marca=models.ForeignKey(Marca, on_delete=models.PROTECT, null=True, blank=True)
     categoria=models.ForeignKey(Categoria, on_delete=models.PROTECT, null=True, blank=True)
     estado=models.CharField(max_length=50, default='activo')
+    # Hash de los campos que trae la importación de catálogo: permite importar solo lo que cambió
+    hash_contenido=models.CharField(max_length=32, null=True, blank=True, editable=False)
     def __str__(self): return f"{self.numero_pieza} - {self.descripcion or ''}"
 
+    def calcular_hash(self) -> str:
+        return hash_clave(clave_contenido_repuesto(self.descripcion, self.estado, self.categoria_id, self.marca_id))
+
+    def save(self, *args, **kwargs):
+        self.hash_contenido = self.calcular_hash()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "hash_contenido"}
+        super().save(*args, **kwargs)
+
+
+
+class RepuestoToken(models.Model):
+    """
+    Índice invertido de búsqueda: tokens normalizados de numero_pieza y descripcion.
+    Se mantiene desde inventario.services.busqueda (importaciones y post_save).
+    """
+    repuesto=models.ForeignKey(Repuesto, on_delete=models.CASCADE, related_name='tokens')
+    token=models.CharField(max_length=64)
+    class Meta:
+        # (token, repuesto) sirve para el prefix scan token LIKE 'q%'
+        unique_together=[('token','repuesto')]
+    def __str__(self): return f"{self.token} -> {self.repuesto_id}"
+
 
 
 class ModeloRepuesto(models.Model): #####
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from catalogo.models import Categoria, Marca, Repuesto
+
+
+@receiver(post_save, sender=Repuesto)
+def reindexar_repuesto(sender, instance: Repuesto, raw=False, **kwargs):
+    # Los bulk_create/bulk_update no disparan señales: las importaciones indexan explícitamente
+    if raw:
+        return
+    from inventario.services.busqueda import indexar_objetos
+    indexar_objetos([instance])
+
+
+@receiver([post_save, post_delete], sender=Repuesto)
+@receiver([post_save, post_delete], sender=Marca)
+@receiver([post_save, post_delete], sender=Categoria)
+def invalidar_cache_catalogo(sender, **kwargs):
+    # Mismo caso: las importaciones invalidan el cache de consultas y la versión por su cuenta
+    from inventario.services.cache_consultas import ESPACIO_CATALOGO, invalidar_al_confirmar
+    from inventario.services.version_datos import incrementar_version_catalogo
+    invalidar_al_confirmar(ESPACIO_CATALOGO)
+    # Los listados muestran descripción, marca y categoría: cambia el ETag de todos los talleres
+    incrementar_version_catalogo()
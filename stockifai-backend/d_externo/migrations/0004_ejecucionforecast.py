@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('d_externo', '0003_rename_numero_parte_registroentrenamiento_frecuencia_alta_numero_pieza_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corrida_id', models.CharField(max_length=32, unique=True)),
+                ('tipo', models.CharField(max_length=30)),
+                ('estado', models.CharField(max_length=10)),
+                ('inicio', models.DateTimeField()),
+                ('duracion_s', models.FloatField()),
+                ('talleres_ok', models.IntegerField(default=0)),
+                ('talleres_error', models.IntegerField(default=0)),
+                ('queries', models.IntegerField(default=0)),
+                ('rss_max_mb', models.FloatField(blank=True, null=True)),
+                ('resumen', models.JSONField(default=list)),
+            ],
+            options={
+                'ordering': ['-inicio'],
+            },
+        ),
+    ]
@@ -483,4 +483,24 @@ class RegistroEntrenamiento_Frecuencia_Alta(models.Model):
     coef_var_52 = models.FloatField(verbose_name="Coeficiente de Variación 52 Semanas", null=True, blank=True)
 
     def __str__(self):
-        return f"{self.numero_pieza} - {self.fecha}"
\ No newline at end of file
+        return f"{self.numero_pieza} - {self.fecha}"
+
+class EjecucionForecast(models.Model):
+    """Métricas de una corrida del pipeline de forecast (ver AI/services/instrumentacion.py)."""
+    corrida_id = models.CharField(max_length=32, unique=True)
+    tipo = models.CharField(max_length=30)
+    estado = models.CharField(max_length=10)
+    inicio = models.DateTimeField()
+    duracion_s = models.FloatField()
+    talleres_ok = models.IntegerField(default=0)
+    talleres_error = models.IntegerField(default=0)
+    queries = models.IntegerField(default=0)
+    rss_max_mb = models.FloatField(null=True, blank=True)
+    # [{"etapa", "veces", "duracion_s", "queries", "tiempo_sql_s", "filas", "errores"}, ...]
+    resumen = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ["-inicio"]
+
+    def __str__(self):
+        return f"{self.tipo} {self.inicio:%Y-%m-%d %H:%M} ({self.estado}, {self.duracion_s:.0f}s)"
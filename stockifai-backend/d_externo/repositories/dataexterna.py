@@ -1,6 +1,21 @@
 from d_externo.models import Inflacion, Patentamiento, IPSA, Prenda, TasaInteresPrestamo, TipoCambio,  RegistroEntrenamiento_intermitente, RegistroEntrenamiento_Frecuencia_Alta
 from user.models import Taller
 
+import hashlib
+
+import numpy as np
+from django.db.models import Count, Max, Sum
+
+# (nombre de la feature, modelo, columna de valor, tipo de serie)
+SERIES_EXTERNAS = (
+    ("inflacion", Inflacion, "ipc", "mensual"),
+    ("patentamientos", Patentamiento, "cantidad", "anual"),
+    ("ipsa", IPSA, "ipsa", "mensual"),
+    ("prenda", Prenda, "prenda", "mensual"),
+    ("tasa_de_interes", TasaInteresPrestamo, "tasa_interes", "mensual"),
+    ("tipo_de_cambio", TipoCambio, "tipo_cambio", "mensual"),
+)
+
 def obtener_todas_las_inflaciones():
     """
     Retorna una lista de diccionarios con todos los registros de Inflacion.
@@ -31,6 +46,30 @@ def obtener_todos_los_tipos_cambio():
     return list(TipoCambio.objects.all().values('fecha', 'tipo_cambio'))
 
 
+def obtener_serie_externa(modelo, campo: str):
+    """
+    Devuelve (fechas, valores) como arrays de NumPy (datetime64[ns], float64),
+    ordenados por fecha y sin nulos. Evita materializar un dict por fila.
+    """
+    filas = list(modelo.objects.exclude(**{f"{campo}__isnull": True}).order_by("fecha", "id").values_list("fecha", campo))
+    if not filas:
+        return np.array([], dtype="datetime64[ns]"), np.array([], dtype=np.float64)
+    fechas, valores = zip(*filas)
+    return np.array(fechas, dtype="datetime64[ns]"), np.array(valores, dtype=np.float64)
+
+
+def huella_datos_externos() -> str:
+    """
+    Huella barata de las tablas de indicadores (cantidad, último id, última fecha y suma
+    por tabla). Cambia si se agregan, borran o corrigen registros.
+    """
+    partes = []
+    for nombre, modelo, campo, _tipo in SERIES_EXTERNAS:
+        agg = modelo.objects.aggregate(n=Count("id"), max_id=Max("id"), max_fecha=Max("fecha"), total=Sum(campo))
+        partes.append(f"{nombre}:{agg['n']}:{agg['max_id']}:{agg['max_fecha']}:{agg['total']}")
+    return hashlib.sha1("|".join(partes).encode("utf-8")).hexdigest()
+
+
 def obtener_registroentrenamiento_intermitente(taller_id: int):
     """
     Devuelve todos los registros de RegistroEntrenamiento_intermitente
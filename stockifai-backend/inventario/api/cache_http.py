@@ -0,0 +1,95 @@
+"""
+Cache HTTP de los GET por taller, atado a la versión de datos (ver
+``inventario/services/version_datos.py``).
+
+``@respuesta_versionada`` sobre el ``get`` de una vista:
+  - ETag = versión del taller + versión del catálogo; Last-Modified = último incremento.
+  - If-None-Match / If-Modified-Since vigentes -> 304 sin ejecutar la vista (y sin
+    queries si la versión está en cache).
+  - Si no, busca la respuesta en el cache de Django por (taller, versión, ruta,
+    query params) y solo ejecuta la vista si no está. Al cambiar la versión la clave
+    cambia: no hace falta borrar respuestas viejas, expiran por RESPUESTAS_CACHE_TTL.
+
+``@respuesta_versionada(por_semana=True)`` es para vistas que además dependen de la
+fecha (ventanas de semanas que terminan en el lunes actual): el inicio de la semana
+entra en el ETag y en la clave, y Last-Modified no es anterior a ese lunes, así al
+cambiar la semana el cliente recibe la respuesta nueva aunque no haya cambiado nada.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import date, datetime, time, timedelta
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from inventario.services.version_datos import leer_versiones
+
+
+def inicio_semana_actual() -> date:
+    """Lunes de la semana en curso."""
+    hoy = date.today()
+    return hoy - timedelta(days=hoy.weekday())
+
+
+def _clave_respuesta(request, taller_id: int, etag: str) -> str:
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    firma = hashlib.blake2b(f"{request.path}?{params}".encode("utf-8"), digest_size=16).hexdigest()
+    return f"respuesta:{taller_id}:{etag}:{firma}"
+
+
+def _encabezados(response, etag: str, ultima_modificacion) -> None:
+    response["ETag"] = etag
+    if ultima_modificacion is not None:
+        response["Last-Modified"] = http_date(ultima_modificacion.timestamp())
+    # El cliente puede guardar la respuesta pero debe revalidarla en cada uso
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+def respuesta_versionada(get=None, *, por_semana: bool = False):
+    if get is None:
+        return lambda funcion: respuesta_versionada(funcion, por_semana=por_semana)
+
+    @wraps(get)
+    def wrapper(self, request, taller_id: int, *args, **kwargs):
+        versiones = leer_versiones(taller_id)
+        etag = f"{taller_id}.{versiones.etag}"
+        ultima_modificacion = versiones.actualizado
+        if por_semana:
+            semana = inicio_semana_actual()
+            etag = f"{etag}.{semana.isoformat()}"
+            lunes = timezone.make_aware(datetime.combine(semana, time.min))
+            if ultima_modificacion is None or ultima_modificacion < lunes:
+                ultima_modificacion = lunes
+        etag = quote_etag(etag)
+
+        no_modificado = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=ultima_modificacion.timestamp() if ultima_modificacion else None,
+        )
+        if no_modificado is not None:
+            _encabezados(no_modificado, etag, ultima_modificacion)
+            return no_modificado
+
+        clave = _clave_respuesta(request, taller_id, etag)
+        guardada = cache.get(clave)
+        if guardada is not None:
+            response = Response(guardada)
+        else:
+            response = get(self, request, taller_id, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(clave, response.data, getattr(settings, "RESPUESTAS_CACHE_TTL", 300))
+
+        if response.status_code == 200:
+            _encabezados(response, etag, ultima_modificacion)
+        return response
+
+    return wrapper
@@ -0,0 +1,253 @@
+"""
+Exportaciones en streaming (CSV o XLSX) de stock, forecasting y movimientos.
+
+Las filas se leen con ``values_list`` en lotes keyset (``pk > último``, o
+``(fecha, id) > último`` en movimientos): cada lote es una query acotada, así la
+memoria no depende del tamaño del export en ningún motor. (Con MySQL,
+``QuerySet.iterator()`` igual trae todo el resultado al cliente.)
+
+CSV se emite fila a fila con ``StreamingHttpResponse``: los primeros bytes salen
+con el primer lote. XLSX usa un workbook write-only de openpyxl que baja las filas a
+un archivo temporal; el zip recién se puede armar al final, así que se envía en
+chunks una vez escrito.
+"""
+
+from __future__ import annotations
+
+import csv
+import tempfile
+from decimal import Decimal
+from typing import Iterable, Iterator, Sequence
+
+from django.db.models import Q, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from catalogo.models import RepuestoTaller
+from inventario.api.movimientos import filtrar_movimientos
+from inventario.api.views import calcular_mos
+from inventario.models import Deposito, Movimiento, StockPorDeposito
+from inventario.services.busqueda import filtro_busqueda
+
+EXPORT_CHUNK_SIZE = 2000
+FILAS_POR_CHUNK_CSV = 500
+BYTES_POR_CHUNK_XLSX = 64 * 1024
+FORMATOS = ("csv", "xlsx")
+
+
+def lotes_keyset(queryset, campos: Sequence[str], claves: Sequence[str] = ("pk",),
+                 chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[tuple]:
+    """
+    Recorre ``queryset`` en orden ascendente por ``claves`` de a ``chunk_size`` filas
+    y devuelve tuplas con ``campos``. Cada lote arranca después de la última clave leída.
+    """
+    queryset = queryset.order_by(*claves)
+    n = len(campos)
+    ultimo = None
+    while True:
+        qs = queryset
+        if ultimo is not None:
+            # (c1, c2, ...) > (u1, u2, ...) expandido en OR de prefijos; c1 >= u1
+            # permite el range scan sobre el índice
+            filtro = Q()
+            for i, clave in enumerate(claves):
+                filtro |= Q(**{c: v for c, v in zip(claves[:i], ultimo)}, **{f"{clave}__gt": ultimo[i]})
+            qs = qs.filter(Q(**{f"{claves[0]}__gte": ultimo[0]}), filtro)
+        filas = list(qs.values_list(*campos, *claves)[:chunk_size])
+        for fila in filas:
+            yield fila[:n]
+        if len(filas) < chunk_size:
+            return
+        ultimo = filas[-1][n:]
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: devuelve la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _csv(encabezados: Sequence[str], filas: Iterable[Sequence]) -> Iterator[str]:
+    writer = csv.writer(_Eco())
+    # BOM para que Excel abra el CSV como UTF-8
+    yield "\ufeff" + writer.writerow(encabezados)
+    # Se agrupan las líneas: un chunk por fila multiplica el overhead de la respuesta
+    bloque = []
+    for fila in filas:
+        bloque.append(writer.writerow(fila))
+        if len(bloque) >= FILAS_POR_CHUNK_CSV:
+            yield "".join(bloque)
+            bloque = []
+    if bloque:
+        yield "".join(bloque)
+
+
+def _xlsx(titulo: str, encabezados: Sequence[str], filas: Iterable[Sequence]) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(titulo)
+    ws.append(list(encabezados))
+    for fila in filas:
+        ws.append(list(fila))
+
+    with tempfile.TemporaryFile() as archivo:
+        wb.save(archivo)
+        archivo.seek(0)
+        while True:
+            chunk = archivo.read(BYTES_POR_CHUNK_XLSX)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _respuesta(formato: str, nombre: str, encabezados: Sequence[str], filas: Iterable[Sequence]):
+    if formato == "xlsx":
+        response = StreamingHttpResponse(
+            _xlsx(nombre[:31], encabezados, filas),
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    else:
+        response = StreamingHttpResponse(_csv(encabezados, filas), content_type="text/csv; charset=utf-8")
+    fecha = timezone.localdate().strftime("%Y%m%d")
+    response["Content-Disposition"] = f'attachment; filename="{nombre}_{fecha}.{formato}"'
+    return response
+
+
+def _formato(request):
+    formato = (request.query_params.get("formato") or "csv").lower()
+    return formato if formato in FORMATOS else None
+
+
+def _formato_invalido():
+    return Response({"detail": f"Formato inválido. Opciones: {', '.join(FORMATOS)}"},
+                    status=status.HTTP_400_BAD_REQUEST)
+
+
+def _deposito_invalido(deposito_id, taller_id: int) -> bool:
+    return bool(deposito_id) and not Deposito.objects.filter(pk=deposito_id, taller_id=taller_id).exists()
+
+
+class ExportarStockView(APIView):
+    """
+    GET /talleres/<taller_id>/stock/exportar
+
+    Una fila por repuesto y depósito.
+    Query params: formato (csv|xlsx), q, deposito_id, categoria_id, con_stock (1|true)
+    q busca por prefijo de palabra como el listado de /stock (no en medio de una palabra).
+    """
+
+    def get(self, request, taller_id: int):
+        formato = _formato(request)
+        if formato is None:
+            return _formato_invalido()
+
+        deposito_id = request.query_params.get("deposito_id")
+        if _deposito_invalido(deposito_id, taller_id):
+            return Response({"detail": "Depósito inválido para el taller"}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = StockPorDeposito.objects.filter(repuesto_taller__taller_id=taller_id, deposito__taller_id=taller_id)
+        q = request.query_params.get("q")
+        if q:
+            qs = qs.filter(filtro_busqueda(q, prefijo="repuesto_taller__repuesto__"))
+        if deposito_id:
+            qs = qs.filter(deposito_id=deposito_id)
+        categoria_id = request.query_params.get("categoria_id")
+        if categoria_id:
+            qs = qs.filter(repuesto_taller__repuesto__categoria_id=categoria_id)
+        if request.query_params.get("con_stock") in ("1", "true"):
+            qs = qs.filter(cantidad__gt=0)
+
+        filas = lotes_keyset(qs, (
+            "repuesto_taller__repuesto__numero_pieza",
+            "repuesto_taller__repuesto__descripcion",
+            "repuesto_taller__repuesto__marca__nombre",
+            "repuesto_taller__repuesto__categoria__nombre",
+            "repuesto_taller__original",
+            "repuesto_taller__precio",
+            "repuesto_taller__costo",
+            "deposito__nombre",
+            "cantidad",
+        ))
+        encabezados = ("numero_pieza", "descripcion", "marca", "categoria", "original",
+                       "precio", "costo", "deposito", "cantidad")
+        return _respuesta(formato, f"stock_taller_{taller_id}", encabezados, filas)
+
+
+class ExportarForecastingView(APIView):
+    """
+    GET /talleres/<taller_id>/forecasting/exportar
+
+    Stock total, las 4 predicciones semanales y el MOS de cada repuesto del taller.
+    Query params: formato (csv|xlsx), q
+    """
+
+    def get(self, request, taller_id: int):
+        formato = _formato(request)
+        if formato is None:
+            return _formato_invalido()
+
+        qs = RepuestoTaller.objects.filter(taller_id=taller_id)
+        q = request.query_params.get("q")
+        if q:
+            qs = qs.filter(filtro_busqueda(q, prefijo="repuesto__"))
+        qs = qs.annotate(stock_total=Sum("stocks__cantidad", filter=Q(stocks__deposito__taller_id=taller_id)))
+
+        filas = lotes_keyset(qs, (
+            "repuesto__numero_pieza", "repuesto__descripcion", "stock_total",
+            "pred_1", "pred_2", "pred_3", "pred_4",
+        ))
+        encabezados = ("numero_pieza", "descripcion", "stock_total",
+                       "pred_1", "pred_2", "pred_3", "pred_4", "mos_en_semanas")
+        return _respuesta(formato, f"forecasting_taller_{taller_id}", encabezados, self._con_mos(filas))
+
+    @staticmethod
+    def _con_mos(filas):
+        for numero, descripcion, stock_total, *preds in filas:
+            mos = calcular_mos(Decimal(stock_total or 0), [Decimal(p or 0) for p in preds])
+            yield (numero, descripcion, stock_total or 0, *preds, float(mos) if mos else None)
+
+
+class ExportarMovimientosView(APIView):
+    """
+    GET /talleres/<taller_id>/movimientos/exportar
+
+    Kardex completo en orden cronológico (fecha, id).
+    Query params: formato (csv|xlsx), deposito_id, search_text, date_from, date_to
+    """
+
+    def get(self, request, taller_id: int):
+        formato = _formato(request)
+        if formato is None:
+            return _formato_invalido()
+
+        if _deposito_invalido(request.query_params.get("deposito_id"), taller_id):
+            return Response({"detail": "Depósito inválido para el taller"}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = filtrar_movimientos(
+            Movimiento.objects.filter(stock_por_deposito__repuesto_taller__taller_id=taller_id),
+            request.query_params,
+        )
+        filas = lotes_keyset(qs, (
+            "fecha", "tipo", "cantidad",
+            "stock_por_deposito__deposito__nombre",
+            "stock_por_deposito__repuesto_taller__repuesto__numero_pieza",
+            "stock_por_deposito__repuesto_taller__repuesto__descripcion",
+            "documento", "externo_id",
+        ), claves=("fecha", "id"))
+        encabezados = ("fecha", "tipo", "cantidad", "deposito", "numero_pieza", "descripcion",
+                       "documento", "externo_id")
+        return _respuesta(formato, f"movimientos_taller_{taller_id}", encabezados, self._fechas_locales(filas))
+
+    @staticmethod
+    def _fechas_locales(filas):
+        # Excel no admite fechas con zona horaria: se exporta la hora local
+        tz = timezone.get_current_timezone()
+        for fecha, *resto in filas:
+            if fecha is not None and fecha.tzinfo is not None:
+                fecha = fecha.astimezone(tz).replace(tzinfo=None)
+            yield (fecha, *resto)
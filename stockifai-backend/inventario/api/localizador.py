@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from decimal import Decimal
-from math import atan2, cos, radians, sin, sqrt
-from typing import Dict, Iterable, List, Optional, Sequence, Set
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from math import asin, atan2, cos, degrees, pi, radians, sin, sqrt
+from typing import Dict, List, Optional, Sequence
 
 from django.db.models import F, Q, Sum
 from rest_framework import status
@@ -11,16 +10,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from catalogo.models import Repuesto, RepuestoTaller
-from user.models import Grupo, GrupoTaller, Taller
+from inventario.api.serializers import LocalizadorBatchSerializer
+from user.models import Taller
+from user.services.alcance_grupos import talleres_visibles
 from user.services.phone import to_e164_digits
 
 
-@dataclass(frozen=True)
-class GrupoNode:
-    id: int
-    parent_id: Optional[int]
-
-
 def _haversine_distance_km(origin: Sequence[Decimal], target: Sequence[Decimal]) -> Optional[float]:
     if None in origin or None in target:
         return None
@@ -40,39 +35,141 @@ def _haversine_distance_km(origin: Sequence[Decimal], target: Sequence[Decimal])
     return round(radius * c, 2)
 
 
-def _build_group_index() -> Dict[int, GrupoNode]:
-    return {
-        g.id_grupo: GrupoNode(id=g.id_grupo, parent_id=g.grupo_padre_id)
-        for g in Grupo.objects.all().only("id_grupo", "grupo_padre_id")
+RADIO_TIERRA_KM = 6371.0
+# Media circunferencia: ninguna distancia sobre la esfera es mayor
+RADIO_MAXIMO_KM = 20016.0
+RADIO_INICIAL_KM = 25.0
+FACTOR_EXPANSION = 4
+LIMITE_MAXIMO = 200
+_SEIS_DECIMALES = Decimal("0.000001")
+
+
+def _bounding_box(lat: float, lon: float, radius_km: float):
+    """
+    Caja (lat_min, lat_max, lon_min, lon_max) que contiene el círculo de radio radius_km.
+    lon_min/lon_max son None si el círculo toca un polo o cruza el antimeridiano.
+    """
+    ang = radius_km / RADIO_TIERRA_KM
+    dlat = degrees(ang)
+    lat_min, lat_max = lat - dlat, lat + dlat
+
+    if ang >= pi / 2 or lat_min <= -90 or lat_max >= 90:
+        return max(lat_min, -90.0), min(lat_max, 90.0), None, None
+
+    ratio = sin(ang) / cos(radians(lat))
+    if ratio >= 1:
+        return lat_min, lat_max, None, None
+
+    dlon = degrees(asin(ratio))
+    lon_min, lon_max = lon - dlon, lon + dlon
+    if lon_min < -180 or lon_max > 180:
+        return lat_min, lat_max, None, None
+    return lat_min, lat_max, lon_min, lon_max
+
+
+def _filtrar_bbox(qs, lat: float, lon: float, radius_km: float, prefijo: str = "taller__"):
+    lat_min, lat_max, lon_min, lon_max = _bounding_box(lat, lon, radius_km)
+    # redondeo hacia afuera para no perder bordes por la precisión del DecimalField
+    filtro = {
+        f"{prefijo}latitud__gte": Decimal(str(lat_min)).quantize(_SEIS_DECIMALES, rounding=ROUND_FLOOR),
+        f"{prefijo}latitud__lte": Decimal(str(lat_max)).quantize(_SEIS_DECIMALES, rounding=ROUND_CEILING),
     }
+    if lon_min is not None:
+        filtro[f"{prefijo}longitud__gte"] = Decimal(str(lon_min)).quantize(_SEIS_DECIMALES, rounding=ROUND_FLOOR)
+        filtro[f"{prefijo}longitud__lte"] = Decimal(str(lon_max)).quantize(_SEIS_DECIMALES, rounding=ROUND_CEILING)
+    else:
+        filtro[f"{prefijo}longitud__isnull"] = False
+    return qs.filter(**filtro)
+
+
+def _dentro_del_radio(qs, origen: Sequence[Decimal], lat: float, lon: float, radio: float):
+    dentro = []
+    for rt in _filtrar_bbox(qs, lat, lon, radio):
+        distancia = _haversine_distance_km(origen, (rt.taller.latitud, rt.taller.longitud))
+        if distancia is not None and distancia <= radio:
+            dentro.append((distancia, rt))
+    return dentro
+
+
+def _buscar_por_cercania(qs, origen: Sequence[Decimal], radius_km: Optional[float], limit: Optional[int]):
+    """
+    Devuelve [(distancia_km, rt)] dentro del radio, usando la bounding box para que la DB
+    descarte los talleres lejanos. Si hay limit, se empieza por RADIO_INICIAL_KM y el radio
+    se multiplica por FACTOR_EXPANSION hasta juntar limit talleres o llegar al tope: cada
+    paso solo trae los candidatos de su caja y son como mucho seis queries (25 km a 20016 km).
+    """
+    lat, lon = float(origen[0]), float(origen[1])
+    tope = radius_km if radius_km is not None else RADIO_MAXIMO_KM
+    radio = tope if limit is None else min(RADIO_INICIAL_KM, tope)
+
+    dentro = _dentro_del_radio(qs, origen, lat, lon, radio)
+    while limit is not None and len(dentro) < limit and radio < tope:
+        radio = min(radio * FACTOR_EXPANSION, tope)
+        dentro = _dentro_del_radio(qs, origen, lat, lon, radio)
+    return dentro
+
+
+def _parse_radius_limit(params):
+    """Devuelve (radius_km, limit, error)."""
+    radius_km = limit = None
+
+    if params.get("radius_km") not in (None, ""):
+        try:
+            radius_km = float(params.get("radius_km"))
+        except (TypeError, ValueError):
+            return None, None, "radius_km inválido"
+        if radius_km <= 0:
+            return None, None, "radius_km debe ser mayor a 0"
 
+    if params.get("limit") not in (None, ""):
+        try:
+            limit = int(params.get("limit"))
+        except (TypeError, ValueError):
+            return None, None, "limit inválido"
+        if limit <= 0:
+            return None, None, "limit debe ser mayor a 0"
+        limit = min(limit, LIMITE_MAXIMO)
 
-def _collect_related_groups(initial: Iterable[int], index: Dict[int, GrupoNode]) -> Set[int]:
-    result: Set[int] = set(initial)
-    queue: List[int] = list(initial)
+    return radius_km, limit, None
 
-    # ascender a los ancestros
-    while queue:
-        gid = queue.pop(0)
-        node = index.get(gid)
-        if node and node.parent_id and node.parent_id not in result:
-            result.add(node.parent_id)
-            queue.append(node.parent_id)
 
-    # descender a subgrupos
-    added = True
-    while added:
-        added = False
-        for node in index.values():
-            if node.parent_id in result and node.id not in result:
-                result.add(node.id)
-                added = True
+def _taller_payload(taller: Taller, distancia: Optional[float], **extra) -> Dict[str, object]:
+    return {
+        "id": taller.id,
+        "nombre": taller.nombre,
+        "direccion": taller.direccion,
+        "lat": float(taller.latitud) if taller.latitud is not None else None,
+        "lng": float(taller.longitud) if taller.longitud is not None else None,
+        "email": taller.email,
+        "telefono": taller.telefono,
+        "telefono_e164": to_e164_digits(taller.telefono) if taller.telefono else None,
+        **extra,
+        "distancia_km": distancia,
+    }
 
-    return result
+
+def _taller_origen_payload(taller: Taller) -> Dict[str, object]:
+    return {
+        "id": taller.id,
+        "nombre": taller.nombre,
+        "lat": float(taller.latitud) if taller.latitud is not None else None,
+        "lng": float(taller.longitud) if taller.longitud is not None else None,
+    }
+
+
+def _orden_distancia(t: Dict[str, object]):
+    return t["distancia_km"] is None, t["distancia_km"] or 0.0, t["nombre"]
 
 
 class LocalizadorRepuestoView(APIView):
-    """Devuelve talleres con stock disponible para un número de repuesto."""
+    """
+    Devuelve talleres con stock disponible para un número de repuesto.
+
+    Query params:
+      - numero_pieza, taller_id (requeridos)
+      - radius_km: solo talleres a esa distancia como máximo del taller de origen
+      - limit: cantidad máxima de talleres (los más cercanos, máx 200)
+    """
 
     def get(self, request):
         numero_pieza = (request.query_params.get("numero_pieza") or "").strip()
@@ -89,6 +186,10 @@ class LocalizadorRepuestoView(APIView):
         except (TypeError, ValueError):
             return Response({"detail": "taller_id inválido"}, status=status.HTTP_400_BAD_REQUEST)
 
+        radius_km, limit, error = _parse_radius_limit(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             taller_origen = Taller.objects.get(pk=taller_id_int)
         except Taller.DoesNotExist:
@@ -106,19 +207,7 @@ class LocalizadorRepuestoView(APIView):
                 status=status.HTTP_200_OK,
             )
 
-        grupos_index = _build_group_index()
-        grupos_taller_ids = list(
-            GrupoTaller.objects.filter(id_taller=taller_origen).values_list("id_grupo_id", flat=True)
-        )
-        if grupos_taller_ids:
-            grupos_relacionados = _collect_related_groups(grupos_taller_ids, grupos_index)
-            talleres_permitidos = set(
-                GrupoTaller.objects.filter(id_grupo_id__in=grupos_relacionados).values_list("id_taller_id", flat=True)
-            )
-        else:
-            talleres_permitidos = set()
-
-        talleres_permitidos.add(taller_origen.id)
+        talleres_permitidos = talleres_visibles(taller_origen.id)
 
         qs = (
             RepuestoTaller.objects.filter(
@@ -136,41 +225,136 @@ class LocalizadorRepuestoView(APIView):
         )
 
         origen_coords = (taller_origen.latitud, taller_origen.longitud)
-        talleres_payload: List[Dict[str, object]] = []
+        origen_tiene_coords = None not in origen_coords
 
-        for rt in qs:
-            taller = rt.taller
-            lat = float(taller.latitud) if taller.latitud is not None else None
-            lon = float(taller.longitud) if taller.longitud is not None else None
-            distancia = _haversine_distance_km(origen_coords, (taller.latitud, taller.longitud))
-            talleres_payload.append(
-                {
-                    "id": taller.id,
-                    "nombre": taller.nombre,
-                    "direccion": taller.direccion,
-                    "lat": lat,
-                    "lng": lon,
-                    "email": taller.email,
-                    "telefono": taller.telefono,
-                    "telefono_e164": to_e164_digits(taller.telefono) if taller.telefono else None,
-                    "stock_total": rt.stock_total or 0,
-                    "distancia_km": distancia,
-                }
+        if radius_km is not None and not origen_tiene_coords:
+            return Response(
+                {"detail": "El taller de origen no tiene coordenadas para filtrar por radio"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        talleres_payload.sort(key=lambda t: (t["distancia_km"] is None, t["distancia_km"] or 0.0, t["nombre"]))
+        if origen_tiene_coords and (radius_km is not None or limit is not None):
+            encontrados = _buscar_por_cercania(qs, origen_coords, radius_km, limit)
+            if radius_km is None and len(encontrados) < limit:
+                # Sin radio, los talleres sin coordenadas van al final como antes
+                faltan = limit - len(encontrados)
+                sin_coords = qs.filter(Q(taller__latitud__isnull=True) | Q(taller__longitud__isnull=True))
+                encontrados += [(None, rt) for rt in sin_coords[:faltan]]
+        else:
+            encontrados = [
+                (_haversine_distance_km(origen_coords, (rt.taller.latitud, rt.taller.longitud)), rt)
+                for rt in qs
+            ]
+
+        talleres_payload: List[Dict[str, object]] = [
+            _taller_payload(rt.taller, distancia, stock_total=rt.stock_total or 0)
+            for distancia, rt in encontrados
+        ]
+        talleres_payload.sort(key=_orden_distancia)
+        if limit is not None:
+            talleres_payload = talleres_payload[:limit]
 
         data = {
             "repuesto": {
                 "numero_pieza": repuesto.numero_pieza,
                 "descripcion": repuesto.descripcion,
             },
-            "taller_origen": {
-                "id": taller_origen.id,
-                "nombre": taller_origen.nombre,
-                "lat": float(taller_origen.latitud) if taller_origen.latitud is not None else None,
-                "lng": float(taller_origen.longitud) if taller_origen.longitud is not None else None,
-            },
+            "taller_origen": _taller_origen_payload(taller_origen),
+            "talleres": talleres_payload,
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class LocalizadorRepuestosBatchView(APIView):
+    """
+    POST /localizador/repuestos/batch
+
+    Body:
+      - taller_id: int
+      - numeros_pieza: [str] (hasta 100)
+      - radius_km, limit: opcionales, igual que el localizador individual
+
+    Resuelve todos los repuestos con una sola query de stock y ordena los talleres
+    por cobertura (cuántos de los repuestos pedidos tienen) y luego por distancia.
+    """
+
+    def post(self, request):
+        ser = LocalizadorBatchSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        taller_id = ser.validated_data["taller_id"]
+        radius_km = ser.validated_data.get("radius_km")
+        limit = ser.validated_data.get("limit")
+        numeros = list(dict.fromkeys(n for n in ser.validated_data["numeros_pieza"] if n))
+
+        try:
+            taller_origen = Taller.objects.get(pk=taller_id)
+        except Taller.DoesNotExist:
+            return Response({"detail": "Taller de origen no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+
+        origen_coords = (taller_origen.latitud, taller_origen.longitud)
+        if radius_km is not None and None in origen_coords:
+            return Response(
+                {"detail": "El taller de origen no tiene coordenadas para filtrar por radio"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        repuestos = {
+            r["id"]: r
+            for r in Repuesto.objects.filter(numero_pieza__in=numeros).values("id", "numero_pieza", "descripcion")
+        }
+        encontrados = {r["numero_pieza"] for r in repuestos.values()}
+
+        filas = (
+            RepuestoTaller.objects.filter(
+                repuesto_id__in=list(repuestos),
+                taller_id__in=talleres_visibles(taller_origen.id),
+            )
+            .values("taller_id", "repuesto_id")
+            .annotate(
+                stock_total=Sum(
+                    "stocks__cantidad",
+                    filter=Q(stocks__deposito__taller_id=F("taller_id")),
+                )
+            )
+            .filter(stock_total__gt=0)
+        )
+        if radius_km is not None:
+            filas = _filtrar_bbox(filas, float(origen_coords[0]), float(origen_coords[1]), radius_km)
+
+        stock_por_taller: Dict[int, List[Dict[str, object]]] = {}
+        for fila in filas:
+            stock_por_taller.setdefault(fila["taller_id"], []).append({
+                "numero_pieza": repuestos[fila["repuesto_id"]]["numero_pieza"],
+                "stock_total": fila["stock_total"],
+            })
+
+        talleres_payload: List[Dict[str, object]] = []
+        for taller in Taller.objects.filter(id__in=list(stock_por_taller)):
+            distancia = _haversine_distance_km(origen_coords, (taller.latitud, taller.longitud))
+            if radius_km is not None and (distancia is None or distancia > radius_km):
+                continue
+            disponibles = sorted(stock_por_taller[taller.id], key=lambda r: r["numero_pieza"])
+            talleres_payload.append(
+                _taller_payload(
+                    taller,
+                    distancia,
+                    cobertura=len(disponibles),
+                    cobertura_completa=len(disponibles) == len(encontrados),
+                    repuestos=disponibles,
+                )
+            )
+
+        talleres_payload.sort(key=lambda t: (-t["cobertura"], *_orden_distancia(t)))
+        if limit is not None:
+            talleres_payload = talleres_payload[:limit]
+
+        data = {
+            "repuestos": sorted(
+                ({"numero_pieza": r["numero_pieza"], "descripcion": r["descripcion"]} for r in repuestos.values()),
+                key=lambda r: r["numero_pieza"],
+            ),
+            "no_encontrados": [n for n in numeros if n not in encontrados],
+            "taller_origen": _taller_origen_payload(taller_origen),
             "talleres": talleres_payload,
         }
         return Response(data, status=status.HTTP_200_OK)
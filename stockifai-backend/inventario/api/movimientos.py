@@ -3,13 +3,45 @@ from django.utils.dateparse import parse_date
 from django.utils import timezone
 
 from django.core.paginator import Paginator, EmptyPage
-from django.db.models import Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
+from inventario.api.paginacion import CursorInvalido, paginar_por_cursor
 from inventario.api.serializers import MovimientosSerializer
 from inventario.models import Deposito, Movimiento
+from inventario.services.busqueda import filtro_busqueda
+
+MAX_PAGE_SIZE_CURSOR = 200
+
+
+def filtrar_movimientos(queryset, query_params):
+    """Filtros comunes del listado y la exportación: deposito_id, search_text, date_from, date_to."""
+    deposito_id = query_params.get("deposito_id")
+    search_query = query_params.get("search_text")
+    date_from_str = query_params.get("date_from")
+    date_to_str = query_params.get("date_to")
+
+    if deposito_id:
+        queryset = queryset.filter(stock_por_deposito__deposito_id=deposito_id)
+
+    if search_query:
+        queryset = queryset.filter(
+            filtro_busqueda(search_query, prefijo="stock_por_deposito__repuesto_taller__repuesto__")
+        )
+
+    tz = timezone.get_current_timezone()
+
+    if date_from_str:
+        date_from = parse_date(date_from_str) if date_from_str else None
+        start_dt = timezone.make_aware(datetime.combine(date_from, time.min), tz)
+        queryset = queryset.filter(fecha__gte=start_dt)
+    if date_to_str:
+        date_to = parse_date(date_to_str) if date_to_str else None
+        end_next = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min), tz)
+        queryset = queryset.filter(fecha__lt=end_next)
+
+    return queryset
 
 
 class MovimientosListView(APIView):
@@ -19,17 +51,21 @@ class MovimientosListView(APIView):
                 GET /talleres/<taller_id>/movimientos
                 Query params opcionales:
                   - deposito_id: int
-                  - search_text: str  (numero_pieza | sku | nombre | descripcion)
+                  - search_text: str  (prefijos de palabra de numero_pieza | descripcion,
+                    todos deben matchear; no busca en medio de una palabra)
                   - date_from: YYYY-MM-DD
                   - date_to:   YYYY-MM-DD
                   - page: int (default 1)
                   - page_size: int (default 10, máx 200)
+                  - cursor: str  (activa la paginación por cursor; vacío = primera página)
+                  - include_count: 1|true  (solo en modo cursor, agrega el total)
+
+                En modo cursor el orden es (-fecha, -id) y la respuesta trae
+                next_cursor en lugar de page/total_pages. No se hace COUNT salvo
+                que se pida con include_count.
         """
 
         deposito_id = request.query_params.get("deposito_id")
-        search_query = request.query_params.get("search_text")
-        date_from_str = request.query_params.get("date_from")
-        date_to_str = request.query_params.get("date_to")
 
         # Paginacion
         page = int(request.query_params.get("page", 1))
@@ -47,25 +83,10 @@ class MovimientosListView(APIView):
             "stock_por_deposito__repuesto_taller__repuesto__categoria",
         ).filter(stock_por_deposito__repuesto_taller__taller_id=taller_id)
 
-        if deposito_id:
-            queryset = queryset.filter(stock_por_deposito__deposito_id=deposito_id)
-
-        if search_query:
-            queryset = queryset.filter(
-                Q(stock_por_deposito__repuesto_taller__repuesto__numero_pieza__icontains=search_query)
-                | Q(stock_por_deposito__repuesto_taller__repuesto__descripcion__icontains=search_query)
-            )
+        queryset = filtrar_movimientos(queryset, request.query_params)
 
-        tz = timezone.get_current_timezone()
-
-        if date_from_str:
-            date_from = parse_date(date_from_str) if date_from_str else None
-            start_dt = timezone.make_aware(datetime.combine(date_from, time.min), tz)
-            queryset = queryset.filter(fecha__gte=start_dt)
-        if date_to_str:
-            date_to = parse_date(date_to_str) if date_to_str else None
-            end_next = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min), tz)
-            queryset = queryset.filter(fecha__lt=end_next)
+        if "cursor" in request.query_params:
+            return self._get_por_cursor(request, queryset, page_size)
 
         queryset = queryset.order_by("-fecha", "stock_por_deposito__repuesto_taller__repuesto__descripcion")
 
@@ -88,4 +109,25 @@ class MovimientosListView(APIView):
 
         return Response(response, status=status.HTTP_200_OK)
 
+    def _get_por_cursor(self, request, queryset, page_size: int):
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE_CURSOR))
+        include_count = request.query_params.get("include_count") in ("1", "true")
+
+        try:
+            items, next_cursor = paginar_por_cursor(
+                queryset, request.query_params.get("cursor"), page_size
+            )
+        except CursorInvalido as ex:
+            return Response({"detail": str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = MovimientosSerializer(items, many=True)
 
+        response = {
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "results": serializer.data,
+        }
+        if include_count:
+            response["count"] = queryset.count()
+
+        return Response(response, status=status.HTTP_200_OK)
@@ -0,0 +1,52 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import Q, QuerySet
+
+
+class CursorInvalido(ValueError):
+    ...
+
+
+def codificar_cursor(fecha: datetime, pk: int) -> str:
+    raw = f"{fecha.isoformat()}|{pk}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode("utf-8")
+        fecha_str, pk_str = raw.rsplit("|", 1)
+        return datetime.fromisoformat(fecha_str), int(pk_str)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as ex:
+        raise CursorInvalido("Cursor inválido") from ex
+
+
+def paginar_por_cursor(queryset: QuerySet, cursor: Optional[str], page_size: int,
+                       campo_fecha: str = "fecha") -> Tuple[list, Optional[str]]:
+    """
+    Paginación keyset sobre (fecha DESC, id DESC).
+    No usa OFFSET ni COUNT: cada página cuesta lo mismo sin importar la profundidad.
+    Devuelve (items, next_cursor). next_cursor es None en la última página.
+    """
+    queryset = queryset.order_by(f"-{campo_fecha}", "-id")
+
+    if cursor:
+        fecha, pk = decodificar_cursor(cursor)
+        # fecha__lte permite el range scan sobre el índice (fecha, id)
+        queryset = queryset.filter(
+            Q(**{f"{campo_fecha}__lte": fecha}),
+            Q(**{f"{campo_fecha}__lt": fecha}) | Q(**{campo_fecha: fecha, "id__lt": pk}),
+        )
+
+    # Pedimos uno extra para saber si hay página siguiente
+    items = list(queryset[:page_size + 1])
+    if len(items) <= page_size:
+        return items, None
+
+    items = items[:page_size]
+    ultimo = items[-1]
+    return items, codificar_cursor(getattr(ultimo, campo_fecha), ultimo.pk)
@@ -36,6 +36,17 @@ class CatalogoImportSerializer(serializers.Serializer):
     mode = serializers.ChoiceField(choices=("upsert", "create-only", "update-only"), required=False, default="upsert")
 
 
+class LocalizadorBatchSerializer(serializers.Serializer):
+    taller_id = serializers.IntegerField(min_value=1)
+    numeros_pieza = serializers.ListField(
+        child=serializers.CharField(trim_whitespace=True),
+        allow_empty=False,
+        max_length=100,
+    )
+    radius_km = serializers.FloatField(required=False, min_value=0.001)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=200)
+
+
 class DepositoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Deposito
@@ -109,4 +120,61 @@ class StockDepositoDetalleSerializer(serializers.Serializer):
 class RepuestoStockSerializer(serializers.Serializer):
     repuesto_taller = RepuestoTallerSerializer()
     stock_total = serializers.IntegerField()
-    depositos = StockDepositoDetalleSerializer(many=True)
\ No newline at end of file
+    depositos = StockDepositoDetalleSerializer(many=True)
+
+# --- Proyecciones planas para listados ---
+# Mismo formato que RepuestoTallerSerializer / DepositoSerializer, armado desde filas de
+# .values(): sin instanciar modelos ni serializers anidados por cada ítem.
+
+CAMPOS_REPUESTO_TALLER = (
+    "id_repuesto_taller", "precio", "costo", "original", "frecuencia",
+    "pred_1", "pred_2", "pred_3", "pred_4",
+    "taller_id", "taller__nombre",
+    "repuesto__numero_pieza", "repuesto__descripcion", "repuesto__estado",
+    "repuesto__marca_id", "repuesto__marca__nombre",
+    "repuesto__categoria_id", "repuesto__categoria__nombre", "repuesto__categoria__descripcion",
+)
+
+CAMPOS_DEPOSITO = ("deposito_id", "deposito__nombre", "deposito__taller_id")
+
+_DECIMAL_RT = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+def _decimal(valor):
+    # Igual que el DecimalField de DRF (COERCE_DECIMAL_TO_STRING): "10.50"
+    return None if valor is None else _DECIMAL_RT.to_representation(valor)
+
+
+def repuesto_taller_dict(fila: dict) -> dict:
+    """Equivalente a RepuestoTallerSerializer(rt).data para una fila con CAMPOS_REPUESTO_TALLER."""
+    marca_id = fila["repuesto__marca_id"]
+    categoria_id = fila["repuesto__categoria_id"]
+    return {
+        "id_repuesto_taller": fila["id_repuesto_taller"],
+        "repuesto": {
+            "numero_pieza": fila["repuesto__numero_pieza"],
+            "descripcion": fila["repuesto__descripcion"],
+            "marca": None if marca_id is None else {"id": marca_id, "nombre": fila["repuesto__marca__nombre"]},
+            "categoria": None if categoria_id is None else {
+                "id": categoria_id,
+                "nombre": fila["repuesto__categoria__nombre"],
+                "descripcion": fila["repuesto__categoria__descripcion"],
+            },
+            "estado": fila["repuesto__estado"],
+        },
+        "taller": {"id": fila["taller_id"], "nombre": fila["taller__nombre"]},
+        "precio": _decimal(fila["precio"]),
+        "costo": _decimal(fila["costo"]),
+        "original": fila["original"],
+        "pred_1": fila["pred_1"],
+        "pred_2": fila["pred_2"],
+        "pred_3": fila["pred_3"],
+        "pred_4": fila["pred_4"],
+        "cantidad_minima": fila["pred_1"],
+        "frecuencia": fila["frecuencia"],
+    }
+
+
+def deposito_dict(fila: dict) -> dict:
+    """Equivalente a DepositoSerializer(deposito).data para una fila con CAMPOS_DEPOSITO."""
+    return {"id": fila["deposito_id"], "nombre": fila["deposito__nombre"], "taller_id": fila["deposito__taller_id"]}
@@ -3,7 +3,8 @@ from django.urls import path
 from .movimientos import MovimientosListView
 from .views import ImportarMovimientosView, ImportarStockView, ImportarCatalogoView, DepositosPorTallerView, \
     ConsultarStockView, EjecutarForecastPorTallerView, EjecutarForecastView, DetalleForecastingView, ConsultarForecastingListView, AlertsListView
-from .localizador import LocalizadorRepuestoView
+from .exportaciones import ExportarStockView, ExportarForecastingView, ExportarMovimientosView
+from .localizador import LocalizadorRepuestoView, LocalizadorRepuestosBatchView
 
 urlpatterns = [
     path('importaciones/movimientos', ImportarMovimientosView.as_view(), name='importar-movimientos'),
@@ -12,12 +13,16 @@ urlpatterns = [
     path("talleres/<int:taller_id>/depositos", DepositosPorTallerView.as_view(), name="depositos-por-taller"),
     path("talleres/<int:taller_id>/movimientos", MovimientosListView.as_view(), name="movimientos-list"),
     path("talleres/<int:taller_id>/stock", ConsultarStockView.as_view(), name="consultar-stock"),
+    path("talleres/<int:taller_id>/stock/exportar", ExportarStockView.as_view(), name="exportar-stock"),
+    path("talleres/<int:taller_id>/movimientos/exportar", ExportarMovimientosView.as_view(), name="exportar-movimientos"),
+    path("talleres/<int:taller_id>/forecasting/exportar", ExportarForecastingView.as_view(), name="exportar-forecasting"),
     path("talleres/<int:taller_id>/forecast/run", EjecutarForecastPorTallerView.as_view(), name="forecast-run-taller"),
     path("talleres/forecast/run", EjecutarForecastView.as_view(), name="forecast-run"),
     path("talleres/<int:taller_id>/forecasting", ConsultarForecastingListView.as_view(), name="forecasting-list"),
     path("talleres/<int:taller_id>/repuestos/<int:repuesto_taller_id>/forecasting",DetalleForecastingView.as_view(),name="detalle-forecasting"),
     path("talleres/<int:taller_id>/alertas",AlertsListView.as_view(),name="alertas-list"),
     path("localizador/repuestos", LocalizadorRepuestoView.as_view(), name="localizador-repuestos"),
+    path("localizador/repuestos/batch", LocalizadorRepuestosBatchView.as_view(), name="localizador-repuestos-batch"),
 ]
 
 
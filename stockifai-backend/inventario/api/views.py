@@ -2,32 +2,42 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import transaction
+from collections import defaultdict
 from datetime import datetime, timedelta, date
 from .serializers import MovimientosImportSerializer, StockImportSerializer, CatalogoImportSerializer, \
     DepositoSerializer
 from ..models import Deposito, Movimiento
-from ..services.import_catalogo import importar_catalogo
-from ..services.import_movimientos import importar_movimientos
-from AI.services.forecast_pipeline import ejecutar_forecast_pipeline_por_taller, ejecutar_forecast_talleres
 from django.conf import settings
 from decimal import Decimal, ROUND_HALF_UP
 from typing import List, Optional, Union, Dict, Any
-from ..services.import_stock import importar_stock
-from django.db.models import Sum, Q, Prefetch
+from ..services.busqueda import filtro_busqueda
+from ..services.cache_consultas import espacio_depositos, obtener
+from .cache_http import inicio_semana_actual, respuesta_versionada
+from django.db.models import Sum, Q
 from django.db.models.functions import TruncWeek
 from rest_framework.pagination import PageNumberPagination
 from catalogo.models import RepuestoTaller
 from inventario.models import StockPorDeposito, Deposito
 from .serializers import (
+    CAMPOS_DEPOSITO,
+    CAMPOS_REPUESTO_TALLER,
     RepuestoStockSerializer,
     RepuestoTallerSerializer,
     StockDepositoDetalleSerializer,
     DepositoSerializer,
+    deposito_dict,
+    repuesto_taller_dict,
 )
 
 
+# Las importaciones (pandas) y el forecast (pandas, LightGBM, sklearn, holidays) se
+# importan dentro de cada vista: así los workers web no cargan el stack de ML al
+# arrancar, solo cuando se usa alguno de estos endpoints.
+
 class ImportarMovimientosView(APIView):
     def post(self, request):
+        from ..services.import_movimientos import importar_movimientos
+
         ser = MovimientosImportSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         with transaction.atomic():
@@ -43,6 +53,8 @@ class ImportarMovimientosView(APIView):
 
 class ImportarStockView(APIView):
     def post(self, request):
+        from ..services.import_stock import importar_stock
+
         ser = StockImportSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
 
@@ -58,6 +70,8 @@ class ImportarStockView(APIView):
 
 class ImportarCatalogoView(APIView):
     def post(self, request):
+        from ..services.import_catalogo import importar_catalogo
+
         ser = CatalogoImportSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         with transaction.atomic():
@@ -71,8 +85,10 @@ class ImportarCatalogoView(APIView):
 
 class DepositosPorTallerView(APIView):
     def get(self, request, taller_id: int):
-        qs = Deposito.objects.filter(taller_id=taller_id)
-        data = DepositoSerializer(qs, many=True).data
+        data = obtener(
+            espacio_depositos(taller_id), ("depositos",),
+            lambda: DepositoSerializer(Deposito.objects.filter(taller_id=taller_id), many=True).data,
+        )
         return Response(data, status=status.HTTP_200_OK)
 
 
@@ -89,7 +105,8 @@ class ConsultarStockView(APIView):
     GET /talleres/<taller_id>/stock
 
     Query params:
-      - q: busca en numero_pieza/descripcion (icontains)
+      - q: busca por prefijo de palabra en numero_pieza/descripcion (índice de tokens);
+           todas las palabras deben matchear y no busca en medio de una palabra
       - numero_pieza: exacto o icontains si exact=0
       - exact: 1|0 (default 1)
       - original: true|false|1|0
@@ -101,6 +118,7 @@ class ConsultarStockView(APIView):
     """
     pagination_class = _StockPagination
 
+    @respuesta_versionada
     def get(self, request, taller_id: int):
         q = request.query_params.get("q")
         numero_pieza = request.query_params.get("numero_pieza")
@@ -111,24 +129,10 @@ class ConsultarStockView(APIView):
         con_stock = request.query_params.get("con_stock")
         ordering = request.query_params.get("ordering")
 
-        rt_qs = (
-            RepuestoTaller.objects
-            .filter(taller_id=taller_id)
-            .select_related("repuesto", "taller", "repuesto__marca", "repuesto__categoria")
-            .prefetch_related(
-                Prefetch(
-                    "stocks",
-                    queryset=StockPorDeposito.objects.select_related("deposito"),
-                    to_attr="prefetched_stocks"
-                )
-            )
-        )
+        rt_qs = RepuestoTaller.objects.filter(taller_id=taller_id)
 
         if q:
-            rt_qs = rt_qs.filter(
-                Q(repuesto__numero_pieza__icontains=q) |
-                Q(repuesto__descripcion__icontains=q)
-            )
+            rt_qs = rt_qs.filter(filtro_busqueda(q, prefijo="repuesto__"))
 
         if numero_pieza:
             if exact == "1":
@@ -159,37 +163,41 @@ class ConsultarStockView(APIView):
         else:
             rt_qs = rt_qs.order_by("repuesto__numero_pieza")
 
+        # Filas planas (.values) en lugar de instancias + serializers anidados
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(rt_qs, request)
+        page = paginator.paginate_queryset(rt_qs.values(*CAMPOS_REPUESTO_TALLER, "stock_total"), request)
 
-        payload = []
-        for rt in page:
-            # Detalle por depósito (solo depósitos del taller y, si corresponde, el indicado)
-            depositos_detalle = []
-            for spd in getattr(rt, "prefetched_stocks", []):
-                if spd.deposito.taller_id != taller_id:
-                    continue
-                if deposito_id and spd.deposito_id != int(deposito_id):
-                    continue
-                depositos_detalle.append({
-                    "deposito": DepositoSerializer(spd.deposito).data,
-                    "cantidad": spd.cantidad,
-                })
+        # Detalle por depósito de toda la página en una query (solo depósitos del
+        # taller y, si corresponde, el indicado)
+        stocks_qs = StockPorDeposito.objects.filter(
+            repuesto_taller_id__in=[fila["id_repuesto_taller"] for fila in page],
+            deposito__taller_id=taller_id,
+        )
+        if deposito_id:
+            stocks_qs = stocks_qs.filter(deposito_id=deposito_id)
+        depositos_por_rt = defaultdict(list)
+        for spd in stocks_qs.order_by("id").values("repuesto_taller_id", "cantidad", *CAMPOS_DEPOSITO):
+            depositos_por_rt[spd["repuesto_taller_id"]].append({
+                "deposito": deposito_dict(spd),
+                "cantidad": spd["cantidad"],
+            })
 
-            stock_total = Decimal(rt.stock_total or 0)
+        payload = []
+        for fila in page:
+            stock_total = Decimal(fila["stock_total"] or 0)
             forecast_semanas = [
-                Decimal(rt.pred_1 or 0),
-                Decimal(rt.pred_2 or 0),
-                Decimal(rt.pred_3 or 0),
-                Decimal(rt.pred_4 or 0),
+                Decimal(fila["pred_1"] or 0),
+                Decimal(fila["pred_2"] or 0),
+                Decimal(fila["pred_3"] or 0),
+                Decimal(fila["pred_4"] or 0),
             ]
 
             mos_en_semanas = calcular_mos(stock_total, forecast_semanas)
 
             item = {
-                "repuesto_taller": RepuestoTallerSerializer(rt).data,
-                "stock_total": rt.stock_total or 0,
-                "depositos": depositos_detalle,
+                "repuesto_taller": repuesto_taller_dict(fila),
+                "stock_total": fila["stock_total"] or 0,
+                "depositos": depositos_por_rt.get(fila["id_repuesto_taller"], []),
                 "mos_en_semanas": float(mos_en_semanas) if mos_en_semanas else None,
             }
             payload.append(item)
@@ -234,16 +242,28 @@ def calcular_mos(stock: Decimal, weeks: list[Decimal]) -> Decimal:
 
 class EjecutarForecastPorTallerView(APIView):
     def post(self, request, taller_id: int):
+        from AI.entrenamiento_global import ModeloGlobalInexistente
+        from AI.services.forecast_pipeline import ejecutar_forecast_pipeline_por_taller
+
         fecha_lunes = request.data.get("fecha_lunes")  # "YYYY-MM-DD" (lunes)
 
-        out = ejecutar_forecast_pipeline_por_taller(taller_id, fecha_lunes)
+        forzar = str(request.data.get("forzar", "")).lower() in ("1", "true", "yes", "y")
+
+        try:
+            out = ejecutar_forecast_pipeline_por_taller(taller_id, fecha_lunes, forzar=forzar)
+        except ModeloGlobalInexistente as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
         return Response({"status": "ok", "details": out}, status=status.HTTP_200_OK)
 
 class EjecutarForecastView(APIView):
     def post(self, request):
+        from AI.services.forecast_pipeline import ejecutar_forecast_talleres
+
         fecha_lunes = request.data.get("fecha_lunes")  # "YYYY-MM-DD" (lunes)
 
-        out = ejecutar_forecast_talleres(fecha_lunes)
+        forzar = str(request.data.get("forzar", "")).lower() in ("1", "true", "yes", "y")
+
+        out = ejecutar_forecast_talleres(fecha_lunes, forzar=forzar)
         return Response({"status": "ok", "details": out}, status=status.HTTP_200_OK)
 
 class ConsultarForecastingListView(APIView):
@@ -252,9 +272,14 @@ class ConsultarForecastingListView(APIView):
 
     Muestra una lista paginada de todos los repuestos del taller,
     incluyendo Stock Total, MOS y las 4 predicciones de demanda.
+
+    Query params:
+      - q: misma búsqueda por prefijo de palabra que /stock
+      - ordering, page, page_size
     """
     pagination_class = _StockPagination # Reutiliza la paginación
 
+    @respuesta_versionada
     def get(self, request, taller_id: int):
         # Filtros de búsqueda (similares a ConsultarStockView si es necesario)
         q = request.query_params.get("q")
@@ -265,10 +290,7 @@ class ConsultarForecastingListView(APIView):
 
         # 2. Aplicar filtros
         if q:
-            rt_qs = rt_qs.filter(
-                Q(repuesto__numero_pieza__icontains=q) |
-                Q(repuesto__descripcion__icontains=q)
-            )
+            rt_qs = rt_qs.filter(filtro_busqueda(q, prefijo="repuesto__"))
 
         # 3. Anotar stock_total (Sumamos el stock de todos los depósitos del taller)
         filt_stock = Q(stocks__deposito__taller_id=taller_id)
@@ -286,33 +308,33 @@ class ConsultarForecastingListView(APIView):
         else:
             rt_qs = rt_qs.order_by("repuesto__numero_pieza")
 
-        # 5. Paginación
+        # 5. Paginación (filas planas con repuesto, marca, categoría y taller en la misma query)
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(rt_qs, request)
+        page = paginator.paginate_queryset(rt_qs.values(*CAMPOS_REPUESTO_TALLER, "stock_total"), request)
 
-        # 6. Serialización y Cálculo de MOS (MOS se calcula en Python)
+        # 6. Armado de cada ítem y Cálculo de MOS (MOS se calcula en Python)
         payload = []
-        for rt in page:
-            stock_total = Decimal(rt.stock_total or 0)
+        for fila in page:
+            stock_total = Decimal(fila["stock_total"] or 0)
             forecast_semanas = [
-                Decimal(rt.pred_1 or 0),
-                Decimal(rt.pred_2 or 0),
-                Decimal(rt.pred_3 or 0),
-                Decimal(rt.pred_4 or 0),
+                Decimal(fila["pred_1"] or 0),
+                Decimal(fila["pred_2"] or 0),
+                Decimal(fila["pred_3"] or 0),
+                Decimal(fila["pred_4"] or 0),
             ]
 
             mos_en_semanas = calcular_mos(stock_total, forecast_semanas)
 
             item = {
-                # Información base del repuesto (usamos el Serializer existente)
-                "repuesto_taller": RepuestoTallerSerializer(rt).data,
-                "stock_total": rt.stock_total or 0,
+                # Información base del repuesto (mismo formato que RepuestoTallerSerializer)
+                "repuesto_taller": repuesto_taller_dict(fila),
+                "stock_total": fila["stock_total"] or 0,
                 # Datos de MOS y predicción para la tabla
                 "mos_en_semanas": float(mos_en_semanas) if mos_en_semanas else None,
-                "pred_1": float(rt.pred_1 or 0),
-                "pred_2": float(rt.pred_2 or 0),
-                "pred_3": float(rt.pred_3 or 0),
-                "pred_4": float(rt.pred_4 or 0),
+                "pred_1": float(fila["pred_1"] or 0),
+                "pred_2": float(fila["pred_2"] or 0),
+                "pred_3": float(fila["pred_3"] or 0),
+                "pred_4": float(fila["pred_4"] or 0),
             }
             payload.append(item)
 
@@ -334,6 +356,8 @@ class DetalleForecastingView(APIView):
     NUM_FORECAST_GRAFICO = 6
     CONFIDENCE_PCT = 0.04
 
+    # El histórico termina en el lunes actual: la respuesta cambia con la semana
+    @respuesta_versionada(por_semana=True)
     def get(self, request, taller_id: int, repuesto_taller_id: int):
         # 1. Recuperar el RepuestoTaller y anotar el stock total
         try:
@@ -462,10 +486,8 @@ def get_historical_demand(repuesto_taller_id: int, num_weeks: int = 16) -> List[
     """
 
     # 1. Definir el rango de fechas (últimas N semanas completas)
-    # Encuentra la fecha de hoy.
-    today = date.today()
-    # Encuentra la fecha de inicio de la semana actual (Lunes)
-    start_of_current_week = today - timedelta(days=today.weekday())
+    # Encuentra la fecha de inicio de la semana actual (Lunes); la misma que usa el ETag
+    start_of_current_week = inicio_semana_actual()
 
     # El rango debe ir desde N semanas antes hasta el inicio de la semana actual.
     start_date = start_of_current_week - timedelta(weeks=num_weeks)
@@ -546,6 +568,7 @@ class AlertsListView(APIView):
     De lo contrario, devuelve la lista consolidada de TODAS las alertas activas (dashboard).
     """
 
+    @respuesta_versionada
     def get(self, request, taller_id: int):
 
         # Detecta si se pide el resumen (para el badge) o la lista completa (para la pantalla)
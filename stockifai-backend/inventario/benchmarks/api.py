@@ -0,0 +1,271 @@
+"""
+Benchmark de todas las rutas de la API (inventario, catálogo y usuarios).
+
+Siembra el dataset sintético (``datos_sinteticos.sembrar``) y llama a cada ruta con
+el cliente de Django, así que se mide el stack completo: middlewares, resolución de
+URL, vista y render (las respuestas en streaming se consumen enteras). Por escenario
+registra cantidad de queries, p50/p95 de latencia, pico de memoria Python
+(tracemalloc, en una llamada aparte) y el status.
+
+Cada ruta de ``rutas_api()`` tiene que tener un escenario en ``ESCENARIOS`` o un
+motivo en ``OMITIDAS``: una ruta nueva sin ninguno de los dos cuenta como regresión.
+Los resultados se comparan contra ``UMBRALES_API`` (JSON por escenario, generado con
+``--guardar-umbrales`` al tamaño por defecto). Las queries de los listados no dependen
+del tamaño del dataset; las de las exportaciones (lotes keyset), la latencia y la
+memoria sí, así que los umbrales solo valen para ese tamaño.
+
+Por defecto el cache se vacía antes de cada llamada (se mide la vista, no el cache).
+Todo corre en una transacción que se revierte.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import URLPattern, URLResolver, reverse
+
+from inventario.benchmarks import datos_sinteticos
+from stockifai.metricas import ContadorSQL, rss_max_mb
+
+UMBRALES_API = os.path.join(os.path.dirname(__file__), "umbrales_api.json")
+MODULOS_URLS = ("inventario.api.urls", "catalogo.api.urls", "user.urls")
+
+OMITIDAS = {
+    "callback": "intercambia el code con Auth0 (red externa)",
+    "register": "crea el usuario en Auth0 (red externa)",
+    "forecast-run-taller": "entrena modelos LightGBM: se mide con benchmark_forecast",
+    "forecast-run": "entrena modelos LightGBM: se mide con benchmark_forecast",
+}
+
+
+class Peticion(NamedTuple):
+    metodo: str
+    ruta: str
+    datos: Any = None
+    json: bool = False
+
+
+def _csv(encabezados: List[str], filas: List[list], nombre: str) -> SimpleUploadedFile:
+    salida = io.StringIO()
+    escritor = csv.writer(salida)
+    escritor.writerow(encabezados)
+    escritor.writerows(filas)
+    return SimpleUploadedFile(nombre, salida.getvalue().encode("utf-8"), content_type="text/csv")
+
+
+def _archivo_stock(c: Dict[str, Any]) -> SimpleUploadedFile:
+    return _csv(["numero_pieza", "cantidad", "deposito"],
+                [[n, 10 + i % 7, "Depósito 0"] for i, n in enumerate(c["numeros_importacion"])], "stock.csv")
+
+
+def _archivo_movimientos(c: Dict[str, Any]) -> SimpleUploadedFile:
+    return _csv(["fecha", "tipo", "cantidad", "numero_pieza", "deposito"],
+                [["2024-01-15", "INGRESO", 1 + i % 5, n, "Depósito 0"] for i, n in enumerate(c["numeros_importacion"])],
+                "movimientos.csv")
+
+
+def _archivo_catalogo(c: Dict[str, Any]) -> SimpleUploadedFile:
+    return _csv(["numero_pieza", "descripcion"],
+                [[n, f"Repuesto importado {n}"] for n in c["numeros_importacion"]], "catalogo.csv")
+
+
+# Clave: nombre de la ruta, opcionalmente con ":variante"
+ESCENARIOS: Dict[str, Callable[[Dict[str, Any]], Peticion]] = {
+    # inventario
+    "importar-stock": lambda c: Peticion("post", reverse("importar-stock"),
+                                         {"file": _archivo_stock(c), "taller_id": c["taller_id"]}),
+    "importar-movimientos": lambda c: Peticion("post", reverse("importar-movimientos"),
+                                               {"file": _archivo_movimientos(c), "taller_id": c["taller_id"]}),
+    "importar-catalogo": lambda c: Peticion("post", reverse("importar-catalogo"), {"file": _archivo_catalogo(c)}),
+    "depositos-por-taller": lambda c: Peticion("get", reverse("depositos-por-taller", args=[c["taller_id"]])),
+    "movimientos-list": lambda c: Peticion("get", reverse("movimientos-list", args=[c["taller_id"]]),
+                                           {"page": 3, "page_size": 50}),
+    "movimientos-list:cursor": lambda c: Peticion("get", reverse("movimientos-list", args=[c["taller_id"]]),
+                                                  {"cursor": "", "page_size": 50}),
+    "consultar-stock": lambda c: Peticion("get", reverse("consultar-stock", args=[c["taller_id"]]),
+                                          {"page_size": 50}),
+    "consultar-stock:busqueda": lambda c: Peticion("get", reverse("consultar-stock", args=[c["taller_id"]]),
+                                                   {"q": "pastilla fre", "page_size": 50}),
+    "exportar-stock": lambda c: Peticion("get", reverse("exportar-stock", args=[c["taller_id"]])),
+    "exportar-movimientos": lambda c: Peticion("get", reverse("exportar-movimientos", args=[c["taller_id"]])),
+    "exportar-forecasting": lambda c: Peticion("get", reverse("exportar-forecasting", args=[c["taller_id"]])),
+    "forecasting-list": lambda c: Peticion("get", reverse("forecasting-list", args=[c["taller_id"]]),
+                                           {"page_size": 50}),
+    "detalle-forecasting": lambda c: Peticion(
+        "get", reverse("detalle-forecasting", args=[c["taller_id"], c["repuesto_taller_id"]])),
+    "alertas-list": lambda c: Peticion("get", reverse("alertas-list", args=[c["taller_id"]])),
+    "alertas-list:resumen": lambda c: Peticion("get", reverse("alertas-list", args=[c["taller_id"]]), {"summary": "1"}),
+    "localizador-repuestos": lambda c: Peticion("get", reverse("localizador-repuestos"),
+                                                {"numero_pieza": c["numero_pieza"], "taller_id": c["taller_id"],
+                                                 "limit": 10}),
+    "localizador-repuestos-batch": lambda c: Peticion("post", reverse("localizador-repuestos-batch"),
+                                                      {"taller_id": c["taller_id"], "numeros_pieza": c["numeros_pieza"]},
+                                                      json=True),
+    # catálogo
+    "marcas": lambda c: Peticion("get", reverse("marcas")),
+    "categorias-list": lambda c: Peticion("get", reverse("categorias-list")),
+    "repuestos": lambda c: Peticion("get", reverse("repuestos"), {"page": 2, "page_size": 50}),
+    "repuestos:busqueda": lambda c: Peticion("get", reverse("repuestos"), {"search_text": "filtro", "page_size": 50}),
+    # usuarios
+    "login": lambda c: Peticion("post", reverse("login"),
+                                {"email": datos_sinteticos.EMAIL, "password": datos_sinteticos.CONTRASENA}, json=True),
+    "logout": lambda c: Peticion("get", reverse("logout")),
+    "api-root": lambda c: Peticion("get", reverse("api-root")),
+    "taller-list": lambda c: Peticion("get", reverse("taller-list")),
+    "taller-detail": lambda c: Peticion("get", reverse("taller-detail", args=[c["taller_id"]])),
+    "usuario-list": lambda c: Peticion("get", reverse("usuario-list")),
+    "usuario-detail": lambda c: Peticion("get", reverse("usuario-detail", args=[c["usuario_id"]])),
+    "grupo-list": lambda c: Peticion("get", reverse("grupo-list")),
+    "grupo-detail": lambda c: Peticion("get", reverse("grupo-detail", args=[c["grupo_id"]])),
+    "grupo-taller-list": lambda c: Peticion("get", reverse("grupo-taller-list")),
+    "grupo-taller-detail": lambda c: Peticion("get", reverse("grupo-taller-detail", args=[c["grupo_taller_id"]])),
+}
+
+
+def _nombres(patrones) -> set:
+    nombres = set()
+    for patron in patrones:
+        if isinstance(patron, URLResolver):
+            nombres |= _nombres(patron.url_patterns)
+        elif isinstance(patron, URLPattern) and patron.name:
+            nombres.add(patron.name)
+    return nombres
+
+
+def rutas_api() -> set:
+    """Nombres de todas las rutas de MODULOS_URLS (incluye las del router de usuarios)."""
+    from importlib import import_module
+
+    nombres = set()
+    for modulo in MODULOS_URLS:
+        nombres |= _nombres(import_module(modulo).urlpatterns)
+    return nombres
+
+
+def _llamar(cliente: Client, peticion: Peticion, con_cache: bool):
+    if not con_cache:
+        cache.clear()
+    # Las vistas de usuarios imprimen trazas de debug: no se mezclan con la salida del comando
+    with redirect_stdout(io.StringIO()):
+        if peticion.metodo == "get":
+            response = cliente.get(peticion.ruta, peticion.datos)
+        elif peticion.json:
+            response = cliente.post(peticion.ruta, json.dumps(peticion.datos), content_type="application/json")
+        else:
+            response = cliente.post(peticion.ruta, peticion.datos)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+    return response
+
+
+def _medir_escenario(cliente: Client, armar: Callable, contexto: Dict[str, Any], repeticiones: int,
+                     con_cache: bool) -> Dict[str, Any]:
+    # Una llamada de calentamiento: imports perezosos (pandas, openpyxl) y caches de Django
+    _llamar(cliente, armar(contexto), con_cache)
+
+    tiempos, queries, estado = [], 0, None
+    for _ in range(repeticiones):
+        peticion = armar(contexto)
+        contador = ContadorSQL()
+        with connection.execute_wrapper(contador):
+            inicio = time.perf_counter()
+            response = _llamar(cliente, peticion, con_cache)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        queries = max(queries, contador.queries)
+        estado = response.status_code
+
+    peticion = armar(contexto)
+    tracemalloc.start()
+    try:
+        _llamar(cliente, peticion, con_cache)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    tiempos.sort()
+    return {
+        "status": estado,
+        "queries": queries,
+        "p50_ms": statistics.median(tiempos),
+        "p95_ms": tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+        "memoria_kb": pico / 1024,
+    }
+
+
+def medir_api(talleres: int = 3, repuestos: int = 2000, depositos: int = 2, movimientos: int = 100_000,
+              repeticiones: int = 10, con_cache: bool = False, filtro: Optional[str] = None) -> Dict[str, Any]:
+    resultado: Dict[str, Any] = {
+        "talleres": talleres, "repuestos": repuestos, "depositos": depositos, "movimientos": movimientos,
+        "repeticiones": repeticiones, "con_cache": con_cache,
+    }
+    rutas = rutas_api()
+    cubiertas = {clave.split(":")[0] for clave in ESCENARIOS} | set(OMITIDAS)
+    resultado["sin_escenario"] = sorted(rutas - cubiertas)
+    resultado["omitidas"] = {nombre: OMITIDAS[nombre] for nombre in sorted(rutas & set(OMITIDAS))}
+
+    with transaction.atomic(), override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        inicio = time.perf_counter()
+        contexto = datos_sinteticos.sembrar(talleres, repuestos, depositos, movimientos)
+        resultado["siembra_s"] = time.perf_counter() - inicio
+        # Mitad de números existentes y mitad nuevos: las importaciones crean y actualizan
+        contexto["numeros_importacion"] = contexto["numeros_pieza"][:25] + [f"IMP-{i:05d}" for i in range(25)]
+
+        cliente = Client()
+        escenarios = {}
+        for clave, armar in ESCENARIOS.items():
+            if filtro and filtro not in clave:
+                continue
+            escenarios[clave] = _medir_escenario(cliente, armar, contexto, repeticiones, con_cache)
+        resultado["escenarios"] = escenarios
+        transaction.set_rollback(True)
+
+    resultado["rss_max_mb"] = rss_max_mb()
+    return resultado
+
+
+def cargar_umbrales(ruta: str = UMBRALES_API) -> Dict[str, Dict[str, float]]:
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def umbrales_desde(resultado: Dict[str, Any], margen_latencia: float = 3.0,
+                   margen_memoria: float = 2.0) -> Dict[str, Dict[str, float]]:
+    """Umbrales a partir de una corrida: queries exactas, latencia y memoria con margen."""
+    return {
+        clave: {
+            "queries": m["queries"],
+            "p95_ms": round(max(m["p95_ms"] * margen_latencia, 50.0)),
+            "memoria_kb": round(max(m["memoria_kb"] * margen_memoria, 1024.0)),
+        }
+        for clave, m in sorted(resultado["escenarios"].items())
+    }
+
+
+def regresiones(resultado: Dict[str, Any], umbrales: Dict[str, Dict[str, float]]) -> List[str]:
+    """Mensajes por cada escenario que supera su umbral, falla o no tiene escenario."""
+    mensajes = [f"{nombre}: ruta sin escenario ni motivo de omisión" for nombre in resultado["sin_escenario"]]
+    for clave, m in resultado["escenarios"].items():
+        if m["status"] >= 400:
+            mensajes.append(f"{clave}: status {m['status']}")
+        umbral = umbrales.get(clave)
+        if umbral is None:
+            mensajes.append(f"{clave}: sin umbral")
+            continue
+        for metrica in ("queries", "p95_ms", "memoria_kb"):
+            if m[metrica] > umbral[metrica]:
+                mensajes.append(f"{clave}: {metrica} {m[metrica]:.0f} > {umbral[metrica]:.0f}")
+    return mensajes
@@ -0,0 +1,70 @@
+"""
+Benchmark de arranque del proceso web: ``django.setup()`` más la carga de las URLs
+(que importa todas las vistas), medido en un intérprete nuevo para no arrastrar
+módulos ya importados por el proceso que lo lanza.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from django.conf import settings
+
+# Dependencias que solo necesitan el forecast y las importaciones de Excel
+MODULOS_PESADOS = ("pandas", "numpy", "lightgbm", "sklearn", "scipy", "joblib", "holidays", "openpyxl")
+
+_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+t1 = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+for modulo in {extra!r}:
+    __import__(modulo)
+t2 = time.perf_counter()
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+except ImportError:
+    rss_mb = None
+print(json.dumps({{
+    "setup_s": t1 - t0,
+    "urls_s": t2 - t1,
+    "total_s": t2 - t0,
+    "rss_mb": rss_mb,
+    "modulos_pesados": [m for m in {pesados!r} if m in sys.modules],
+}}))
+"""
+
+
+def medir_arranque_una_vez(importar: tuple = ()) -> Dict[str, Any]:
+    """Lanza un intérprete nuevo; ``importar`` agrega módulos a cargar después de las URLs."""
+    script = _SCRIPT.format(extra=tuple(importar), pesados=MODULOS_PESADOS)
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE)}
+    salida = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def medir_arranque(repeticiones: int = 5, importar: tuple = ()) -> Dict[str, Any]:
+    """Mediana de ``repeticiones`` arranques."""
+    corridas: List[Dict[str, Any]] = [medir_arranque_una_vez(importar) for _ in range(repeticiones)]
+    resultado = {
+        clave: statistics.median(c[clave] for c in corridas)
+        for clave in ("setup_s", "urls_s", "total_s")
+    }
+    rss = [c["rss_mb"] for c in corridas if c["rss_mb"] is not None]
+    resultado["rss_mb"] = statistics.median(rss) if rss else None
+    resultado["modulos_pesados"] = corridas[-1]["modulos_pesados"]
+    resultado["repeticiones"] = repeticiones
+    return resultado
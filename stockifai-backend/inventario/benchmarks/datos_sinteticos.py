@@ -0,0 +1,132 @@
+"""
+Dataset sintético para los benchmarks: talleres con coordenadas y grupo, catálogo con
+marcas y categorías (indexado para la búsqueda), RepuestoTaller con predicciones,
+stock por depósito y movimientos repartidos en las últimas semanas.
+
+Todo se crea con bulk_create en lotes; los movimientos se generan de a
+``LOTE_MOVIMIENTOS`` para que millones de filas no vivan en memoria a la vez. Con la
+misma ``semilla`` se obtienen los mismos datos. No abre transacciones: quien lo llama
+decide si revierte.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from catalogo.models import Categoria, Marca, Repuesto, RepuestoTaller
+from inventario.models import Deposito, Movimiento, StockPorDeposito
+from inventario.services.busqueda import indexar_repuestos
+from user.models import Grupo, GrupoTaller, Taller, User
+from user.services.alcance_grupos import reconstruir_alcance_grupos
+
+PREFIJO = "SINT-"
+EMAIL = "benchmark@stockifai.local"
+CONTRASENA = "benchmark"
+LOTE = 5000
+LOTE_MOVIMIENTOS = 20000
+_TIPOS = ("Filtro de aceite", "Pastilla de freno", "Amortiguador", "Bujía", "Correa de distribución",
+          "Disco de freno", "Bomba de agua", "Rótula", "Embrague", "Radiador")
+
+
+def sembrar(talleres: int = 3, repuestos: int = 2000, depositos: int = 2, movimientos: int = 100_000,
+            semanas: int = 104, semilla: int = 42) -> Dict[str, Any]:
+    """
+    Crea el dataset y devuelve ids útiles para armar requests (primer taller, sus
+    depósitos, un RepuestoTaller, números de pieza, usuario, grupo).
+    """
+    rnd = random.Random(semilla)
+
+    grupo = Grupo.objects.create(nombre="Grupo sintético", descripcion="Benchmark")
+    Taller.objects.bulk_create([
+        # Alrededor de Buenos Aires, para que el localizador encuentre vecinos
+        Taller(nombre=f"Taller sintético {t}", direccion=f"Calle {t}", telefono=f"11{t:08d}",
+               latitud=Decimal(f"{-34.6 + rnd.uniform(-0.3, 0.3):.6f}"),
+               longitud=Decimal(f"{-58.4 + rnd.uniform(-0.3, 0.3):.6f}"))
+        for t in range(talleres)
+    ])
+    lista_talleres = list(Taller.objects.filter(nombre__startswith="Taller sintético").order_by("id"))
+    GrupoTaller.objects.bulk_create([GrupoTaller(id_grupo=grupo, id_taller=t) for t in lista_talleres])
+    # La señal de Grupo reconstruye en on_commit: acá puede no haber commit
+    reconstruir_alcance_grupos()
+
+    # login_view autentica con el email como username
+    usuario = User.objects.create(username=EMAIL, email=EMAIL,
+                                  password=make_password(CONTRASENA), taller=lista_talleres[0], grupo=grupo)
+
+    # Catálogo
+    Marca.objects.bulk_create([Marca(nombre=f"Marca sintética {i}") for i in range(20)])
+    Categoria.objects.bulk_create([Categoria(nombre=f"Categoría sintética {i}", descripcion=_TIPOS[i % len(_TIPOS)])
+                                   for i in range(20)])
+    marcas = list(Marca.objects.filter(nombre__startswith="Marca sintética").values_list("id", flat=True))
+    categorias = list(Categoria.objects.filter(nombre__startswith="Categoría sintética").values_list("id", flat=True))
+    Repuesto.objects.bulk_create([
+        Repuesto(numero_pieza=f"{PREFIJO}{i:07d}", descripcion=f"{_TIPOS[i % len(_TIPOS)]} {i}", estado="ACTIVO",
+                 marca_id=marcas[i % len(marcas)], categoria_id=categorias[i % len(categorias)])
+        for i in range(repuestos)
+    ], batch_size=LOTE)
+    filas = list(Repuesto.objects.filter(numero_pieza__startswith=PREFIJO).order_by("id")
+                 .values_list("id", "numero_pieza", "descripcion"))
+    indexar_repuestos(filas)
+    repuesto_ids = [rid for rid, _, _ in filas]
+
+    # Repuestos por taller y stock
+    RepuestoTaller.objects.bulk_create([
+        RepuestoTaller(repuesto_id=rid, taller=t, precio=Decimal(rnd.randint(1000, 90000)) / 100,
+                       costo=Decimal(rnd.randint(500, 60000)) / 100, original=rnd.random() < 0.8,
+                       pred_1=rnd.randint(0, 9), pred_2=rnd.randint(0, 9), pred_3=rnd.randint(0, 9),
+                       pred_4=rnd.randint(0, 9))
+        for t in lista_talleres for rid in repuesto_ids
+    ], batch_size=LOTE)
+    Deposito.objects.bulk_create([Deposito(taller=t, nombre=f"Depósito {d}")
+                                  for t in lista_talleres for d in range(depositos)])
+    rts = list(RepuestoTaller.objects.filter(taller__in=lista_talleres).order_by("id_repuesto_taller")
+               .values_list("id_repuesto_taller", "taller_id"))
+    depositos_por_taller: Dict[int, list] = {}
+    filas_depositos = Deposito.objects.filter(taller__in=lista_talleres).order_by("id").values_list("id", "taller_id")
+    for dep_id, taller_id in filas_depositos:
+        depositos_por_taller.setdefault(taller_id, []).append(dep_id)
+    StockPorDeposito.objects.bulk_create([
+        StockPorDeposito(repuesto_taller_id=rt_id, deposito_id=dep_id, cantidad=rnd.randint(0, 40))
+        for rt_id, taller_id in rts for dep_id in depositos_por_taller[taller_id]
+    ], batch_size=LOTE)
+    spd_ids = list(StockPorDeposito.objects.filter(deposito__taller__in=lista_talleres)
+                   .order_by("id").values_list("id", flat=True))
+
+    # Movimientos: egresos con algún ingreso de reposición, en las últimas ``semanas``
+    ahora = timezone.now()
+    segundos = semanas * 7 * 24 * 3600
+    for inicio in range(0, movimientos, LOTE_MOVIMIENTOS):
+        lote = []
+        for _ in range(min(LOTE_MOVIMIENTOS, movimientos - inicio)):
+            ingreso = rnd.random() < 0.3
+            lote.append(Movimiento(
+                stock_por_deposito_id=rnd.choice(spd_ids),
+                tipo="INGRESO" if ingreso else "EGRESO",
+                cantidad=rnd.randint(1, 12) if ingreso else rnd.randint(1, 4),
+                fecha=ahora - timedelta(seconds=rnd.randrange(segundos)),
+                documento=f"DOC-{rnd.randrange(10 ** 6):06d}",
+            ))
+        Movimiento.objects.bulk_create(lote, batch_size=LOTE)
+
+    taller = lista_talleres[0]
+    rt = RepuestoTaller.objects.filter(taller=taller).order_by("id_repuesto_taller").values(
+        "id_repuesto_taller", "repuesto__numero_pieza").first()
+    return {
+        "taller_id": taller.id,
+        "talleres": [t.id for t in lista_talleres],
+        "deposito_id": depositos_por_taller[taller.id][0],
+        "repuesto_taller_id": rt["id_repuesto_taller"],
+        "numero_pieza": rt["repuesto__numero_pieza"],
+        "numeros_pieza": [numero for _, numero, _ in filas[:50]],
+        "usuario_id": usuario.id,
+        "grupo_id": grupo.id_grupo,
+        "grupo_taller_id": GrupoTaller.objects.filter(id_grupo=grupo).values_list("id_grupo_taller", flat=True).first(),
+        "repuestos": repuestos,
+        "movimientos": movimientos,
+    }
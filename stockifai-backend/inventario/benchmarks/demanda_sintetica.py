@@ -0,0 +1,152 @@
+"""
+Demanda sintética para medir el pipeline de forecast.
+
+``generar_demanda`` arma, sin tocar la base, la venta semanal de ``skus`` repuestos
+durante ``semanas`` semanas hasta el lunes ``hasta``:
+  - frecuencia alta: Poisson con estacionalidad anual (seno con fase propia por SKU)
+    y una tendencia leve;
+  - intermitente: ventas esporádicas (Bernoulli con probabilidad baja) de tamaño
+    1 + Poisson, como las que clasifica el preproceso con intermitencia >= 0.75;
+  - discontinuados: se dejaron de vender hace más de un año (OBSOLETO / MUERTO).
+En las semanas con feriados nacionales (``holidays.AR``) la demanda se multiplica
+por FACTOR_FERIADO. Con la misma semilla se obtiene exactamente la misma demanda.
+
+``sembrar_taller`` la escribe como egresos (``Movimiento``) de un taller nuevo con un
+depósito, y ``sembrar_indicadores`` carga indicadores externos mensuales si las tablas
+están vacías (el preproceso los necesita para las features).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Tuple
+
+import holidays
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+
+from catalogo.models import Repuesto, RepuestoTaller
+from d_externo.repositories.dataexterna import SERIES_EXTERNAS
+from inventario.models import Deposito, Movimiento, StockPorDeposito
+from user.models import Taller
+
+PROPORCIONES = {"frecuencia_alta": 0.4, "intermitente": 0.5, "discontinuado": 0.1}
+FACTOR_FERIADO = 0.6
+LOTE = 20000
+
+# (valor inicial, variación mensual relativa, decimales) por indicador
+_INDICADORES: Dict[str, Tuple[float, float, int]] = {
+    "inflacion": (100.0, 0.03, 4),
+    "patentamientos": (35000.0, 0.0, 0),
+    "ipsa": (5000.0, 0.01, 6),
+    "prenda": (20000.0, 0.0, 0),
+    "tasa_de_interes": (60.0, 0.0, 6),
+    "tipo_de_cambio": (100.0, 0.03, 2),
+}
+
+
+def _semanas_feriado(lunes: pd.DatetimeIndex) -> np.ndarray:
+    feriados = holidays.AR(years=range(lunes.min().year, lunes.max().year + 1))
+    semanas = {pd.Timestamp(f).to_period("W").start_time for f in feriados}
+    return lunes.isin(list(semanas))
+
+
+def generar_demanda(skus: int, semanas: int = 156, hasta: date | None = None, semilla: int = 42,
+                    proporciones: Dict[str, float] | None = None) -> pd.DataFrame:
+    """
+    Devuelve las semanas con venta: columnas ``sku`` (índice 0..skus-1), ``tipo``,
+    ``lunes`` y ``cantidad`` (> 0).
+    """
+    rnd = np.random.default_rng(semilla)
+    proporciones = proporciones or PROPORCIONES
+    hasta = hasta or timezone.localdate()
+    ultimo_lunes = pd.Timestamp(hasta - timedelta(days=hasta.weekday()))
+    lunes = pd.date_range(end=ultimo_lunes, periods=semanas, freq="W-MON")
+
+    tipos = np.array(list(proporciones))
+    tipo_sku = rnd.choice(tipos, size=skus, p=np.array(list(proporciones.values())) / sum(proporciones.values()))
+
+    t = np.arange(semanas)
+    fase = rnd.uniform(0, 2 * np.pi, size=(skus, 1))
+    amplitud = rnd.uniform(0.1, 0.5, size=(skus, 1))
+    estacionalidad = 1 + amplitud * np.sin(2 * np.pi * t / 52 + fase)
+    tendencia = 1 + rnd.normal(0, 0.002, size=(skus, 1)) * t
+    feriado = np.where(_semanas_feriado(lunes), FACTOR_FERIADO, 1.0)
+    factor = np.clip(estacionalidad * tendencia, 0.05, None) * feriado
+
+    base = rnd.lognormal(mean=1.0, sigma=0.7, size=(skus, 1))
+    continua = rnd.poisson(base * factor)
+
+    probabilidad = rnd.uniform(0.03, 0.2, size=(skus, 1))
+    ocurre = rnd.random((skus, semanas)) < probabilidad * factor
+    esporadica = ocurre * (1 + rnd.poisson(rnd.uniform(0.5, 3, size=(skus, 1)), size=(skus, semanas)))
+
+    intermitente = (tipo_sku == "intermitente")[:, None]
+    cantidades = np.where(intermitente, esporadica, continua)
+    # Discontinuados: demanda continua que se corta entre 60 y 100 semanas atrás
+    corte = semanas - rnd.integers(60, 100, size=skus)
+    discontinuado = (tipo_sku == "discontinuado")[:, None]
+    cantidades = np.where(discontinuado & (t[None, :] >= corte[:, None]), 0, cantidades)
+
+    filas, columnas = np.nonzero(cantidades)
+    return pd.DataFrame({
+        "sku": filas,
+        "tipo": tipo_sku[filas],
+        "lunes": lunes[columnas],
+        "cantidad": cantidades[filas, columnas].astype(int),
+    })
+
+
+def sembrar_taller(demanda: pd.DataFrame, skus: int, prefijo: str, semilla: int = 42) -> int:
+    """Crea taller, repuestos, depósito, stock y un egreso por semana con venta. Devuelve el taller_id."""
+    rnd = np.random.default_rng(semilla)
+    taller = Taller.objects.create(nombre=f"Taller forecast {prefijo}")
+    deposito = Deposito.objects.create(taller=taller, nombre="Central")
+
+    numeros = [f"{prefijo}-{i:06d}" for i in range(skus)]
+    Repuesto.objects.bulk_create([Repuesto(numero_pieza=n, descripcion=f"Repuesto {n}", estado="ACTIVO")
+                                  for n in numeros], batch_size=LOTE)
+    repuesto_ids = dict(Repuesto.objects.filter(numero_pieza__in=numeros).values_list("numero_pieza", "id"))
+    RepuestoTaller.objects.bulk_create([RepuestoTaller(repuesto_id=repuesto_ids[n], taller=taller)
+                                        for n in numeros], batch_size=LOTE)
+    rt_por_repuesto = dict(RepuestoTaller.objects.filter(taller=taller).values_list("repuesto_id", "id_repuesto_taller"))
+    StockPorDeposito.objects.bulk_create([
+        StockPorDeposito(repuesto_taller_id=rt_por_repuesto[repuesto_ids[n]], deposito=deposito, cantidad=10)
+        for n in numeros
+    ], batch_size=LOTE)
+    spd_por_rt = dict(StockPorDeposito.objects.filter(deposito=deposito).values_list("repuesto_taller_id", "id"))
+    spd_por_sku = np.array([spd_por_rt[rt_por_repuesto[repuesto_ids[n]]] for n in numeros])
+
+    # Cada venta semanal cae en un día hábil al azar de esa semana
+    zona = timezone.get_current_timezone()
+    dias = rnd.integers(0, 6, size=len(demanda))
+    spd_ids = spd_por_sku[demanda["sku"].to_numpy()]
+    for inicio in range(0, len(demanda), LOTE):
+        fin = inicio + LOTE
+        Movimiento.objects.bulk_create([
+            Movimiento(stock_por_deposito_id=int(spd), tipo="EGRESO", cantidad=int(cantidad),
+                       fecha=timezone.make_aware(datetime.combine(lunes.date() + timedelta(days=int(dia)), time(10)), zona))
+            for spd, cantidad, lunes, dia in zip(spd_ids[inicio:fin], demanda["cantidad"].iloc[inicio:fin],
+                                                 demanda["lunes"].iloc[inicio:fin], dias[inicio:fin])
+        ], batch_size=LOTE)
+    return taller.id
+
+
+def sembrar_indicadores(desde: date, hasta: date, semilla: int = 42) -> int:
+    """Indicadores mensuales (random walk) para las tablas vacías. Devuelve las filas creadas."""
+    rnd = np.random.default_rng(semilla)
+    meses = pd.date_range(start=desde.replace(day=1), end=hasta, freq="MS")
+    creadas = 0
+    for nombre, modelo, campo, _tipo in SERIES_EXTERNAS:
+        if modelo.objects.exists():
+            continue
+        inicial, deriva, decimales = _INDICADORES[nombre]
+        valores = inicial * np.cumprod(1 + deriva + rnd.normal(0, 0.02, size=len(meses)))
+        modelo.objects.bulk_create([
+            modelo(fecha=mes.date(), **{campo: Decimal(f"{valor:.{decimales}f}") if decimales else int(valor)})
+            for mes, valor in zip(meses, valores)
+        ])
+        creadas += len(meses)
+    return creadas
@@ -0,0 +1,114 @@
+"""
+Benchmark de punta a punta de ``ejecutar_forecast_pipeline_por_taller`` con demanda
+sintética (ver ``demanda_sintetica.py``), para 1k/10k/50k SKUs por defecto.
+
+Por escala se siembra un taller nuevo y se corre el pipeline completo (modo por
+taller, ``forzar=True``) dentro de una ``corrida`` sin persistir; de su resumen se
+toman preproceso, entrenamiento e inferencia, más el guardado en la base (suma de las
+etapas ``guardar_*``; los tiempos de las etapas son inclusivos, el guardado también
+cuenta dentro de la etapa que lo contiene). Con ``determinismo`` el pipeline se corre
+dos veces desde cero y se comparan las predicciones y la clasificación de rotación
+guardadas.
+
+Todo corre en una transacción que se revierte. Los modelos de los talleres sintéticos
+se escriben en FORECAST_MODELOS_DIR y se borran al terminar cada escala.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Tuple
+
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from AI.services.instrumentacion import corrida
+from catalogo.models import RepuestoTaller
+from inventario.benchmarks.demanda_sintetica import generar_demanda, sembrar_indicadores, sembrar_taller
+from stockifai.metricas import rss_max_mb
+
+ESCALAS = (1000, 10000, 50000)
+ETAPAS = ("preproceso", "entrenamiento", "inferencia")
+
+
+def _borrar_modelos(taller_id: int) -> None:
+    from AI.services.artefactos import RUTA_BASE_MODELOS
+
+    shutil.rmtree(os.path.join(RUTA_BASE_MODELOS, str(taller_id)), ignore_errors=True)
+
+
+def _salidas(taller_id: int) -> Dict[str, Tuple]:
+    """Predicciones y clasificación de rotación guardadas, por número de pieza."""
+    return {
+        fila[0]: fila[1:]
+        for fila in RepuestoTaller.objects.filter(taller_id=taller_id).values_list(
+            "repuesto__numero_pieza", "pred_1", "pred_2", "pred_3", "pred_4", "frecuencia")
+    }
+
+
+def _correr(taller_id: int, fecha_lunes: datetime) -> Dict[str, Any]:
+    from AI.services.forecast_pipeline import ejecutar_forecast_pipeline_por_taller
+
+    # El pipeline imprime una línea por SKU y semana: no se mezcla con la salida del comando
+    with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+        with corrida("benchmark_forecast", persistir=False) as actual:
+            ejecutar_forecast_pipeline_por_taller(taller_id, fecha_lunes, forzar=True)
+
+    resumen = {f["etapa"]: f for f in actual.resumen()}
+    medicion = {nombre: resumen.get(nombre, {}).get("duracion_s", 0.0) for nombre in ETAPAS}
+    medicion["guardado"] = sum(f["duracion_s"] for nombre, f in resumen.items() if nombre.startswith("guardar_"))
+    medicion["total_s"] = actual.duracion_s
+    medicion["queries"] = actual.queries
+    medicion["errores"] = sum(f["errores"] for f in resumen.values())
+    medicion["perfil"] = actual.tabla()
+    return medicion
+
+
+def medir_forecast(escalas: Iterable[int] = ESCALAS, semanas: int = 156, semilla: int = 42,
+                   determinismo: bool = True) -> Dict[str, Any]:
+    hoy = timezone.localdate()
+    # El forecast arranca el lunes siguiente a la última semana con datos
+    fecha_lunes = datetime.combine(hoy + timedelta(days=7 - hoy.weekday()), datetime.min.time())
+    resultado: Dict[str, Any] = {"semanas": semanas, "semilla": semilla, "fecha_lunes": fecha_lunes.date().isoformat(),
+                                 "escalas": []}
+
+    with override_settings(FORECAST_MODO_ENTRENAMIENTO="por_taller"), transaction.atomic():
+        # Los indicadores con lags anuales necesitan tres años antes de la primera semana
+        sembrar_indicadores(hoy - timedelta(weeks=semanas + 160), hoy, semilla)
+
+        for skus in escalas:
+            escala: Dict[str, Any] = {"skus": skus}
+            inicio = time.perf_counter()
+            demanda = generar_demanda(skus, semanas, hoy, semilla)
+            taller_id = sembrar_taller(demanda, skus, prefijo=f"DEM{skus}", semilla=semilla)
+            escala["movimientos"] = len(demanda)
+            escala["segmentos_generados"] = demanda.drop_duplicates("sku")["tipo"].value_counts().to_dict()
+            escala["siembra_s"] = time.perf_counter() - inicio
+
+            _borrar_modelos(taller_id)
+            try:
+                escala.update(_correr(taller_id, fecha_lunes))
+                salidas = _salidas(taller_id)
+                escala["con_prediccion"] = sum(1 for s in salidas.values() if s[0] is not None)
+                if determinismo:
+                    _borrar_modelos(taller_id)
+                    RepuestoTaller.objects.filter(taller_id=taller_id).update(
+                        pred_1=None, pred_2=None, pred_3=None, pred_4=None, frecuencia=None)
+                    segunda = _correr(taller_id, fecha_lunes)
+                    otras = _salidas(taller_id)
+                    escala["diferencias"] = sum(1 for sku, s in salidas.items() if otras.get(sku) != s)
+                    escala["deterministico"] = escala["diferencias"] == 0
+                    escala["total_s_segunda"] = segunda["total_s"]
+            finally:
+                _borrar_modelos(taller_id)
+            escala["rss_max_mb"] = rss_max_mb()
+            resultado["escalas"].append(escala)
+
+        transaction.set_rollback(True)
+
+    return resultado
@@ -0,0 +1,77 @@
+"""
+Benchmark de ``importar_stock`` sobre ``Import-StockInicial_DepositoCentral.xlsx``
+escalado: cada fila se replica ``escala`` veces con números de pieza distintos y las
+filas se reparten entre ``depositos`` depósitos (para ejercitar talleres con varios).
+
+Se mide la importación inicial (crea repuestos, RepuestoTaller y stock), una
+reimportación sin cambios y una importación en modo "sum" que actualiza todo el
+stock. Corre dentro de una transacción que se revierte: no deja datos en la base.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from inventario.services.import_stock import importar_stock
+from stockifai.metricas import ContadorSQL, rss_max_mb
+from user.models import Taller
+
+ARCHIVO_BASE = os.path.join(settings.BASE_DIR, "Import-StockInicial_DepositoCentral.xlsx")
+
+
+def generar_archivo(escala: int = 100, depositos: int = 1, archivo_base: str = ARCHIVO_BASE) -> str:
+    """Escribe el archivo escalado como CSV temporal y devuelve su ruta."""
+    base = pd.read_excel(archivo_base)
+    partes = []
+    for k in range(escala):
+        parte = base.copy()
+        parte["numero_pieza"] = parte["numero_pieza"].astype(str) + (f"-{k}" if k else "")
+        partes.append(parte)
+    df = pd.concat(partes, ignore_index=True)
+    if depositos > 1:
+        df["Deposito"] = [f"DEP{i % depositos}" for i in range(len(df))]
+
+    with tempfile.NamedTemporaryFile("w", prefix="bench-stock-", suffix=".csv", delete=False,
+                                     encoding="utf-8", newline="") as f:
+        df.to_csv(f, index=False)
+    return f.name
+
+
+def _medir(ruta: str, taller_id: int, mode: str) -> Dict[str, Any]:
+    contador = ContadorSQL()
+    with open(ruta, "rb") as f, connection.execute_wrapper(contador):
+        inicio = time.perf_counter()
+        resultado = importar_stock(file=f, taller_id=taller_id, mode=mode, permitir_stock_negativo=True)
+        duracion = time.perf_counter() - inicio
+    return {
+        "duracion_s": duracion,
+        "queries": contador.queries,
+        "tiempo_sql_s": contador.tiempo_s,
+        "procesados": resultado["procesados"],
+        "rechazados": resultado["rechazados"],
+    }
+
+
+def medir_import_stock(escala: int = 100, depositos: int = 1,
+                       archivo_base: str = ARCHIVO_BASE) -> Dict[str, Any]:
+    ruta = generar_archivo(escala, depositos, archivo_base)
+    try:
+        filas = sum(1 for _ in open(ruta, encoding="utf-8")) - 1
+        etapas: Dict[str, Optional[Dict[str, Any]]] = {}
+        with transaction.atomic():
+            taller = Taller.objects.create(nombre="Benchmark importación de stock")
+            etapas["inicial"] = _medir(ruta, taller.id, "set")
+            etapas["sin_cambios"] = _medir(ruta, taller.id, "set")
+            etapas["suma"] = _medir(ruta, taller.id, "sum")
+            transaction.set_rollback(True)
+    finally:
+        os.remove(ruta)
+
+    return {"escala": escala, "depositos": depositos, "filas": filas, "etapas": etapas, "rss_max_mb": rss_max_mb()}
@@ -0,0 +1,107 @@
+"""
+Benchmark de los listados de stock y forecasting con page_size grande.
+
+Genera un taller sintético (repuestos con marca/categoría y stock en dos depósitos),
+llama a las vistas con ``APIRequestFactory`` (incluye el render a JSON) y compara la
+serialización de una página con ``RepuestoTallerSerializer`` contra las filas planas
+de ``.values()``. Todo corre dentro de una transacción que se revierte.
+"""
+
+from __future__ import annotations
+
+import statistics
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory
+
+from catalogo.models import Categoria, Marca, Repuesto, RepuestoTaller
+from inventario.api.serializers import CAMPOS_REPUESTO_TALLER, RepuestoTallerSerializer, repuesto_taller_dict
+from inventario.api.views import ConsultarForecastingListView, ConsultarStockView
+from inventario.models import Deposito, StockPorDeposito
+from stockifai.metricas import ContadorSQL
+from user.models import Taller
+
+
+def _sembrar(repuestos: int) -> Taller:
+    taller = Taller.objects.create(nombre="Benchmark listados")
+    # bulk_create no devuelve ids en MySQL: se releen
+    Marca.objects.bulk_create([Marca(nombre=f"Bench marca {i}") for i in range(10)])
+    Categoria.objects.bulk_create([Categoria(nombre=f"Bench categoría {i}") for i in range(10)])
+    marcas = list(Marca.objects.filter(nombre__startswith="Bench marca"))
+    categorias = list(Categoria.objects.filter(nombre__startswith="Bench categoría"))
+    Repuesto.objects.bulk_create([
+        Repuesto(numero_pieza=f"BENCH-{i:07d}", descripcion=f"Repuesto de prueba {i}", estado="ACTIVO",
+                 marca=marcas[i % len(marcas)], categoria=categorias[i % len(categorias)])
+        for i in range(repuestos)
+    ], batch_size=2000)
+    RepuestoTaller.objects.bulk_create([
+        RepuestoTaller(repuesto_id=rid, taller=taller, precio=Decimal("100.00"), costo=Decimal("60.00"),
+                       pred_1=rid % 7, pred_2=rid % 5, pred_3=rid % 3, pred_4=1)
+        for rid in Repuesto.objects.filter(numero_pieza__startswith="BENCH-").values_list("id", flat=True)
+    ], batch_size=2000)
+    Deposito.objects.bulk_create([Deposito(taller=taller, nombre=n) for n in ("Central", "Norte")])
+    depositos = list(Deposito.objects.filter(taller=taller))
+    rt_ids = list(RepuestoTaller.objects.filter(taller=taller).values_list("id_repuesto_taller", flat=True))
+    StockPorDeposito.objects.bulk_create([
+        StockPorDeposito(repuesto_taller_id=rt_id, deposito=d, cantidad=rt_id % 11)
+        for rt_id in rt_ids for d in depositos
+    ], batch_size=2000)
+    return taller
+
+
+def _medir(funcion: Callable[[], Any], repeticiones: int) -> Dict[str, Any]:
+    tiempos = []
+    contador = ContadorSQL()
+    for _ in range(repeticiones):
+        contador.queries = 0
+        with connection.execute_wrapper(contador):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return {
+        "p50_ms": statistics.median(tiempos),
+        "p95_ms": tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+        "queries": contador.queries,
+    }
+
+
+def medir_listados(repuestos: int = 2000, page_size: int = 500, repeticiones: int = 20) -> Dict[str, Any]:
+    factory = APIRequestFactory()
+    resultado: Dict[str, Any] = {"repuestos": repuestos, "page_size": page_size, "repeticiones": repeticiones}
+
+    with transaction.atomic():
+        taller = _sembrar(repuestos)
+
+        def vista(clase, ruta):
+            def llamar():
+                # Sin cache de respuestas: se mide la vista (incluye la lectura de la versión de datos)
+                cache.clear()
+                request = factory.get(f"/api/talleres/{taller.id}/{ruta}", {"page_size": page_size})
+                response = clase.as_view()(request, taller_id=taller.id)
+                response.render()
+            return llamar
+
+        resultado["stock"] = _medir(vista(ConsultarStockView, "stock"), repeticiones)
+        resultado["forecasting"] = _medir(vista(ConsultarForecastingListView, "forecasting"), repeticiones)
+
+        # Solo la serialización de una página: serializer anidado vs filas planas
+        qs = RepuestoTaller.objects.filter(taller=taller).order_by("repuesto__numero_pieza")
+        resultado["serializer_drf"] = _medir(
+            lambda: RepuestoTallerSerializer(
+                qs.select_related("repuesto", "taller", "repuesto__marca", "repuesto__categoria")[:page_size],
+                many=True,
+            ).data,
+            repeticiones,
+        )
+        resultado["filas_planas"] = _medir(
+            lambda: [repuesto_taller_dict(f) for f in qs.values(*CAMPOS_REPUESTO_TALLER)[:page_size]],
+            repeticiones,
+        )
+        transaction.set_rollback(True)
+
+    return resultado
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.benchmarks.api import UMBRALES_API, cargar_umbrales, medir_api, regresiones, umbrales_desde
+
+
+class Command(BaseCommand):
+    help = ("Siembra un dataset sintético y mide todas las rutas de la API (queries, p50/p95, memoria). "
+            "Falla si alguna supera los umbrales guardados. Los datos se revierten.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--talleres", type=int, default=3)
+        parser.add_argument("--repuestos", type=int, default=2000)
+        parser.add_argument("--depositos", type=int, default=2, help="Depósitos por taller")
+        parser.add_argument("--movimientos", type=int, default=100_000)
+        parser.add_argument("--repeticiones", type=int, default=10)
+        parser.add_argument("--con-cache", action="store_true",
+                            help="No vacía el cache entre llamadas (mide el camino cacheado)")
+        parser.add_argument("--filtro", help="Solo los escenarios cuyo nombre contiene este texto")
+        parser.add_argument("--umbrales", default=UMBRALES_API, help="JSON de umbrales por escenario")
+        parser.add_argument("--guardar-umbrales", action="store_true",
+                            help="Escribe --umbrales a partir de esta corrida en lugar de comparar")
+        parser.add_argument("--json", action="store_true", help="Imprime el resultado completo en JSON")
+
+    def handle(self, *args, **options):
+        r = medir_api(options["talleres"], options["repuestos"], options["depositos"], options["movimientos"],
+                      options["repeticiones"], options["con_cache"], options["filtro"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(r, indent=2, ensure_ascii=False))
+        else:
+            self.stdout.write(
+                f"{r['talleres']} talleres, {r['repuestos']} repuestos, {r['movimientos']} movimientos "
+                f"(siembra {r['siembra_s']:.1f} s), {r['repeticiones']} repeticiones"
+                f"{', con cache' if r['con_cache'] else ''}"
+            )
+            self.stdout.write(f"{'Escenario':<30}{'Status':>7}{'Queries':>9}{'p50 (ms)':>10}{'p95 (ms)':>10}{'Mem (KB)':>10}")
+            for nombre, m in r["escenarios"].items():
+                self.stdout.write(f"{nombre:<30}{m['status']:>7}{m['queries']:>9}{m['p50_ms']:>10.1f}"
+                                  f"{m['p95_ms']:>10.1f}{m['memoria_kb']:>10.0f}")
+            for nombre, motivo in r["omitidas"].items():
+                self.stdout.write(f"Omitida {nombre}: {motivo}")
+            if r["rss_max_mb"] is not None:
+                self.stdout.write(f"RSS máximo: {r['rss_max_mb']:.1f} MB")
+
+        if options["guardar_umbrales"]:
+            with open(options["umbrales"], "w", encoding="utf-8") as f:
+                json.dump(umbrales_desde(r), f, indent=2, ensure_ascii=False)
+                f.write("\n")
+            self.stdout.write(self.style.SUCCESS(f"Umbrales guardados en {options['umbrales']}"))
+            return
+
+        problemas = regresiones(r, cargar_umbrales(options["umbrales"]))
+        if problemas:
+            raise CommandError("Regresiones:\n  " + "\n  ".join(problemas))
+        self.stdout.write(self.style.SUCCESS("Sin regresiones"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from inventario.benchmarks.arranque import medir_arranque
+
+
+class Command(BaseCommand):
+    help = ("Mide el arranque del proceso web (django.setup() + carga de URLs): tiempo, RSS "
+            "y qué dependencias pesadas quedan importadas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeticiones", type=int, default=5)
+        parser.add_argument("--con-forecast", action="store_true",
+                            help="Importa además el pipeline de forecast, para comparar con el arranque eager")
+
+    def handle(self, *args, **options):
+        importar = ("AI.services.forecast_pipeline",) if options["con_forecast"] else ()
+        r = medir_arranque(options["repeticiones"], importar)
+
+        self.stdout.write(f"django.setup(): {r['setup_s'] * 1000:.0f} ms")
+        self.stdout.write(f"Carga de URLs:  {r['urls_s'] * 1000:.0f} ms")
+        self.stdout.write(f"Total:          {r['total_s'] * 1000:.0f} ms (mediana de {r['repeticiones']})")
+        if r["rss_mb"] is not None:
+            self.stdout.write(f"RSS máximo:     {r['rss_mb']:.1f} MB")
+
+        if r["modulos_pesados"]:
+            self.stdout.write(self.style.WARNING(f"Módulos pesados cargados: {', '.join(r['modulos_pesados'])}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Sin módulos pesados en el arranque"))
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from inventario.benchmarks.forecast import ESCALAS, medir_forecast
+
+
+class Command(BaseCommand):
+    help = ("Siembra demanda sintética (frecuencia alta, intermitente, discontinuados, feriados) y mide "
+            "el pipeline de forecast por taller de punta a punta por escala de SKUs. Los datos se revierten.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--skus", type=int, nargs="+", default=list(ESCALAS),
+                            help="Escalas a medir (50000 SKUs tarda y usa varios GB de RAM)")
+        parser.add_argument("--semanas", type=int, default=156)
+        parser.add_argument("--semilla", type=int, default=42)
+        parser.add_argument("--sin-determinismo", action="store_true",
+                            help="No repite la corrida para comparar predicciones")
+        parser.add_argument("--perfil", action="store_true", help="Imprime el detalle por etapa de cada escala")
+        parser.add_argument("--json", action="store_true", help="Imprime el resultado completo en JSON")
+
+    def handle(self, *args, **options):
+        r = medir_forecast(options["skus"], options["semanas"], options["semilla"],
+                           determinismo=not options["sin_determinismo"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(r, indent=2, ensure_ascii=False, default=str))
+            return
+
+        self.stdout.write(f"{r['semanas']} semanas hasta {r['fecha_lunes']}, semilla {r['semilla']}")
+        self.stdout.write(f"{'SKUs':>7}{'Movs':>10}{'Siembra':>9}{'Preproc':>9}{'Entren.':>9}{'Infer.':>9}"
+                          f"{'Guardado':>10}{'Total':>9}{'Queries':>9}{'Con pred':>10}{'RSS (MB)':>10}{'Determ.':>9}")
+        for e in r["escalas"]:
+            rss = f"{e['rss_max_mb']:.0f}" if e["rss_max_mb"] is not None else "-"
+            determ = "-" if "deterministico" not in e else ("sí" if e["deterministico"] else f"no ({e['diferencias']})")
+            self.stdout.write(
+                f"{e['skus']:>7}{e['movimientos']:>10}{e['siembra_s']:>9.1f}{e['preproceso']:>9.1f}"
+                f"{e['entrenamiento']:>9.1f}{e['inferencia']:>9.1f}{e['guardado']:>10.1f}{e['total_s']:>9.1f}"
+                f"{e['queries']:>9}{e['con_prediccion']:>10}{rss:>10}{determ:>9}"
+            )
+            if e["errores"]:
+                self.stdout.write(self.style.WARNING(f"  {e['errores']} etapas con error en {e['skus']} SKUs"))
+            if options["perfil"]:
+                self.stdout.write(e["perfil"])
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from inventario.benchmarks.import_stock import medir_import_stock
+
+
+class Command(BaseCommand):
+    help = ("Mide importar_stock con Import-StockInicial_DepositoCentral.xlsx escalado: importación "
+            "inicial, reimportación sin cambios y suma. Los datos se revierten al terminar.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--escala", type=int, default=100, help="Veces que se replica el archivo base")
+        parser.add_argument("--depositos", type=int, default=1, help="Depósitos entre los que se reparten las filas")
+
+    def handle(self, *args, **options):
+        r = medir_import_stock(options["escala"], options["depositos"])
+
+        self.stdout.write(f"Filas: {r['filas']} (escala x{r['escala']}, {r['depositos']} depósito/s)")
+        self.stdout.write(f"{'Etapa':<14}{'Tiempo (s)':>12}{'Queries':>9}{'SQL (s)':>9}{'Procesados':>12}")
+        for nombre, m in r["etapas"].items():
+            self.stdout.write(
+                f"{nombre:<14}{m['duracion_s']:>12.2f}{m['queries']:>9}{m['tiempo_sql_s']:>9.2f}{m['procesados']:>12}"
+            )
+        if r["rss_max_mb"] is not None:
+            self.stdout.write(f"RSS máximo: {r['rss_max_mb']:.1f} MB")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from inventario.benchmarks.listados import medir_listados
+
+
+class Command(BaseCommand):
+    help = ("Mide los listados de stock y forecasting con page_size grande (latencia y queries) y "
+            "la serialización de una página: serializer DRF anidado vs filas planas. Los datos se revierten.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repuestos", type=int, default=2000)
+        parser.add_argument("--page-size", type=int, default=500)
+        parser.add_argument("--repeticiones", type=int, default=20)
+
+    def handle(self, *args, **options):
+        r = medir_listados(options["repuestos"], options["page_size"], options["repeticiones"])
+
+        self.stdout.write(f"{r['repuestos']} repuestos, page_size={r['page_size']}, {r['repeticiones']} repeticiones")
+        self.stdout.write(f"{'Medición':<16}{'p50 (ms)':>10}{'p95 (ms)':>10}{'Queries':>9}")
+        for nombre in ("stock", "forecasting", "serializer_drf", "filas_planas"):
+            m = r[nombre]
+            self.stdout.write(f"{nombre:<16}{m['p50_ms']:>10.1f}{m['p95_ms']:>10.1f}{m['queries']:>9}")
@@ -8,13 +8,17 @@ from AI.services.forecast_pipeline import ejecutar_forecast_talleres
 class Command(BaseCommand):
     help = "Ejecutar el forecast para TODOS los talleres, apuntando al próximo lunes."
 
+    def add_arguments(self, parser):
+        parser.add_argument("--forzar", action="store_true",
+                            help="Reentrena aunque los datos del taller no hayan cambiado")
+
     def handle(self, *args, **options):
         self.stdout.write(f"CRON TASK")
         fecha_lunes = next_monday_str()
 
         self.stdout.write(f"Ejecutando forecast para lunes {fecha_lunes}")
 
-        result = ejecutar_forecast_talleres(fecha_lunes)
+        result = ejecutar_forecast_talleres(fecha_lunes, forzar=options["forzar"])
 
         self.stdout.write(self.style.SUCCESS("Forecast OK"))
 
@@ -27,6 +31,10 @@ class Command(BaseCommand):
         for item in errores:
             self.stdout.write(self.style.ERROR(f"Taller ERROR: {item.get('taller_id')} - {item.get('error')}"))
 
+        self.stdout.write(f"\nPerfil de la corrida {result['corrida_id']} "
+                          f"({result['duracion_s']:.1f} s, {result['queries']} queries):")
+        self.stdout.write(result["perfil"])
+
 
 def next_monday_str() -> datetime:
     today = date.today()
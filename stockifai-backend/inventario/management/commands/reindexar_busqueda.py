@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from catalogo.models import Repuesto, RepuestoToken
+from inventario.services.busqueda import CHUNK_SIZE, indexar_repuestos
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda (tokens) de todo el catálogo de repuestos."
+
+    def handle(self, *args, **options):
+        RepuestoToken.objects.all().delete()
+
+        total_repuestos = total_tokens = 0
+        ultimo_id = 0
+        while True:
+            filas = list(
+                Repuesto.objects.filter(id__gt=ultimo_id)
+                .order_by("id")
+                .values_list("id", "numero_pieza", "descripcion")[:CHUNK_SIZE]
+            )
+            if not filas:
+                break
+            total_tokens += indexar_repuestos(filas)
+            total_repuestos += len(filas)
+            ultimo_id = filas[-1][0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice reconstruido: {total_repuestos} repuestos, {total_tokens} tokens."
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_remove_stockpordeposito_cantidad_minima_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['fecha', 'id'], name='mov_fecha_id_idx'),
+        ),
+    ]
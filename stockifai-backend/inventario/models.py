@@ -62,5 +62,22 @@ class Movimiento(models.Model):
     tipo=models.CharField(max_length=10, choices=TIPO); cantidad=models.IntegerField(); fecha=models.DateTimeField()
     documento=models.CharField(max_length=120, null=True, blank=True)
     externo_id=models.CharField(max_length=200, null=True, blank=True, db_index=True)
-    class Meta: constraints=[models.UniqueConstraint(fields=['stock_por_deposito','externo_id'],name='uq_mov_extid_por_stock',condition=~models.Q(externo_id=None))]
+    class Meta:
+        constraints=[models.UniqueConstraint(fields=['stock_por_deposito','externo_id'],name='uq_mov_extid_por_stock',condition=~models.Q(externo_id=None))]
+        # Paginación por cursor (keyset) ordenada por (fecha, id)
+        indexes=[models.Index(fields=['fecha','id'], name='mov_fecha_id_idx')]
     def __str__(self): return f"{self.tipo} {self.cantidad} @ SPD {self.stock_por_deposito_id}"
+
+
+class VersionDatos(models.Model):
+    """
+    Versión monótona de los datos que ven los listados: "taller:<id>" (stock,
+    movimientos, predicciones) y "catalogo" (repuestos, compartido por todos).
+    La incrementan las importaciones y el guardado de predicciones; los GET la usan
+    como ETag y como parte de la clave del cache de respuestas.
+    """
+    clave = models.CharField(max_length=64, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    actualizado = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self): return f"{self.clave} v{self.version}"
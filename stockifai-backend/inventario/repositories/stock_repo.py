@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from django.db.models import F
 from .base import RepoResult, StockInsufficientError
 from inventario.models import StockPorDeposito, Deposito
@@ -29,4 +31,26 @@ class StockRepo:
             ).only(
                 "id", "repuesto_taller_id", "deposito_id", "cantidad"
             )
-        )
\ No newline at end of file
+        )
+
+    def list_values_by_pares(self, pares: list[tuple[int, int]], chunk_size: int = 2000) -> list[tuple]:
+        """
+        (repuesto_taller_id, deposito_id, id, cantidad) de exactamente los pares
+        (repuesto_taller_id, deposito_id) pedidos. Se consulta por depósito con
+        repuesto_taller_id IN (...), así no se trae el producto cruzado de RTs y
+        depósitos cuando el taller tiene varios depósitos.
+        """
+        rts_por_deposito = defaultdict(list)
+        for rt_id, dep_id in pares:
+            rts_por_deposito[dep_id].append(rt_id)
+
+        filas = []
+        for dep_id, rt_ids in rts_por_deposito.items():
+            for i in range(0, len(rt_ids), chunk_size):
+                filas.extend(
+                    StockPorDeposito.objects.filter(
+                        deposito_id=dep_id,
+                        repuesto_taller_id__in=rt_ids[i:i + chunk_size]
+                    ).values_list("repuesto_taller_id", "deposito_id", "id", "cantidad")
+                )
+        return filas
@@ -0,0 +1,101 @@
+# inventario/services/busqueda.py
+import re
+import unicodedata
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Q
+
+from catalogo.models import RepuestoToken
+
+TOKEN_MAX_LEN = 64
+MAX_TOKENS_CONSULTA = 8
+CHUNK_SIZE = 1000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalizar(texto) -> str:
+    """Minúsculas, sin tildes."""
+    s = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode("ascii")
+    return s.lower()
+
+
+def tokenizar(texto) -> list[str]:
+    """Tokens alfanuméricos únicos, en orden de aparición."""
+    tokens = []
+    for tok in _TOKEN_RE.findall(normalizar(texto)):
+        tok = tok[:TOKEN_MAX_LEN]
+        if tok not in tokens:
+            tokens.append(tok)
+    return tokens
+
+
+def tokens_repuesto(numero_pieza: str, descripcion: str) -> set[str]:
+    """
+    Tokens que se indexan para un repuesto. El número de pieza se indexa
+    también compactado ("A-123/45" -> "a12345") para que el prefijo matchee
+    aunque el usuario escriba sin separadores.
+    """
+    tokens_pn = tokenizar(numero_pieza)
+    tokens = set(tokens_pn) | set(tokenizar(descripcion))
+    compacto = "".join(tokens_pn)[:TOKEN_MAX_LEN]
+    if compacto:
+        tokens.add(compacto)
+    return tokens
+
+
+def indexar_repuestos(filas: Iterable[tuple[int, str, str]]) -> int:
+    """
+    (Re)indexa los repuestos indicados como tuplas (id, numero_pieza, descripcion).
+    Borra los tokens previos de esos ids y los recrea con bulk_create.
+    """
+    filas = list(filas)
+    total = 0
+    for i in range(0, len(filas), CHUNK_SIZE):
+        chunk = filas[i:i + CHUNK_SIZE]
+        ids = [rid for rid, _, _ in chunk]
+        nuevos = [
+            RepuestoToken(repuesto_id=rid, token=tok)
+            for rid, numero, descripcion in chunk
+            for tok in tokens_repuesto(numero, descripcion)
+        ]
+        with transaction.atomic():
+            RepuestoToken.objects.filter(repuesto_id__in=ids).delete()
+            RepuestoToken.objects.bulk_create(nuevos, batch_size=CHUNK_SIZE, ignore_conflicts=True)
+        total += len(nuevos)
+    return total
+
+
+def indexar_objetos(repuestos: Iterable) -> int:
+    """Atajo para indexar instancias de Repuesto ya cargadas."""
+    return indexar_repuestos((r.pk, r.numero_pieza, r.descripcion) for r in repuestos)
+
+
+def filtro_busqueda(texto: str, prefijo: str = "") -> Q:
+    """
+    Q para filtrar por texto libre usando el índice de tokens.
+    Cada token de la consulta debe ser prefijo de algún token del repuesto (AND).
+    Antes era un icontains sobre el texto completo: ahora "filt aceite" encuentra
+    "Filtro de aceite", pero un pedazo del medio de una palabra ("ltro", "23" de
+    "A-123") ya no matchea. El número de pieza también se indexa compactado, así que
+    "a12" encuentra "A-123/45".
+
+    prefijo: ruta hasta el Repuesto desde el modelo consultado, por ej.
+      ""                                              -> Repuesto
+      "repuesto__"                                    -> RepuestoTaller
+      "stock_por_deposito__repuesto_taller__repuesto__" -> Movimiento
+    """
+    tokens = tokenizar(texto)[:MAX_TOKENS_CONSULTA]
+    if not tokens:
+        # Solo símbolos (ej. "--"): no hay tokens, se mantiene el comportamiento anterior
+        return Q(**{f"{prefijo}numero_pieza__icontains": texto})
+
+    filtro = Q()
+    for tok in tokens:
+        # Tokens y consulta ya están en minúsculas. istartswith en MySQL es LIKE sobre la
+        # collation ci de la columna y usa el índice; startswith compila a LIKE BINARY y no.
+        filtro &= Q(**{
+            f"{prefijo}id__in": RepuestoToken.objects.filter(token__istartswith=tok.lower()).values("repuesto_id")
+        })
+    return filtro
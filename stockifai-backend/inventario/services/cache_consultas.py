@@ -0,0 +1,74 @@
+"""
+Cache de las consultas casi estáticas (repuestos, marcas, categorías, depósitos por
+taller) sobre el cache de Django: funciona con locmem o con el backend de archivos,
+sin servicios externos.
+
+Las entradas se agrupan en espacios ("catalogo", "depositos:<taller_id>"). Cada
+espacio tiene una generación guardada en el mismo cache y las claves la incluyen:
+``invalidar`` cambia la generación y las entradas viejas quedan inalcanzables hasta
+que expiran por CONSULTAS_CACHE_TTL. Los que escriben (importaciones, señales de los
+modelos) llaman a ``invalidar_al_confirmar`` para que nadie cachee datos sin commitear.
+
+Con locmem cada worker tiene su propio cache: la invalidación solo llega al proceso
+que escribió y los demás pueden servir datos viejos hasta CONSULTAS_CACHE_TTL. Con
+CACHE_DIR (backend de archivos) los workers de un mismo host comparten el cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Any, Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ESPACIO_CATALOGO = "catalogo"
+_PREFIJO = "consultas:"
+_FALTA = object()
+
+
+def espacio_depositos(taller_id: int) -> str:
+    return f"depositos:{taller_id}"
+
+
+def _ttl() -> int:
+    return getattr(settings, "CONSULTAS_CACHE_TTL", 600)
+
+
+def _clave_generacion(espacio: str) -> str:
+    return f"{_PREFIJO}generacion:{espacio}"
+
+
+def _generacion(espacio: str) -> int:
+    clave = _clave_generacion(espacio)
+    generacion = cache.get(clave)
+    if generacion is None:
+        # time_ns y no 0: si el cache expulsó la generación, no se reusan claves viejas
+        cache.add(clave, time.time_ns(), None)
+        generacion = cache.get(clave)
+    return generacion
+
+
+def clave(espacio: str, partes: Iterable[Any]) -> str:
+    firma = hashlib.blake2b(repr(tuple(partes)).encode("utf-8"), digest_size=16).hexdigest()
+    return f"{_PREFIJO}{espacio}:{_generacion(espacio)}:{firma}"
+
+
+def obtener(espacio: str, partes: Iterable[Any], calcular: Callable[[], Any], ttl: int | None = None) -> Any:
+    """Devuelve el valor cacheado para (espacio, partes) o lo calcula y lo guarda."""
+    k = clave(espacio, partes)
+    valor = cache.get(k, _FALTA)
+    if valor is _FALTA:
+        valor = calcular()
+        cache.set(k, valor, ttl if ttl is not None else _ttl())
+    return valor
+
+
+def invalidar(*espacios: str) -> None:
+    cache.set_many({_clave_generacion(e): time.time_ns() for e in espacios}, None)
+
+
+def invalidar_al_confirmar(*espacios: str) -> None:
+    transaction.on_commit(lambda: invalidar(*espacios))
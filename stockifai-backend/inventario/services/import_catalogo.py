@@ -1,105 +1,145 @@
 # inventario/services/import_catalogo.py
-from django.db import transaction
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
 import pandas as pd
 
-from catalogo.models import Repuesto, Categoria, Marca
+from catalogo.models import SEPARADOR_HASH, Repuesto, Categoria, Marca, hash_clave
 from ..repositories.base import NotFoundError
 from ._helpers_movimientos import read_df
 from ._helpers_catalogo import norm_cols_catalogo
-
-from ..repositories.repuesto_repo import RepuestoRepo
-from ..repositories.categoria_repo import CategoriaRepo
-from ..repositories.marca_repo import MarcaRepo
-
-repuesto_repo = RepuestoRepo()
-categoria_repo = CategoriaRepo()
-marca_repo = MarcaRepo()
+from .busqueda import indexar_objetos, indexar_repuestos
+from .cache_consultas import ESPACIO_CATALOGO, invalidar_al_confirmar
+from .version_datos import incrementar_version_catalogo
 
 _VALID_ESTADOS = {"ACTIVO", "INACTIVO"}
 BULK_CHUNK = 2000  # ajustá 1000–5000 según memoria/DB
 
-def _is_na(v) -> bool:
-    return v is None or (isinstance(v, float) and pd.isna(v)) or (isinstance(v, str) and v.strip() == "")
-
 def _norm_estado(v: str, default_estado: str) -> str:
     v = "" if v is None else str(v).strip().upper()
     return v if v in _VALID_ESTADOS else default_estado
 
-def _resolver_categoria(row, categorias_by_id, categorias_by_name, categoria_repo):
-    # por id
-    if "categoria_id" in row and not _is_na(row["categoria_id"]):
-        try:
-            cid = int(row["categoria_id"])
-            if cid in categorias_by_id:
-                return categorias_by_id[cid]
-        except Exception:
-            pass
-    # por nombre
-    if "categoria" in row and not _is_na(row["categoria"]):
-        nombre = str(row["categoria"]).strip()
-        if nombre:
-            if nombre in categorias_by_name:
-                return categorias_by_name[nombre]
-            created = categoria_repo.get_or_create(nombre).obj
-            if getattr(created, "id", None):
-                categorias_by_id[created.id] = created
-                categorias_by_name[nombre] = created
-            return created
-    return None
-
-def _resolver_marca(row, marcas_by_id, marcas_by_name, marca_repo):
-    if "marca_id" in row and not _is_na(row["marca_id"]):
-        try:
-            mid = int(row["marca_id"])
-            if mid in marcas_by_id:
-                return marcas_by_id[mid]
-        except Exception:
-            pass
-    if "marca" in row and not _is_na(row["marca"]):
-        nombre = str(row["marca"]).strip()
-        if nombre:
-            if nombre in marcas_by_name:
-                return marcas_by_name[nombre]
-            created = marca_repo.get_or_create(nombre).obj
-            if getattr(created, "id", None):
-                marcas_by_id[created.id] = created
-                marcas_by_name[nombre] = created
-            return created
-    return None
-
-def _fetch_categorias_y_marca(df: pd.DataFrame):
-    cat_ids, cat_names, mar_ids, mar_names = set(), set(), set(), set()
-
-    if "categoria_id" in df.columns:
-        for v in df["categoria_id"]:
-            if not _is_na(v):
-                try:
-                    cat_ids.add(int(v))
-                except Exception:
-                    pass
-    if "categoria" in df.columns:
-        cat_names = {s for s in (str(x).strip() for x in df["categoria"].dropna()) if s}
-
-    if "marca_id" in df.columns:
-        for v in df["marca_id"]:
-            if not _is_na(v):
-                try:
-                    mar_ids.add(int(v))
-                except Exception:
-                    pass
-    if "marca" in df.columns:
-        mar_names = {s for s in (str(x).strip() for x in df["marca"].dropna()) if s}
-
-    categorias = list(Categoria.objects.filter(Q(id__in=cat_ids) | Q(nombre__in=cat_names)).only("id", "nombre"))
-    marcas = list(Marca.objects.filter(Q(id__in=mar_ids) | Q(nombre__in=mar_names)).only("id", "nombre"))
-
-    categorias_by_id = {c.id: c for c in categorias}
-    categorias_by_name = {c.nombre: c for c in categorias}
-    marcas_by_id = {m.id: m for m in marcas}
-    marcas_by_name = {m.nombre: m for m in marcas}
-
-    return categorias_by_id, categorias_by_name, marcas_by_id, marcas_by_name
+def _ids_validos(df: pd.DataFrame, campo_id: str) -> pd.Series:
+    if campo_id not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype="Int64")
+    ids = pd.to_numeric(df[campo_id], errors="coerce")
+    return ids.where(ids.notna() & (ids % 1 == 0)).astype("Int64")
+
+
+def _nombres(df: pd.DataFrame, campo_nombre: str) -> pd.Series:
+    if campo_nombre not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype="string")
+    nombres = df[campo_nombre].astype("string").str.strip()
+    return nombres.mask(nombres == "")
+
+
+def _indice_por_nombre(modelo, df: pd.DataFrame, campo_id: str, campo_nombre: str):
+    """
+    Índices {id: obj} y {nombre en minúsculas: obj} de Categoria/Marca para el archivo.
+    Los nombres que no existen (en filas sin id válido) se crean con un solo bulk_create.
+    """
+    ids = _ids_validos(df, campo_id)
+    por_id = {o.id: o for o in modelo.objects.filter(id__in=set(ids.dropna().tolist())).only("id", "nombre")}
+
+    # minúsculas -> primer nombre tal como vino en el archivo
+    con_nombre = _nombres(df, campo_nombre)[~ids.isin(list(por_id))].dropna()
+    nombres = con_nombre.groupby(con_nombre.str.lower(), sort=False).first().to_dict()
+
+    def buscar(claves):
+        return {
+            o.nombre.lower(): o
+            for o in modelo.objects.annotate(nombre_lower=Lower("nombre"))
+            .filter(nombre_lower__in=list(claves)).only("id", "nombre")
+        }
+
+    por_nombre = buscar(nombres) if nombres else {}
+    faltantes = [clave for clave in nombres if clave not in por_nombre]
+    if faltantes:
+        modelo.objects.bulk_create([modelo(nombre=nombres[c]) for c in faltantes],
+                                   batch_size=BULK_CHUNK, ignore_conflicts=True)
+        # ignore_conflicts no devuelve ids en todos los motores: se releen
+        por_nombre.update(buscar(faltantes))
+        invalidar_al_confirmar(ESPACIO_CATALOGO)
+    return por_id, por_nombre
+
+
+def _resolver_columna(df: pd.DataFrame, campo_id: str, campo_nombre: str, por_id: dict, por_nombre: dict) -> pd.Series:
+    """Id resuelto por fila: el id si existe, si no el nombre (sin distinguir mayúsculas)."""
+    ids = _ids_validos(df, campo_id)
+    ids_por_nombre = {clave: obj.id for clave, obj in por_nombre.items()}
+    por_nombre_col = pd.to_numeric(_nombres(df, campo_nombre).str.lower().map(ids_por_nombre), errors="coerce")
+    return ids.where(ids.isin(list(por_id)), por_nombre_col.astype("Int64"))
+
+
+def _leer_actuales(numeros: list) -> pd.DataFrame:
+    """id, hash y categoría/marca actuales de los repuestos del archivo que ya existen."""
+    filas = []
+    for i in range(0, len(numeros), BULK_CHUNK):
+        filas.extend(
+            Repuesto.objects.filter(numero_pieza__in=numeros[i:i + BULK_CHUNK])
+            .values_list("numero_pieza", "id", "hash_contenido", "categoria_id", "marca_id")
+        )
+    actuales = pd.DataFrame(filas, columns=["numero_pieza", "id", "hash_actual", "categoria_actual", "marca_actual"])
+    actuales = actuales.astype({"id": "Int64", "categoria_actual": "Int64", "marca_actual": "Int64"})
+
+    # Repuestos sin hash (creados por otras vías con bulk_create): se calcula desde sus campos
+    sin_hash = actuales.loc[actuales["hash_actual"].isna(), "id"].tolist()
+    if sin_hash:
+        calculados = {}
+        for i in range(0, len(sin_hash), BULK_CHUNK):
+            for r in Repuesto.objects.filter(id__in=sin_hash[i:i + BULK_CHUNK]).only(
+                    "id", "descripcion", "estado", "categoria_id", "marca_id"):
+                calculados[r.id] = r.calcular_hash()
+        actuales["hash_actual"] = actuales["hash_actual"].fillna(actuales["id"].map(calculados))
+    return actuales
+
+
+def _hashes(df: pd.DataFrame) -> list:
+    claves = (
+        df["descripcion"].astype(str) + SEPARADOR_HASH
+        + df["estado"].astype(str) + SEPARADOR_HASH
+        + df["categoria_final"].astype("string").fillna("") + SEPARADOR_HASH
+        + df["marca_final"].astype("string").fillna("")
+    )
+    return [hash_clave(c) for c in claves]
+
+
+def _valores(serie: pd.Series) -> list:
+    """Lista con None en lugar de NA (para pasar a los modelos)."""
+    return [None if pd.isna(v) else v for v in serie.tolist()]
+
+
+def _crear_repuestos(nuevos: list, errores: list) -> int:
+    """
+    bulk_create de los repuestos nuevos de un chunk (lista de (fila, Repuesto)).
+    Si el lote choca con una restricción, se reintenta fila por fila para
+    rechazar solo las filas con problema. Devuelve la cantidad creada.
+    """
+    if not nuevos:
+        return 0
+    try:
+        with transaction.atomic():
+            Repuesto.objects.bulk_create([rep for _, rep in nuevos], batch_size=BULK_CHUNK)
+        return len(nuevos)
+    except IntegrityError:
+        creados = 0
+        for idx, rep in nuevos:
+            try:
+                with transaction.atomic():
+                    rep.save(force_insert=True)
+                creados += 1
+            except IntegrityError as ex:
+                errores.append({"fila": int(idx) + 2, "motivo": str(ex)})
+        return creados
+
+
+def _indexar_nuevos(numeros: list) -> None:
+    # bulk_create no dispara post_save ni devuelve ids en MySQL: se indexa releyendo
+    for i in range(0, len(numeros), BULK_CHUNK):
+        indexar_repuestos(
+            Repuesto.objects.filter(numero_pieza__in=numeros[i:i + BULK_CHUNK])
+            .values_list("id", "numero_pieza", "descripcion")
+        )
+
 
 def importar_catalogo(*, file, fields_map: dict | None = None,
                       default_estado: str = "ACTIVO",
@@ -109,6 +149,10 @@ def importar_catalogo(*, file, fields_map: dict | None = None,
     Requeridos por fila: numero_pieza, descripcion
     Opcionales: estado, categoria_id|categoria, marca_id|marca
     mode: upsert | create-only | update-only
+
+    Importación diferencial: por cada fila se calcula (vectorizado) el hash de los
+    campos importados y se compara con Repuesto.hash_contenido; solo se escriben los
+    repuestos nuevos y los que cambiaron.
     """
     df = read_df(file)
     df = norm_cols_catalogo(df, fields_map or {})
@@ -123,87 +167,85 @@ def importar_catalogo(*, file, fields_map: dict | None = None,
         df["estado"] = default_estado
     df["estado"] = df["estado"].apply(lambda v: _norm_estado(v, default_estado))
 
-    # Prefetch existencias fuera del loop
-    numeros = df["numero_pieza"].tolist()
-    existentes_qs = (
-        Repuesto.objects.filter(numero_pieza__in=numeros)
-        .only("id", "numero_pieza", "descripcion", "estado", "categoria_id", "marca_id")
-    )
-    existentes = {r.numero_pieza: r for r in existentes_qs}
-
     creados = actualizados = ignorados = 0
     errores = []
 
-    categorias_by_id, categorias_by_name, marcas_by_id, marcas_by_name = _fetch_categorias_y_marca(df)
+    # +2 si tu CSV tiene encabezado
+    df = df.reset_index(drop=True)
+    df["fila"] = df.index + 2
+    invalidas = df["descripcion"] == ""
+    errores.extend(
+        {"fila": int(fila), "motivo": "Las columnas 'numero_pieza' y 'descripcion' son obligatorias."}
+        for fila in df.loc[invalidas, "fila"]
+    )
+    df = df[~invalidas]
+
+    # Categorías y marcas: índice por nombre armado una vez, las nuevas se crean en bloque
+    categorias_by_id, categorias_by_name = _indice_por_nombre(Categoria, df, "categoria_id", "categoria")
+    marcas_by_id, marcas_by_name = _indice_por_nombre(Marca, df, "marca_id", "marca")
+    df["categoria_res"] = _resolver_columna(df, "categoria_id", "categoria", categorias_by_id, categorias_by_name)
+    df["marca_res"] = _resolver_columna(df, "marca_id", "marca", marcas_by_id, marcas_by_name)
+
+    df = df.merge(_leer_actuales(df["numero_pieza"].tolist()), on="numero_pieza", how="left")
+    existe = df["id"].notna()
+    if mode == "create-only":
+        ignorados += int(existe.sum())
+        df = df[~existe]
+    elif mode == "update-only":
+        ignorados += int((~existe).sum())
+        df = df[existe]
+    existe = df["id"].notna()
+
+    # Sin categoría/marca en el archivo se conserva la actual
+    df["categoria_final"] = df["categoria_res"].fillna(df["categoria_actual"])
+    df["marca_final"] = df["marca_res"].fillna(df["marca_actual"])
+    df["hash_contenido"] = _hashes(df)
+
+    sin_cambios = existe & (df["hash_contenido"] == df["hash_actual"])
+    ignorados += int(sin_cambios.sum())
+    nuevos = df[~existe]
+    cambiados = df[existe & ~sin_cambios]
 
     # Procesar por CHUNKS con transacciones acotadas
-    rows = df.to_dict("records")
-    for i in range(0, len(rows), BULK_CHUNK):
-        chunk = rows[i:i + BULK_CHUNK]
-        # colecciones para bulk_update (más rápido que save() por ítem)
-        to_update = []
+    for i in range(0, len(nuevos), BULK_CHUNK):
+        chunk = nuevos.iloc[i:i + BULK_CHUNK]
+        to_create = [
+            (fila - 2, Repuesto(numero_pieza=numero, descripcion=descripcion, estado=estado,
+                                categoria_id=categoria_id, marca_id=marca_id, hash_contenido=hash_contenido))
+            for fila, numero, descripcion, estado, categoria_id, marca_id, hash_contenido in zip(
+                chunk["fila"], chunk["numero_pieza"], chunk["descripcion"], chunk["estado"],
+                _valores(chunk["categoria_final"]), _valores(chunk["marca_final"]), chunk["hash_contenido"],
+            )
+        ]
+        creados_chunk = _crear_repuestos(to_create, errores)
+        creados += creados_chunk
+        if creados_chunk:
+            _indexar_nuevos([rep.numero_pieza for _, rep in to_create])
+
+    for i in range(0, len(cambiados), BULK_CHUNK):
+        chunk = cambiados.iloc[i:i + BULK_CHUNK]
+        to_update = [
+            Repuesto(id=int(pk), numero_pieza=numero, descripcion=descripcion, estado=estado,
+                     categoria_id=categoria_id, marca_id=marca_id, hash_contenido=hash_contenido)
+            for pk, numero, descripcion, estado, categoria_id, marca_id, hash_contenido in zip(
+                chunk["id"], chunk["numero_pieza"], chunk["descripcion"], chunk["estado"],
+                _valores(chunk["categoria_final"]), _valores(chunk["marca_final"]), chunk["hash_contenido"],
+            )
+        ]
         with transaction.atomic():
-            for idx, row in enumerate(chunk, start=i):
-                try:
-                    numero = row.get("numero_pieza", "").strip()
-                    descripcion = row.get("descripcion", "").strip()
-                    if not numero or not descripcion:
-                        raise ValueError("Las columnas 'numero_pieza' y 'descripcion' son obligatorias.")
-
-                    categoria = _resolver_categoria(row, categorias_by_id, categorias_by_name, categoria_repo)
-                    marca = _resolver_marca(row, marcas_by_id, marcas_by_name, marca_repo)
-
-                    rep = existentes.get(numero)
-                    existe = rep is not None
-
-                    if existe and mode == "create-only":
-                        ignorados += 1
-                        continue
-                    if not existe and mode == "update-only":
-                        ignorados += 1
-                        continue
-
-                    if existe:
-                        # detectar cambios en campos REALES
-                        changed = False
-                        if rep.descripcion != descripcion:
-                            rep.descripcion = descripcion; changed = True
-                        if rep.estado != row.get("estado"):
-                            rep.estado = row.get("estado"); changed = True
-                        if categoria is not None and rep.categoria_id != getattr(categoria, "id", None):
-                            rep.categoria = categoria; changed = True
-                        if marca is not None and rep.marca_id != getattr(marca, "id", None):
-                            rep.marca = marca; changed = True
-
-                        if changed:
-                            to_update.append(rep)
-                        else:
-                            ignorados += 1
-                    else:
-                        # crear vía repo (si tu repo ya optimiza/valida)
-                        rep = repuesto_repo.create(
-                            numero_pieza=numero,
-                            descripcion=descripcion,
-                            estado=row.get("estado"),
-                            categoria=categoria,
-                            marca=marca,
-                        )
-                        existentes[numero] = rep
-                        creados += 1
-
-                except Exception as ex:
-                    # +2 si tu CSV tiene encabezado
-                    errores.append({"fila": int(idx) + 2, "motivo": str(ex)})
-
-            # flush del update masivo del chunk
-            if to_update:
-                # si necesitás performance máxima, podés pasar update_fields explícitos
-                Repuesto.objects.bulk_update(
-                    to_update,
-                    fields=["descripcion", "estado", "categoria", "marca"],
-                    batch_size=BULK_CHUNK
-                )
-                actualizados += len(to_update)
+            Repuesto.objects.bulk_update(
+                to_update,
+                fields=["descripcion", "estado", "categoria", "marca", "hash_contenido"],
+                batch_size=BULK_CHUNK
+            )
+        actualizados += len(to_update)
+        # bulk_update no dispara post_save: reindexamos la búsqueda a mano
+        indexar_objetos(to_update)
+
+    if creados or actualizados:
+        # El catálogo es compartido: invalida el cache HTTP de todos los talleres
+        incrementar_version_catalogo()
+        invalidar_al_confirmar(ESPACIO_CATALOGO)
 
     return {
         "creados": creados,
@@ -4,6 +4,7 @@ from django.db.models import F, Value, Case, When, IntegerField
 
 from catalogo.models import RepuestoTaller
 from ._helpers_movimientos import read_df, norm_cols, parse_fecha, norm_tipo
+from .version_datos import incrementar_version_taller
 from ..models import StockPorDeposito, Movimiento
 from ..repositories.taller_repo import TallerRepo
 from ..repositories.deposito_repo import DepositoRepo
@@ -62,6 +63,8 @@ def importar_movimientos(*, file, taller_id: int, fields_map: dict | None = None
             processed_data, entities, permitir_stock_negativo
         )
 
+        # Invalida el cache HTTP de los listados del taller
+        incrementar_version_taller(taller_id)
         return result
 
     finally:
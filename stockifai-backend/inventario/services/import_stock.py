@@ -1,17 +1,19 @@
 # inventario/services/import_stock.py
-from collections import defaultdict
 from uuid import uuid4
 
+import pandas as pd
+
 from django.db import transaction, connection, ProgrammingError
-from django.db.models import F, Value, Case, When, IntegerField
 from django.utils import timezone
 
 from catalogo.models import Repuesto, RepuestoTaller
 from ._helpers_movimientos import read_df
 from ._helpers_stock import norm_cols_stock
+from .busqueda import indexar_repuestos
+from .cache_consultas import ESPACIO_CATALOGO, espacio_depositos, invalidar_al_confirmar
+from .version_datos import incrementar_version_taller
 from ..models import Movimiento, Deposito, StockPorDeposito
 
-from ..repositories.base import NotFoundError
 from ..repositories.deposito_repo import DepositoRepo
 from ..repositories.movimiento_repo import MovimientoRepo
 from ..repositories.repuesto_repo import RepuestoRepo
@@ -42,6 +44,10 @@ def importar_stock(
     - deposito (nombre)
     Genera SIEMPRE el movimiento correspondiente (AJUSTE_INICIAL+/AJUSTE_INICIAL-).
     mode = "set" -> setea el stock exacto; "sum" -> suma/resta la cantidad.
+
+    Las filas se resuelven a ids con merges contra tablas de lookup (repuestos,
+    depósitos, RepuestoTaller y stock); el stock existente se lee solo para los pares
+    (repuesto_taller, deposito) del archivo.
     """
     # 1) Leer archivo
     df = read_df(file)
@@ -73,15 +79,17 @@ def importar_stock(
     # Tunings no destructivos; evitamos tocar autocommit/unique_checks
     _configure_db_for_bulk_aws()
 
-    # 5) Prefetch + creación masiva de faltantes (sin commits intermedios)
-    entities = _prefetch_all_entities(df, taller)
-    _create_missing_entities(df, entities, taller)
+    # 5) Resolver ids con merges contra tablas de lookup, creando en bloque los faltantes
+    df["fila"] = df.index + 2
+    df = _resolver_ids(df, taller)
 
     # 6) Movimientos en bulk + UPDATE masivo
     result = _process_movements_and_deltas(
-        df, entities, batch_id, hoy, documento, mode, permitir_stock_negativo
+        df, batch_id, hoy, documento, mode, permitir_stock_negativo
     )
 
+    # Invalida el cache HTTP de los listados del taller (al confirmar la transacción)
+    incrementar_version_taller(taller_id)
     return result
 
 
@@ -96,180 +104,236 @@ def _configure_db_for_bulk_aws():
     except Exception:
         pass
 
-def _prefetch_all_entities(df, taller):
-    numeros = df["numero_pieza"].unique().tolist()
-    deps_nombres = df["deposito"].unique().tolist()
 
-    repuestos_exist = {r.numero_pieza: r for r in repuesto_repo.list_by_numeros(numeros)}
-    depositos_exist = {d.nombre: d for d in deposito_repo.list_by_nombres(taller, deps_nombres)}
+def _lookup(consulta, claves: list, columnas: list) -> pd.DataFrame:
+    """DataFrame ``columnas`` con las filas de ``consulta(chunk)`` para las claves, por chunks."""
+    filas = []
+    for i in range(0, len(claves), CHUNK_SIZE):
+        filas.extend(consulta(claves[i:i + CHUNK_SIZE]))
+    return pd.DataFrame(filas, columns=columnas)
 
-    rt_exist = {}
-    if repuestos_exist:
-        rt_list = rt_repo.list_by_taller_and_repuestos(taller, [r.pk for r in repuestos_exist.values()])
-        rt_exist = {rt.repuesto_id: rt for rt in rt_list}
 
-    spd_exist = {}
-    if rt_exist and depositos_exist:
-        spd_list = stock_repo.list_by_rt_ids_and_depositos(
-            rt_ids=[rt.pk for rt in rt_exist.values()],
-            deposito_ids=[d.pk for d in depositos_exist.values()]
-        )
-        spd_exist = {(s.repuesto_taller_id, s.deposito_id): s for s in spd_list}
+def _lookup_repuestos(numeros: list) -> pd.DataFrame:
+    return _lookup(
+        lambda chunk: Repuesto.objects.filter(numero_pieza__in=chunk).values_list("numero_pieza", "id"),
+        numeros, ["numero_pieza", "repuesto_id"],
+    )
 
-    return {
-        'repuestos': repuestos_exist,
-        'depositos': depositos_exist,
-        'repuesto_taller': rt_exist,
-        'stock': spd_exist,
-    }
 
+def _lookup_depositos(taller, nombres: list) -> pd.DataFrame:
+    return _lookup(
+        lambda chunk: Deposito.objects.filter(taller=taller, nombre__in=chunk).values_list("nombre", "id"),
+        nombres, ["deposito", "deposito_id"],
+    )
+
+
+def _lookup_rt(taller, repuesto_ids: list) -> pd.DataFrame:
+    return _lookup(
+        lambda chunk: RepuestoTaller.objects.filter(taller=taller, repuesto_id__in=chunk)
+        .values_list("repuesto_id", "id_repuesto_taller"),
+        repuesto_ids, ["repuesto_id", "rt_id"],
+    )
+
+
+def _lookup_stock(pares: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        stock_repo.list_values_by_pares(pares, chunk_size=CHUNK_SIZE),
+        columns=["rt_id", "deposito_id", "spd_id", "cantidad_actual"],
+    )
 
-def _create_missing_entities(df, entities, taller):
-    # Repuestos faltantes
-    numeros_faltantes = [row["numero_pieza"] for _, row in df.iterrows()
-                         if row["numero_pieza"] not in entities['repuestos']]
-    if numeros_faltantes:
-        nuevos = list({n for n in numeros_faltantes})
-        created = Repuesto.objects.bulk_create(
+
+def _faltantes(claves, lookup: pd.DataFrame, columna: str) -> list:
+    return sorted(set(claves) - set(lookup[columna]))
+
+
+def _pares(df: pd.DataFrame) -> list:
+    return list(zip(df["rt_id"].astype(int), df["deposito_id"].astype(int)))
+
+
+def _resolver_ids(df: pd.DataFrame, taller) -> pd.DataFrame:
+    """
+    Agrega a cada fila repuesto_id, deposito_id, rt_id, spd_id y cantidad_actual.
+    Repuestos, depósitos y RepuestoTaller faltantes se crean con bulk_create y se
+    releen solo las claves creadas (ignore_conflicts no devuelve ids en MySQL).
+    Los pares sin StockPorDeposito quedan con spd_id nulo y cantidad_actual 0: se
+    crean después, ya con la cantidad final.
+    """
+    # Repuestos
+    numeros = df["numero_pieza"].unique().tolist()
+    repuestos = _lookup_repuestos(numeros)
+    nuevos = _faltantes(numeros, repuestos, "numero_pieza")
+    if nuevos:
+        Repuesto.objects.bulk_create(
             [Repuesto(numero_pieza=n, descripcion=n, estado='ACTIVO') for n in nuevos],
             batch_size=CHUNK_SIZE,
             ignore_conflicts=True,
         )
-        # Refetch para asegurar PKs (ignore_conflicts no devuelve todo)
-        for r in repuesto_repo.list_by_numeros(nuevos):
-            entities['repuestos'][r.numero_pieza] = r
-
-    # Depósitos faltantes
-    deps_faltantes = [row["deposito"] for _, row in df.iterrows()
-                      if row["deposito"] not in entities['depositos']]
-    if deps_faltantes:
-        nuevos = list({d for d in deps_faltantes})
+        creados = _lookup_repuestos(nuevos)
+        # bulk_create no dispara post_save: se indexa la búsqueda (descripcion == numero)
+        indexar_repuestos(zip(creados["repuesto_id"], creados["numero_pieza"], creados["numero_pieza"]))
+        repuestos = pd.concat([repuestos, creados], ignore_index=True)
+        invalidar_al_confirmar(ESPACIO_CATALOGO)
+
+    # Depósitos
+    nombres = df["deposito"].unique().tolist()
+    depositos = _lookup_depositos(taller, nombres)
+    nuevos = _faltantes(nombres, depositos, "deposito")
+    if nuevos:
         Deposito.objects.bulk_create(
             [Deposito(taller=taller, nombre=nm) for nm in nuevos],
             batch_size=CHUNK_SIZE,
             ignore_conflicts=True,
         )
-        for d in deposito_repo.list_by_nombres(taller, nuevos):
-            entities['depositos'][d.nombre] = d
-
-    repuesto_ids = [r.pk for r in entities['repuestos'].values()]
-    deposito_ids_by_name = {nm: d.pk for nm, d in entities['depositos'].items()}
-
-    # RT faltantes
-    faltan_rt_rep_ids = [rid for rid in repuesto_ids if rid not in entities['repuesto_taller']]
-    if faltan_rt_rep_ids:
+        depositos = pd.concat([depositos, _lookup_depositos(taller, nuevos)], ignore_index=True)
+        invalidar_al_confirmar(espacio_depositos(taller.id))
+
+    # RepuestoTaller
+    repuesto_ids = repuestos["repuesto_id"].tolist()
+    rts = _lookup_rt(taller, repuesto_ids)
+    nuevos = _faltantes(repuesto_ids, rts, "repuesto_id")
+    if nuevos:
         RepuestoTaller.objects.bulk_create(
-            [RepuestoTaller(taller=taller, repuesto_id=rid, precio=0, costo=0) for rid in faltan_rt_rep_ids],
+            [RepuestoTaller(taller=taller, repuesto_id=rid, precio=0, costo=0) for rid in nuevos],
             batch_size=CHUNK_SIZE,
             ignore_conflicts=True,
         )
+        rts = pd.concat([rts, _lookup_rt(taller, nuevos)], ignore_index=True)
 
-    # Refetch
-    rt_list = RepuestoTaller.objects.filter(
-        taller=taller,
-        repuesto_id__in=repuesto_ids
-    ).only("id_repuesto_taller", "repuesto_id")  # <- PK correcto
-
-    # Clave del dict = repuesto_id  (no el pk del RT)
-    entities['repuesto_taller'] = {rt.repuesto_id: rt for rt in rt_list}
-
-    # SPD faltantes
-    pairs_needed = set()
-    for _, row in df.iterrows():
-        rep = entities['repuestos'][row["numero_pieza"]]
-        dep = entities['depositos'][row["deposito"]]
-        rt = entities['repuesto_taller'][rep.pk]
-        pairs_needed.add((rt.pk, dep.pk))
-
-    ya = set(entities['stock'].keys())
-    crear = [p for p in pairs_needed if p not in ya]
-    if crear:
-        StockPorDeposito.objects.bulk_create(
-            [StockPorDeposito(repuesto_taller_id=rt_id, deposito_id=dep_id, cantidad=0)
-             for (rt_id, dep_id) in crear],
-            batch_size=CHUNK_SIZE,
-            ignore_conflicts=True,
-        )
-        # Refetch sólo los creados
-        spd_new = StockPorDeposito.objects.filter(
-            repuesto_taller_id__in=[rt for (rt, _) in crear],
-            deposito_id__in=[dp for (_, dp) in crear]
-        ).only("id", "repuesto_taller_id", "deposito_id", "cantidad")
-        for s in spd_new:
-            entities['stock'][(s.repuesto_taller_id, s.deposito_id)] = s
+    df = (
+        df.merge(repuestos, on="numero_pieza", how="left")
+        .merge(depositos, on="deposito", how="left")
+        .merge(rts, on="repuesto_id", how="left")
+    )
+
+    # Stock existente: solo los pares (rt, depósito) del archivo
+    resueltas = df["rt_id"].notna() & df["deposito_id"].notna()
+    stock = _lookup_stock(_pares(df[resueltas]))
+    df = df.merge(stock, on=["rt_id", "deposito_id"], how="left")
+    df["cantidad_actual"] = df["cantidad_actual"].fillna(0)
+    df["resuelta"] = resueltas
+    return df
+
+
+def _crear_stock(nuevos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Crea los StockPorDeposito de los pares nuevos con su cantidad final y devuelve
+    sus ids (refetch exacto de esos pares). Sin ignore_conflicts: si otra importación
+    creó el mismo par en el medio, la transacción falla en lugar de perder la cantidad.
+    """
+    StockPorDeposito.objects.bulk_create(
+        [StockPorDeposito(repuesto_taller_id=int(rt_id), deposito_id=int(dep_id), cantidad=int(cantidad))
+         for rt_id, dep_id, cantidad in zip(nuevos["rt_id"], nuevos["deposito_id"], nuevos["cantidad_final"])],
+        batch_size=CHUNK_SIZE,
+    )
+    return _lookup_stock(_pares(nuevos))[["rt_id", "deposito_id", "spd_id"]]
+
+
+def _sumar_deltas(items: list) -> None:
+    """
+    UPDATE masivo ``cantidad = cantidad + CASE id WHEN ... END`` por chunks de (spd_id, delta).
+    Se arma en SQL directo: compilar miles de When() con el ORM cuesta más que la query.
+    """
+    tabla = connection.ops.quote_name(StockPorDeposito._meta.db_table)
+    columna_id = connection.ops.quote_name(StockPorDeposito._meta.pk.column)
+    for i in range(0, len(items), CHUNK_SIZE):
+        chunk = items[i:i + CHUNK_SIZE]
+        casos = " ".join(["WHEN %s THEN %s"] * len(chunk))
+        marcadores = ", ".join(["%s"] * len(chunk))
+        params = [v for par in chunk for v in par] + [pk for pk, _ in chunk]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {tabla} SET cantidad = cantidad + CASE {columna_id} {casos} ELSE 0 END WHERE {columna_id} IN ({marcadores})",
+                params,
+            )
 
 
-def _process_movements_and_deltas(df, entities, batch_id, hoy, documento, mode, permitir_stock_negativo):
-    procesados = 0
+def _motivo_cantidad_invalida(valor) -> str:
+    """El mismo mensaje que daba int(valor) fila por fila."""
+    try:
+        int(valor)
+    except (TypeError, ValueError) as ex:
+        return str(ex)
+    return f"Cantidad inválida: {valor!r}"
+
+
+def _process_movements_and_deltas(df, batch_id, hoy, documento, mode, permitir_stock_negativo):
+    """Una sola pasada vectorizada: delta por fila, validación, stock nuevo, movimientos y UPDATE del existente."""
     errores = []
-    movimientos_bulk = []
-    deltas_por_spd = defaultdict(int)
-
-    for idx, row in df.iterrows():
-        try:
-            numero = row["numero_pieza"]
-            dep_name = row["deposito"]
-            cant = int(row["cantidad"])
-
-            rep = entities['repuestos'][numero]
-            dep = entities['depositos'][dep_name]
-            rt = entities['repuesto_taller'][rep.pk]
-            spd = entities['stock'][(rt.pk, dep.pk)]
-
-            if mode == "set":
-                actual = int(getattr(spd, "cantidad", 0))
-                delta = cant - actual
-            else:
-                delta = cant
-
-            if delta == 0:
-                procesados += 1
-                continue
-
-            if not permitir_stock_negativo:
-                actual = int(getattr(spd, "cantidad", 0))
-                if actual + delta < 0:
-                    errores.append({
-                        "fila": int(idx) + 2,
-                        "motivo": f"Stock insuficiente en depósito '{dep_name}' para repuesto '{numero}': {actual} + ({delta}) < 0"
-                    })
-                    continue
-
-            tipo = "INICIAL+" if delta > 0 else "INICIAL-"
-            cantidad_mov = abs(delta)
-            externo_id = f"IMPSTK:{batch_id}:{idx + 2}:{numero}:{dep_name}"
-
-            movimientos_bulk.append(Movimiento(
-                stock_por_deposito=spd,
-                tipo=tipo,
-                cantidad=cantidad_mov,
-                fecha=hoy,
-                externo_id=externo_id,
-                documento=documento,
-            ))
-            deltas_por_spd[spd.pk] += delta
-            procesados += 1
-
-        except (NotFoundError, ValueError, KeyError) as ex:
-            errores.append({"Fila": int(idx) + 2, "Motivo": str(ex)})
+
+    sin_resolver = ~df["resuelta"]
+    errores.extend(
+        {"Fila": int(fila), "Motivo": f"No se pudo resolver el repuesto '{numero}' en el depósito '{dep}'"}
+        for fila, numero, dep in zip(df.loc[sin_resolver, "fila"], df.loc[sin_resolver, "numero_pieza"],
+                                     df.loc[sin_resolver, "deposito"])
+    )
+    cantidad = pd.to_numeric(df["cantidad"], errors="coerce")
+    invalida = ~sin_resolver & cantidad.isna()
+    errores.extend(
+        {"Fila": int(fila), "Motivo": _motivo_cantidad_invalida(valor)}
+        for fila, valor in zip(df.loc[invalida, "fila"], df.loc[invalida, "cantidad"])
+    )
+    # Como antes, el par de una fila con cantidad inválida igual queda creado con stock 0
+    vacios = df[invalida & df["spd_id"].isna()].assign(delta=0, aplicar=False)
+    df = df[~sin_resolver & ~invalida].copy()
+
+    df["cantidad"] = cantidad[df.index].astype("int64")  # trunca como int()
+    df["cantidad_actual"] = df["cantidad_actual"].astype("int64")
+    df["delta"] = df["cantidad"] - df["cantidad_actual"] if mode == "set" else df["cantidad"]
+
+    sin_cambios = df["delta"] == 0
+    if permitir_stock_negativo:
+        insuficiente = pd.Series(False, index=df.index)
+    else:
+        insuficiente = ~sin_cambios & (df["cantidad_actual"] + df["delta"] < 0)
+    rechazadas = df[insuficiente]
+    errores.extend(
+        {
+            "fila": int(fila),
+            "motivo": f"Stock insuficiente en depósito '{dep}' para repuesto '{numero}': {actual} + ({delta}) < 0"
+        }
+        for fila, numero, dep, actual, delta in zip(
+            rechazadas["fila"], rechazadas["numero_pieza"], rechazadas["deposito"],
+            rechazadas["cantidad_actual"], rechazadas["delta"],
+        )
+    )
+    errores.sort(key=lambda e: e.get("fila", e.get("Fila")))
+
+    df["aplicar"] = ~sin_cambios & ~insuficiente
+    df["existente"] = df["spd_id"].notna()
+    procesados = int(sin_cambios.sum()) + int(df["aplicar"].sum())
+
+    # Pares nuevos: se insertan ya con la cantidad final, sin UPDATE posterior
+    if not df["existente"].all() or len(vacios):
+        df["cantidad_final"] = df["delta"].where(df["aplicar"], 0)
+        creados = _crear_stock(pd.concat([df[~df["existente"]], vacios.assign(cantidad_final=0)]))
+        df = df.merge(creados, on=["rt_id", "deposito_id"], how="left", suffixes=("", "_creado"))
+        df["spd_id"] = df["spd_id"].fillna(df.pop("spd_id_creado"))
+
+    aplicar = df[df["aplicar"]]
 
     # bulk_create (todo dentro de la misma transacción)
-    if movimientos_bulk:
+    if len(aplicar):
         Movimiento.objects.bulk_create(
-            movimientos_bulk,
+            (
+                Movimiento(
+                    stock_por_deposito_id=int(spd_id),
+                    tipo="INICIAL+" if delta > 0 else "INICIAL-",
+                    cantidad=abs(int(delta)),
+                    fecha=hoy,
+                    externo_id=f"IMPSTK:{batch_id}:{fila}:{numero}:{dep}",
+                    documento=documento,
+                )
+                for spd_id, delta, fila, numero, dep in zip(
+                    aplicar["spd_id"], aplicar["delta"], aplicar["fila"],
+                    aplicar["numero_pieza"], aplicar["deposito"],
+                )
+            ),
             batch_size=BULK_BATCH,
         )
 
-    # UPDATE masivo de stock
-    if deltas_por_spd:
-        items = list(deltas_por_spd.items())
-        for i in range(0, len(items), CHUNK_SIZE):
-            chunk = items[i:i + CHUNK_SIZE]
-            pks = [pk for pk, _ in chunk]
-            whens = [When(pk=pk, then=F('cantidad') + Value(d)) for pk, d in chunk]
-            StockPorDeposito.objects.filter(pk__in=pks).update(
-                cantidad=Case(*whens, default=F('cantidad'), output_field=IntegerField())
-            )
+    # UPDATE masivo del stock existente (cada par aparece una sola vez: el archivo ya está consolidado)
+    actualizar = aplicar[aplicar["existente"]]
+    _sumar_deltas(list(zip(actualizar["spd_id"].astype(int).tolist(), actualizar["delta"].astype(int).tolist())))
 
     return {
         "procesados": procesados,
@@ -277,4 +341,4 @@ def _process_movements_and_deltas(df, entities, batch_id, hoy, documento, mode,
         "errores": errores,
         "mode": mode,
         "batch": batch_id,
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,88 @@
+"""
+Versión de datos por taller (y del catálogo compartido) para el cache HTTP.
+
+Las importaciones y el guardado de predicciones llaman a ``incrementar_version_taller``
+/ ``incrementar_version_catalogo``; el incremento corre en ``transaction.on_commit``
+para que ningún lector vea la versión nueva con los datos viejos. Las versiones se
+leen del cache de Django (sin queries) y, si no están, de ``VersionDatos``.
+
+Con un cache por proceso (locmem) un worker puede ver la versión vieja hasta
+DATOS_VERSION_CACHE_TTL segundos después de un incremento hecho en otro.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import VersionDatos
+
+CLAVE_CATALOGO = "catalogo"
+_PREFIJO_CACHE = "version_datos:"
+
+
+class VersionesTaller(NamedTuple):
+    taller: int
+    catalogo: int
+    actualizado: Optional[datetime]
+
+    @property
+    def etag(self) -> str:
+        return f"{self.taller}.{self.catalogo}"
+
+
+def clave_taller(taller_id: int) -> str:
+    return f"taller:{taller_id}"
+
+
+def _ttl() -> int:
+    return getattr(settings, "DATOS_VERSION_CACHE_TTL", 30)
+
+
+def leer_versiones(taller_id: int) -> VersionesTaller:
+    """Versión del taller y del catálogo; sin queries si están en cache."""
+    claves = [clave_taller(taller_id), CLAVE_CATALOGO]
+    en_cache = cache.get_many([_PREFIJO_CACHE + c for c in claves])
+    valores = {c: en_cache[_PREFIJO_CACHE + c] for c in claves if _PREFIJO_CACHE + c in en_cache}
+
+    faltan = [c for c in claves if c not in valores]
+    if faltan:
+        leidas = {
+            clave: (version, actualizado)
+            for clave, version, actualizado in VersionDatos.objects.filter(clave__in=faltan)
+            .values_list("clave", "version", "actualizado")
+        }
+        # Las claves sin fila (nunca incrementadas) se cachean como versión 0
+        nuevos = {c: leidas.get(c, (0, None)) for c in faltan}
+        cache.set_many({_PREFIJO_CACHE + c: v for c, v in nuevos.items()}, _ttl())
+        valores.update(nuevos)
+
+    (v_taller, act_taller), (v_catalogo, act_catalogo) = valores[claves[0]], valores[claves[1]]
+    fechas = [f for f in (act_taller, act_catalogo) if f is not None]
+    return VersionesTaller(v_taller, v_catalogo, max(fechas) if fechas else None)
+
+
+def _incrementar(clave: str) -> None:
+    ahora = timezone.now()
+    if not VersionDatos.objects.filter(clave=clave).update(version=F("version") + 1, actualizado=ahora):
+        try:
+            with transaction.atomic():
+                VersionDatos.objects.create(clave=clave, version=1, actualizado=ahora)
+        except IntegrityError:
+            # Otro proceso la creó en el medio
+            VersionDatos.objects.filter(clave=clave).update(version=F("version") + 1, actualizado=ahora)
+    cache.delete(_PREFIJO_CACHE + clave)
+
+
+def incrementar_version_taller(taller_id: int) -> None:
+    transaction.on_commit(lambda: _incrementar(clave_taller(taller_id)))
+
+
+def incrementar_version_catalogo() -> None:
+    transaction.on_commit(lambda: _incrementar(CLAVE_CATALOGO))
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from inventario.models import Deposito
+from inventario.services.cache_consultas import espacio_depositos, invalidar_al_confirmar
+from inventario.services.version_datos import incrementar_version_taller
+
+
+@receiver([post_save, post_delete], sender=Deposito)
+def invalidar_cache_depositos(sender, instance: Deposito, **kwargs):
+    # bulk_create no dispara señales: importar_stock invalida por su cuenta
+    invalidar_al_confirmar(espacio_depositos(instance.taller_id))
+    # El nombre del depósito va en los listados de stock del taller
+    incrementar_version_taller(instance.taller_id)
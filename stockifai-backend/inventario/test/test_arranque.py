@@ -0,0 +1,10 @@
+from django.test import SimpleTestCase
+
+from inventario.benchmarks.arranque import medir_arranque_una_vez
+
+
+class ArranqueWebTest(SimpleTestCase):
+    def test_urls_no_importan_el_stack_de_ml(self):
+        # pandas, LightGBM, sklearn, holidays... solo se importan al usar el forecast o las importaciones
+        resultado = medir_arranque_una_vez()
+        self.assertEqual(resultado["modulos_pesados"], [])
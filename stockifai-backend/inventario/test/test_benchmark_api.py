@@ -0,0 +1,14 @@
+from django.test import TestCase
+
+from inventario.benchmarks.api import ESCENARIOS, OMITIDAS, medir_api, rutas_api
+
+
+class BenchmarkApiTest(TestCase):
+    def test_todas_las_rutas_tienen_escenario_u_omision(self):
+        cubiertas = {clave.split(":")[0] for clave in ESCENARIOS} | set(OMITIDAS)
+        self.assertEqual(rutas_api() - cubiertas, set())
+
+    def test_escenarios_responden_sin_error(self):
+        r = medir_api(talleres=2, repuestos=60, depositos=1, movimientos=300, repeticiones=1)
+        errores = {clave: m["status"] for clave, m in r["escenarios"].items() if m["status"] >= 400}
+        self.assertEqual(errores, {})
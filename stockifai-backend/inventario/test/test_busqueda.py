@@ -0,0 +1,68 @@
+import csv
+import io
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from catalogo.models import Repuesto, RepuestoTaller
+from inventario.models import Deposito, StockPorDeposito
+from inventario.services.busqueda import filtro_busqueda, tokenizar
+from user.models import Taller
+
+
+class BusquedaTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.taller = Taller.objects.create(nombre="Taller")
+        deposito = Deposito.objects.create(taller=cls.taller, nombre="Central")
+        # El alta dispara la señal que indexa los tokens
+        for numero, descripcion in (
+            ("A-123/45", "Filtro de aceite"),
+            ("B-77", "Filtro de aire"),
+            ("C--9", "Bujía iridium"),
+        ):
+            repuesto = Repuesto.objects.create(numero_pieza=numero, descripcion=descripcion, estado="ACTIVO")
+            rt = RepuestoTaller.objects.create(repuesto=repuesto, taller=cls.taller)
+            StockPorDeposito.objects.create(repuesto_taller=rt, deposito=deposito, cantidad=1)
+        cls.base = f"/api/talleres/{cls.taller.id}"
+
+    def setUp(self):
+        cache.clear()
+
+    def buscar(self, texto):
+        return sorted(Repuesto.objects.filter(filtro_busqueda(texto)).values_list("numero_pieza", flat=True))
+
+    def test_tokenizar(self):
+        self.assertEqual(tokenizar("  Bujía IRIDIUM bujia "), ["bujia", "iridium"])
+        self.assertEqual(tokenizar("--"), [])
+
+    def test_prefijo_de_palabra_sin_importar_mayusculas_ni_tildes(self):
+        self.assertEqual(self.buscar("FIL"), ["A-123/45", "B-77"])
+        self.assertEqual(self.buscar("bují"), ["C--9"])
+
+    def test_todos_los_tokens_deben_matchear(self):
+        self.assertEqual(self.buscar("filt acei"), ["A-123/45"])
+        self.assertEqual(self.buscar("filtro bujia"), [])
+
+    def test_no_busca_en_medio_de_una_palabra(self):
+        # Cambio respecto del icontains anterior
+        self.assertEqual(self.buscar("ltro"), [])
+        self.assertEqual(self.buscar("23"), [])
+
+    def test_numero_de_pieza_por_partes_o_compactado(self):
+        self.assertEqual(self.buscar("a-123"), ["A-123/45"])
+        self.assertEqual(self.buscar("a1234"), ["A-123/45"])
+
+    def test_solo_simbolos_usa_icontains_sobre_el_numero(self):
+        self.assertEqual(self.buscar("--"), ["C--9"])
+
+    def test_endpoints(self):
+        repuestos = self.client.get("/api/repuestos", {"search_text": "filt acei"}).json()["results"]
+        self.assertEqual([r["numero_pieza"] for r in repuestos], ["A-123/45"])
+
+        stock = self.client.get(f"{self.base}/stock", {"q": "fil"}).json()["results"]
+        self.assertEqual([s["repuesto_taller"]["repuesto"]["numero_pieza"] for s in stock], ["A-123/45", "B-77"])
+
+        contenido = b"".join(self.client.get(f"{self.base}/stock/exportar", {"q": "aire"}).streaming_content)
+        filas = list(csv.reader(io.StringIO(contenido.decode("utf-8").lstrip("\ufeff"))))
+        self.assertEqual([f[0] for f in filas[1:]], ["B-77"])
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from catalogo.models import Marca, Repuesto
+from inventario.models import Deposito
+from user.models import Taller
+
+
+class CacheConsultasTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.taller = Taller.objects.create(nombre="Taller")
+        Deposito.objects.create(taller=cls.taller, nombre="Central")
+        Marca.objects.create(nombre="Bosch")
+        for i in range(25):
+            Repuesto.objects.create(numero_pieza=f"P{i:03d}", descripcion=f"Filtro {i}", estado="ACTIVO")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_marcas_cacheadas_hasta_que_cambia_el_catalogo(self):
+        primera = self.client.get("/api/marcas").json()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/marcas").json(), primera)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Marca.objects.create(nombre="Valeo")
+        self.assertEqual(len(self.client.get("/api/marcas").json()), 2)
+
+    def test_repuestos_comparten_el_count_entre_paginas(self):
+        self.client.get("/api/repuestos?page=1")
+        # Solo la página: el COUNT ya está en cache
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/repuestos?page=2")
+        self.assertEqual(response.json()["count"], 25)
+        self.assertEqual(response.json()["page"], 2)
+
+    def test_depositos_se_invalidan_al_crear_uno(self):
+        url = f"/api/talleres/{self.taller.id}/depositos"
+        self.assertEqual(len(self.client.get(url).json()), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Deposito.objects.create(taller=self.taller, nombre="Norte")
+        self.assertEqual(len(self.client.get(url).json()), 2)
@@ -0,0 +1,98 @@
+from datetime import date, datetime, timezone
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from catalogo.models import Repuesto, RepuestoTaller
+from inventario.models import Deposito, Movimiento, StockPorDeposito
+from inventario.services.version_datos import incrementar_version_catalogo, incrementar_version_taller
+from user.models import Taller
+
+
+class FechaFija(date):
+    hoy = date(2025, 3, 12)
+
+    @classmethod
+    def today(cls):
+        return cls.hoy
+
+
+class CacheHttpTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.taller = Taller.objects.create(nombre="Taller")
+        deposito = Deposito.objects.create(taller=cls.taller, nombre="Central")
+        repuesto = Repuesto.objects.create(numero_pieza="P1", descripcion="Filtro", estado="ACTIVO")
+        rt = RepuestoTaller.objects.create(repuesto=repuesto, taller=cls.taller)
+        spd = StockPorDeposito.objects.create(repuesto_taller=rt, deposito=deposito, cantidad=5)
+        # Martes de la semana del 10/03: recién cuenta en el histórico a partir del lunes 17
+        Movimiento.objects.create(stock_por_deposito=spd, tipo="EGRESO", cantidad=4,
+                                  fecha=datetime(2025, 3, 11, 12, tzinfo=timezone.utc))
+        cls.url = f"/api/talleres/{cls.taller.id}/stock"
+        cls.url_detalle = f"/api/talleres/{cls.taller.id}/repuestos/{rt.id_repuesto_taller}/forecasting"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_if_none_match_responde_304_sin_queries(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_respuesta_cacheada_hasta_que_cambia_la_version(self):
+        primera = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).json(), primera.json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            incrementar_version_taller(self.taller.id)
+        segunda = self.client.get(self.url, HTTP_IF_NONE_MATCH=primera["ETag"])
+        self.assertEqual(segunda.status_code, 200)
+        self.assertNotEqual(segunda["ETag"], primera["ETag"])
+        self.assertIn("Last-Modified", segunda)
+
+        # El catálogo es compartido: también cambia el ETag del taller
+        with self.captureOnCommitCallbacks(execute=True):
+            incrementar_version_catalogo()
+        self.assertNotEqual(self.client.get(self.url)["ETag"], segunda["ETag"])
+
+    def test_editar_nombres_cambia_el_etag(self):
+        from catalogo.models import Marca
+
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/talleres/{self.taller.id}/", {"nombre": "Taller Norte"},
+                                         content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        segunda = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(segunda.status_code, 200)
+
+        for cambio in (lambda: Marca.objects.create(nombre="Bosch"),
+                       lambda: Deposito.objects.filter(taller=self.taller).get().save()):
+            etag = self.client.get(self.url)["ETag"]
+            with self.captureOnCommitCallbacks(execute=True):
+                cambio()
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detalle_forecasting_cambia_con_la_semana(self):
+        parche = mock.patch("inventario.api.cache_http.date", FechaFija)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+        FechaFija.hoy = date(2025, 3, 12)
+        primera = self.client.get(self.url_detalle)
+        historico = primera.json()["grafico_demanda"]["historico"]
+        self.assertEqual(historico[15], 0)
+        FechaFija.hoy = date(2025, 3, 16)
+        self.assertEqual(self.client.get(self.url_detalle, HTTP_IF_NONE_MATCH=primera["ETag"]).status_code, 304)
+
+        # Sin ningún cambio de datos, el lunes siguiente el ETag y la fecha ya no valen
+        FechaFija.hoy = date(2025, 3, 17)
+        segunda = self.client.get(self.url_detalle, HTTP_IF_NONE_MATCH=primera["ETag"])
+        self.assertEqual(segunda.status_code, 200)
+        self.assertEqual(segunda.json()["grafico_demanda"]["historico"][15], 4)
+        por_fecha = self.client.get(self.url_detalle, HTTP_IF_MODIFIED_SINCE=primera["Last-Modified"])
+        self.assertEqual(por_fecha.status_code, 200)
@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.test import SimpleTestCase
+
+from inventario.benchmarks.demanda_sintetica import generar_demanda
+
+
+class DemandaSinteticaTest(SimpleTestCase):
+    def test_misma_semilla_misma_demanda(self):
+        a = generar_demanda(300, semanas=104, hasta=date(2025, 6, 30), semilla=7)
+        b = generar_demanda(300, semanas=104, hasta=date(2025, 6, 30), semilla=7)
+        self.assertTrue(a.equals(b))
+
+    def test_segmentos(self):
+        demanda = generar_demanda(1000, semanas=156, hasta=date(2025, 6, 30))
+        por_sku = demanda.groupby("sku").agg(tipo=("tipo", "first"), semanas=("lunes", "nunique"),
+                                            ultima=("lunes", "max"))
+        self.assertEqual(set(por_sku["tipo"]), {"frecuencia_alta", "intermitente", "discontinuado"})
+        self.assertTrue((demanda["cantidad"] > 0).all())
+        # Los intermitentes venden en pocas semanas; los discontinuados no venden hace más de un año
+        intermitentes = por_sku[por_sku["tipo"] == "intermitente"]
+        self.assertLess(intermitentes["semanas"].median(), 156 * 0.25)
+        discontinuados = por_sku[por_sku["tipo"] == "discontinuado"]
+        self.assertTrue((discontinuados["ultima"] < "2024-06-30").all())
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from AI import entrenamiento_global
+from AI.entrenamiento_global import FEATURES_TALLER, ModeloGlobalInexistente, entrenar_modelos_globales
+from AI.services import modelos_lgbm
+from AI.services.artefactos import version_vigente
+from AI.services.modelos_lgbm import (
+    cargar_modelo,
+    existe_modelo,
+    leer_metadata_global,
+    ruta_modelo_global,
+    ruta_modelo_taller,
+)
+
+SEGMENTO = "intermitente"
+
+
+def escribir_csv(directorio, taller_id, escala, semilla, inicio="2024-01-01", semanas=30):
+    """Tres SKUs; las últimas 5 semanas son test y las 5 anteriores val. Dummies de mes de sus fechas."""
+    rng = np.random.default_rng(semilla)
+    fechas = pd.date_range(inicio, periods=semanas, freq="W-MON")
+    filas = []
+    for sku in ("P1", "P2", "P3"):
+        ventas = rng.poisson(escala, len(fechas)).astype(float)
+        for i, fecha in enumerate(fechas):
+            filas.append({
+                "fecha": fecha, "numero_pieza": sku, "Cantidad": ventas[i],
+                "ventas_t_1": ventas[i - 1] if i else 0.0,
+                "media_ultimas_4": ventas[max(i - 4, 0):i].mean() if i else 0.0,
+                "es_semana_feriado": float(i % 9 == 0),
+            })
+    df = pd.DataFrame(filas)
+    df = pd.concat([df, pd.get_dummies(df["fecha"].dt.month, prefix="mes", dtype=float)], axis=1)
+
+    ruta = os.path.join(directorio, str(taller_id), SEGMENTO)
+    os.makedirs(ruta, exist_ok=True)
+    cortes = {"train": df["fecha"] < fechas[-10], "val": df["fecha"].between(fechas[-10], fechas[-6]),
+              "test": df["fecha"] > fechas[-6]}
+    for parte, filtro in cortes.items():
+        df[filtro].to_csv(os.path.join(ruta, f"demanda_preprocesada_{SEGMENTO}_{parte}.csv"), index=False)
+    return ruta
+
+
+class EntrenamientoGlobalTest(SimpleTestCase):
+    def setUp(self):
+        self.modelos = tempfile.mkdtemp()
+        self.datos = tempfile.mkdtemp()
+        for directorio in (self.modelos, self.datos):
+            self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        parche = mock.patch.object(modelos_lgbm, "RUTA_BASE_MODELOS", self.modelos)
+        parche.start()
+        self.addCleanup(parche.stop)
+        parche = mock.patch.object(entrenamiento_global, "guardar_ultimo_registro_a_db")
+        self.ultimos_registros = parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_un_modelo_con_los_datos_de_todos_los_talleres(self):
+        # Cada taller trae solo las dummies de mes de sus fechas: al juntarlos las faltantes valen 0
+        rutas = [escribir_csv(self.datos, 1, escala=2, semilla=1),
+                 escribir_csv(self.datos, 2, escala=20, semilla=2, inicio="2024-06-03")]
+
+        self.assertEqual(entrenar_modelos_globales([1, 2], directorio_datos=self.datos), {SEGMENTO: [1, 2]})
+
+        modelo = cargar_modelo(ruta_modelo_global(SEGMENTO))
+        self.assertEqual(modelo.features[-len(FEATURES_TALLER):], FEATURES_TALLER)
+        self.assertIn("ventas_t_1", modelo.features)
+        self.assertTrue({f"mes_{m}" for m in range(1, 13)} <= set(modelo.features))
+        talleres = leer_metadata_global(SEGMENTO)["talleres"]
+        self.assertEqual(set(talleres), {"1", "2"})
+        self.assertGreater(talleres["2"]["taller_media_demanda"], talleres["1"]["taller_media_demanda"])
+        self.assertEqual([c.kwargs["taller_id"] for c in self.ultimos_registros.call_args_list], [1, 2])
+        # Los CSV de la corrida se consumen
+        self.assertEqual([os.listdir(r) for r in rutas], [[], []])
+
+    def test_actualizar_un_taller_reutiliza_el_modelo_global(self):
+        escribir_csv(self.datos, 1, escala=2, semilla=1)
+        entrenar_modelos_globales([1], directorio_datos=self.datos)
+        version = version_vigente(ruta_modelo_global(SEGMENTO))
+
+        escribir_csv(self.datos, 3, escala=5, semilla=3)
+        entrenar_modelos_globales([3], reentrenar=False, directorio_datos=self.datos)
+        self.assertEqual(version_vigente(ruta_modelo_global(SEGMENTO)), version)
+        self.assertEqual(set(leer_metadata_global(SEGMENTO)["talleres"]), {"1", "3"})
+
+    def test_actualizar_un_taller_sin_modelo_global_falla(self):
+        escribir_csv(self.datos, 1, escala=2, semilla=1)
+        with self.assertRaises(ModeloGlobalInexistente):
+            entrenar_modelos_globales([1], reentrenar=False, directorio_datos=self.datos)
+        self.assertFalse(existe_modelo(ruta_modelo_global(SEGMENTO)))
+
+    @override_settings(FORECAST_AJUSTE_POR_TALLER=True)
+    def test_ajuste_por_taller(self):
+        escribir_csv(self.datos, 1, escala=2, semilla=1)
+        entrenar_modelos_globales([1], directorio_datos=self.datos)
+        ajustado = cargar_modelo(ruta_modelo_taller(1, SEGMENTO, "ajustado"))
+        global_ = cargar_modelo(ruta_modelo_global(SEGMENTO))
+        self.assertGreater(ajustado.booster.num_trees(), global_.booster.num_trees())
+
+    def test_el_endpoint_por_taller_responde_409_sin_modelo_global(self):
+        with mock.patch("AI.services.forecast_pipeline.ejecutar_forecast_pipeline_por_taller",
+                        side_effect=ModeloGlobalInexistente("sin modelo global")):
+            response = self.client.post("/api/talleres/1/forecast/run", {"fecha_lunes": "2025-03-03"},
+                                        content_type="application/json")
+        self.assertEqual(response.status_code, 409)
@@ -0,0 +1,89 @@
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.test import TestCase
+
+from catalogo.models import Marca, Repuesto, RepuestoTaller
+from inventario.api.exportaciones import lotes_keyset
+from inventario.api.views import calcular_mos
+from inventario.models import Deposito, Movimiento, StockPorDeposito
+from user.models import Taller
+
+
+def leer_csv(response):
+    contenido = b"".join(response.streaming_content).decode("utf-8")
+    return list(csv.reader(io.StringIO(contenido.lstrip("\ufeff"))))
+
+
+class ExportacionesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.taller = Taller.objects.create(nombre="Taller")
+        otro = Taller.objects.create(nombre="Otro")
+        marca = Marca.objects.create(nombre="Bosch")
+        central = Deposito.objects.create(taller=cls.taller, nombre="Central")
+        deposito_otro = Deposito.objects.create(taller=otro, nombre="Central")
+        cls.spds = []
+        for i, numero in enumerate(("A-1", "A-2")):
+            repuesto = Repuesto.objects.create(numero_pieza=numero, descripcion=f"Filtro {i}", estado="ACTIVO",
+                                               marca=marca)
+            rt = RepuestoTaller.objects.create(repuesto=repuesto, taller=cls.taller, precio=Decimal("10.50"),
+                                               pred_1=2, pred_2=2, pred_3=2, pred_4=2)
+            cls.spds.append(StockPorDeposito.objects.create(repuesto_taller=rt, deposito=central, cantidad=5 + i))
+            rt_otro = RepuestoTaller.objects.create(repuesto=repuesto, taller=otro)
+            StockPorDeposito.objects.create(repuesto_taller=rt_otro, deposito=deposito_otro, cantidad=99)
+
+        # Siete movimientos con fechas repetidas: los lotes de 3 cortan en medio de un empate
+        base = datetime(2025, 3, 1, 10, tzinfo=timezone.utc)
+        Movimiento.objects.bulk_create([
+            Movimiento(stock_por_deposito=cls.spds[i % 2], tipo="EGRESO", cantidad=i + 1,
+                       fecha=base + timedelta(days=i // 3), documento=f"DOC-{i}")
+            for i in range(7)
+        ])
+        cls.base = f"/api/talleres/{cls.taller.id}"
+
+    def test_stock_csv(self):
+        response = self.client.get(f"{self.base}/stock/exportar")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn(f'filename="stock_taller_{self.taller.id}_', response["Content-Disposition"])
+        filas = leer_csv(response)
+        self.assertEqual(filas[0], ["numero_pieza", "descripcion", "marca", "categoria", "original",
+                                    "precio", "costo", "deposito", "cantidad"])
+        # Solo el stock del taller pedido
+        self.assertEqual([(f[0], f[7], f[8]) for f in filas[1:]], [("A-1", "Central", "5"), ("A-2", "Central", "6")])
+
+    def test_stock_xlsx(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get(f"{self.base}/stock/exportar", {"formato": "xlsx"})
+        hoja = load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True).active
+        filas = list(hoja.values)
+        self.assertEqual(filas[0][0], "numero_pieza")
+        self.assertEqual([(f[0], f[2], f[8]) for f in filas[1:]], [("A-1", "Bosch", 5), ("A-2", "Bosch", 6)])
+
+    def test_forecasting_csv(self):
+        filas = leer_csv(self.client.get(f"{self.base}/forecasting/exportar"))
+        self.assertEqual(filas[0], ["numero_pieza", "descripcion", "stock_total",
+                                    "pred_1", "pred_2", "pred_3", "pred_4", "mos_en_semanas"])
+        mos = float(calcular_mos(Decimal(5), [Decimal(2)] * 4))
+        self.assertEqual(filas[1], ["A-1", "Filtro 0", "5", "2", "2", "2", "2", str(mos)])
+
+    def test_movimientos_csv_en_orden_cronologico(self):
+        filas = leer_csv(self.client.get(f"{self.base}/movimientos/exportar"))
+        self.assertEqual(filas[0], ["fecha", "tipo", "cantidad", "deposito", "numero_pieza", "descripcion",
+                                    "documento", "externo_id"])
+        self.assertEqual([f[6] for f in filas[1:]], [f"DOC-{i}" for i in range(7)])
+
+    def test_formato_invalido(self):
+        self.assertEqual(self.client.get(f"{self.base}/stock/exportar", {"formato": "pdf"}).status_code, 400)
+
+    def test_lotes_keyset_cruza_el_borde_de_lote_con_empates(self):
+        qs = Movimiento.objects.all()
+        esperados = list(qs.order_by("fecha", "id").values_list("documento", flat=True))
+        # Dos lotes llenos de 3 y uno con la fila restante
+        with self.assertNumQueries(3):
+            filas = list(lotes_keyset(qs, ("documento",), claves=("fecha", "id"), chunk_size=3))
+        self.assertEqual([f[0] for f in filas], esperados)
+        self.assertEqual(len(list(lotes_keyset(qs, ("documento",), chunk_size=7))), 7)
@@ -0,0 +1,75 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase
+
+from AI import historicos
+from AI.historicos import _features_serie_externa, integrar_datos_externos_base
+from d_externo.models import Inflacion, Patentamiento
+
+
+class FeaturesSerieExternaTest(SimpleTestCase):
+    def test_serie_mensual_calculada_a_mano(self):
+        f = _features_serie_externa("ipc", np.array([10.0, 20.0, 30.0, 40.0]), "mensual")
+        np.testing.assert_array_equal(f["ipc_lag_1"], [np.nan, 10, 20, 30])
+        np.testing.assert_array_equal(f["ipc_lag_3"], [np.nan, np.nan, np.nan, 10])
+        np.testing.assert_array_equal(f["ipc_lag_6"], [np.nan] * 4)
+        # span 3 -> alpha 0.5
+        np.testing.assert_allclose(f["ipc_ema_3"], [10, 15, 22.5, 31.25])
+        np.testing.assert_array_equal(f["ipc_delta"], [np.nan, 10, 10, 10])
+        self.assertEqual(sorted(f), ["ipc_delta", "ipc_ema_12", "ipc_ema_3", "ipc_ema_6",
+                                     "ipc_lag_1", "ipc_lag_2", "ipc_lag_3", "ipc_lag_6"])
+
+    def test_equivale_a_la_version_con_pandas(self):
+        valores = np.random.default_rng(0).normal(100, 15, 40)
+        serie = pd.Series(valores)
+        f = _features_serie_externa("x", valores, "anual")
+        for lag in (12, 24, 36):
+            np.testing.assert_allclose(f[f"x_lag_{lag}"], serie.shift(lag).to_numpy())
+        for span in (12, 24):
+            np.testing.assert_allclose(f[f"x_ema_{span}"], serie.ewm(span=span, adjust=False).mean().to_numpy())
+        np.testing.assert_allclose(f["x_delta"], serie.diff().to_numpy())
+
+
+class IntegrarDatosExternosTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for mes, ipc in enumerate((2.0, 3.0, 4.0), start=1):
+            Inflacion.objects.create(fecha=date(2024, mes, 1), ipc=Decimal(ipc))
+        Patentamiento.objects.create(fecha=date(2024, 1, 15), cantidad=500)
+
+    def setUp(self):
+        # El cache es del módulo: cada test arranca vacío
+        parche = mock.patch.dict(historicos._cache_externos, {"huella": None, "df": None})
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_las_series_se_alinean_con_la_ultima_fecha_anterior(self):
+        df = integrar_datos_externos_base()
+        self.assertEqual(list(df["fecha"]), list(pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"])))
+        np.testing.assert_array_equal(df["inflacion_lag_1"], [np.nan, 2, 3])
+        # Patentamientos arranca el 15/01: no hay valor para el 01/01
+        np.testing.assert_array_equal(df["patentamientos_ema_12"], [np.nan, 500, 500])
+
+    def test_cache_hasta_que_cambia_la_huella(self):
+        primero = integrar_datos_externos_base()
+        with self.assertNumQueries(len(historicos.SERIES_EXTERNAS)):
+            # Solo la huella: el DataFrame sale del cache
+            self.assertIs(integrar_datos_externos_base(), primero)
+
+        Inflacion.objects.create(fecha=date(2024, 4, 1), ipc=Decimal("5.0"))
+        segundo = integrar_datos_externos_base()
+        self.assertIsNot(segundo, primero)
+        self.assertEqual(len(segundo), 4)
+        self.assertIs(integrar_datos_externos_base(), segundo)
+
+        # Corregir un valor sin agregar filas también cambia la huella
+        Inflacion.objects.filter(fecha=date(2024, 4, 1)).update(ipc=Decimal("6.0"))
+        self.assertEqual(integrar_datos_externos_base()["inflacion_lag_1"].iloc[-1], 4)
+        self.assertEqual(integrar_datos_externos_base()["inflacion_delta"].iloc[-1], 2)
+
+    def test_sin_cache(self):
+        self.assertIsNot(integrar_datos_externos_base(usar_cache=False), integrar_datos_externos_base(usar_cache=False))
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from AI.services import artefactos, forecast_pipeline, huella_datos, modelos_lgbm
+from AI.services.forecast_pipeline import ejecutar_forecast_pipeline_por_taller
+from AI.services.modelos_lgbm import guardar_modelo, ruta_modelo_taller
+from catalogo.models import Repuesto, RepuestoTaller
+from d_externo.models import Inflacion
+from inventario.models import Deposito, Movimiento, StockPorDeposito
+from inventario.test.test_modelos import entrenar
+from user.models import Taller
+
+LUNES = datetime(2025, 3, 3)
+
+
+class HuellaForecastTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.taller = Taller.objects.create(nombre="Taller")
+        deposito = Deposito.objects.create(taller=cls.taller, nombre="Central")
+        repuesto = Repuesto.objects.create(numero_pieza="P1", descripcion="Filtro", estado="ACTIVO")
+        rt = RepuestoTaller.objects.create(repuesto=repuesto, taller=cls.taller)
+        cls.spd = StockPorDeposito.objects.create(repuesto_taller=rt, deposito=deposito, cantidad=5)
+        Movimiento.objects.create(stock_por_deposito=cls.spd, tipo="EGRESO", cantidad=2,
+                                  fecha=timezone.now() - timedelta(days=7))
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        for modulo in (artefactos, modelos_lgbm, huella_datos):
+            self.parchear(modulo, "RUTA_BASE_MODELOS", directorio)
+
+        # Preproceso, entrenamiento e inferencia reales no hacen falta: se cuentan las llamadas
+        self.preproceso = self.parchear(forecast_pipeline, "ejecutar_preproceso",
+                                        mock.Mock(return_value={"intermitente": None}))
+        self.entrenamiento = self.parchear(forecast_pipeline, "ejecutar_pipeline_entrenamiento",
+                                           mock.Mock(side_effect=self.entrenar))
+        self.inferencia = self.parchear(forecast_pipeline, "ejecutar_inferencia", mock.Mock())
+
+    def parchear(self, modulo, nombre, valor):
+        parche = mock.patch.object(modulo, nombre, valor)
+        parche.start()
+        self.addCleanup(parche.stop)
+        return valor
+
+    def entrenar(self, taller_id, directorio_datos):
+        guardar_modelo(entrenar()[0], ruta_modelo_taller(taller_id, "intermitente"))
+        return {"intermitente": "full"}
+
+    def correr(self, forzar=False):
+        return ejecutar_forecast_pipeline_por_taller(self.taller.id, LUNES, forzar=forzar)
+
+    def test_sin_cambios_se_omiten_preproceso_y_entrenamiento(self):
+        self.assertFalse(self.correr()["preprocess"]["cache"])
+        resultado = self.correr()
+        self.assertEqual(resultado["preprocess"], {"segmentos": ["intermitente"], "cache": True})
+        self.assertEqual((self.preproceso.call_count, self.entrenamiento.call_count), (1, 1))
+        # La inferencia corre siempre
+        self.assertEqual(self.inferencia.call_count, 2)
+
+    def test_un_movimiento_nuevo_vuelve_a_entrenar(self):
+        self.correr()
+        Movimiento.objects.create(stock_por_deposito=self.spd, tipo="EGRESO", cantidad=1,
+                                  fecha=timezone.now() - timedelta(days=1))
+        self.assertFalse(self.correr()["preprocess"]["cache"])
+        self.assertEqual(self.entrenamiento.call_count, 2)
+
+    def test_un_indicador_externo_nuevo_vuelve_a_entrenar(self):
+        self.correr()
+        Inflacion.objects.create(fecha=date(2025, 2, 1), ipc=Decimal("2.5"))
+        self.assertFalse(self.correr()["preprocess"]["cache"])
+        self.assertEqual(self.entrenamiento.call_count, 2)
+
+    def test_forzar_ignora_la_huella(self):
+        self.correr()
+        self.assertFalse(self.correr(forzar=True)["preprocess"]["cache"])
+        self.assertEqual((self.preproceso.call_count, self.entrenamiento.call_count), (2, 2))
+
+    def test_sin_modelo_en_disco_no_se_omite(self):
+        self.correr()
+        modelos_lgbm.borrar_modelo(ruta_modelo_taller(self.taller.id, "intermitente"))
+        self.assertFalse(self.correr()["preprocess"]["cache"])
@@ -0,0 +1,70 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from catalogo.models import Categoria, Marca, Repuesto
+from inventario.services.import_catalogo import importar_catalogo
+
+
+def csv(*filas):
+    contenido = "\n".join(["numero_pieza,descripcion,marca,categoria", *filas]) + "\n"
+    return SimpleUploadedFile("catalogo.csv", contenido.encode("utf-8"))
+
+
+class ImportarCatalogoTest(TestCase):
+    def test_crea_repuestos_marcas_y_categorias(self):
+        r = importar_catalogo(file=csv("A-1,Filtro de aceite,Bosch,Filtros", "A-2,Bujía,Bosch,Encendido"))
+        self.assertEqual((r["creados"], r["actualizados"], r["ignorados"]), (2, 0, 0))
+        self.assertEqual(Marca.objects.filter(nombre="Bosch").count(), 1)
+        self.assertEqual(set(Categoria.objects.values_list("nombre", flat=True)), {"Filtros", "Encendido"})
+        repuesto = Repuesto.objects.get(numero_pieza="A-2")
+        self.assertEqual((repuesto.descripcion, repuesto.estado, repuesto.marca.nombre), ("Bujía", "ACTIVO", "Bosch"))
+        # Los nuevos quedan indexados para la búsqueda
+        self.assertTrue(repuesto.tokens.filter(token="bujia").exists())
+
+    def test_marcas_y_categorias_existentes_sin_distinguir_mayusculas(self):
+        marca = Marca.objects.create(nombre="Bosch")
+        categoria = Categoria.objects.create(nombre="Filtros")
+        importar_catalogo(file=csv("A-1,Filtro,BOSCH,filtros"))
+        repuesto = Repuesto.objects.get(numero_pieza="A-1")
+        self.assertEqual((repuesto.marca_id, repuesto.categoria_id), (marca.id, categoria.id))
+        self.assertEqual((Marca.objects.count(), Categoria.objects.count()), (1, 1))
+
+    def test_actualiza_solo_lo_que_cambio(self):
+        importar_catalogo(file=csv("A-1,Filtro,Bosch,Filtros", "A-2,Bujía,NGK,Encendido"))
+        r = importar_catalogo(file=csv("A-1,Filtro de aire,Bosch,Filtros", "A-2,Bujía,NGK,Encendido"))
+        self.assertEqual((r["creados"], r["actualizados"], r["ignorados"]), (0, 1, 1))
+        repuesto = Repuesto.objects.get(numero_pieza="A-1")
+        self.assertEqual(repuesto.descripcion, "Filtro de aire")
+        self.assertTrue(repuesto.tokens.filter(token="aire").exists())
+
+    def test_reimportar_el_mismo_archivo_no_escribe(self):
+        importar_catalogo(file=csv("A-1,Filtro,Bosch,Filtros", "A-2,Bujía,,"))
+        r = importar_catalogo(file=csv("A-1,Filtro,Bosch,Filtros", "A-2,Bujía,,"))
+        self.assertEqual((r["creados"], r["actualizados"], r["ignorados"], r["rechazados"]), (0, 0, 2, 0))
+
+    def test_filas_sin_descripcion_se_rechazan(self):
+        r = importar_catalogo(file=csv("A-1,Filtro,,", "A-2,   ,,"))
+        self.assertEqual((r["creados"], r["rechazados"]), (1, 1))
+        self.assertEqual(r["errores"][0]["fila"], 3)
+
+
+class RepuestoHashTest(TestCase):
+    def test_hash_cambia_solo_con_los_campos_importados(self):
+        repuesto = Repuesto.objects.create(numero_pieza="A-1", descripcion="Filtro", estado="ACTIVO")
+        original = repuesto.hash_contenido
+        self.assertEqual(original, repuesto.calcular_hash())
+
+        repuesto.numero_pieza = "A-1B"
+        repuesto.save()
+        self.assertEqual(repuesto.hash_contenido, original)
+
+        repuesto.descripcion = "Filtro de aire"
+        repuesto.save(update_fields=["descripcion"])
+        repuesto.refresh_from_db()
+        self.assertNotEqual(repuesto.hash_contenido, original)
+        self.assertEqual(repuesto.hash_contenido, repuesto.calcular_hash())
+
+    def test_hash_vectorizado_de_la_importacion_coincide_con_el_modelo(self):
+        importar_catalogo(file=csv("A-1,Filtro,Bosch,Filtros", "A-2,Bujía,,"))
+        for repuesto in Repuesto.objects.all():
+            self.assertEqual(repuesto.hash_contenido, repuesto.calcular_hash())
@@ -0,0 +1,63 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from catalogo.models import Repuesto, RepuestoTaller
+from inventario.models import Deposito, Movimiento, StockPorDeposito
+from inventario.services.import_stock import importar_stock
+from user.models import Taller
+
+
+def csv(*filas):
+    contenido = "\n".join(["repuesto,cantidad,deposito", *filas]) + "\n"
+    return SimpleUploadedFile("stock.csv", contenido.encode("utf-8"))
+
+
+class ImportarStockTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.taller = Taller.objects.create(nombre="Taller")
+        cls.central = Deposito.objects.create(taller=cls.taller, nombre="Central")
+        cls.norte = Deposito.objects.create(taller=cls.taller, nombre="Norte")
+        cls.rt_a = RepuestoTaller.objects.create(
+            repuesto=Repuesto.objects.create(numero_pieza="A", descripcion="A", estado="ACTIVO"), taller=cls.taller)
+        cls.rt_b = RepuestoTaller.objects.create(
+            repuesto=Repuesto.objects.create(numero_pieza="B", descripcion="B", estado="ACTIVO"), taller=cls.taller)
+        cls.a_central = StockPorDeposito.objects.create(repuesto_taller=cls.rt_a, deposito=cls.central, cantidad=5)
+        cls.b_norte = StockPorDeposito.objects.create(repuesto_taller=cls.rt_b, deposito=cls.norte, cantidad=8)
+
+    def cantidad(self, rt, deposito):
+        return StockPorDeposito.objects.get(repuesto_taller=rt, deposito=deposito).cantidad
+
+    def test_set_crea_faltantes_y_toca_solo_los_pares_del_archivo(self):
+        # A-Norte y B-Central son pares nuevos; A-Central y B-Norte (el producto cruzado) no están en el archivo
+        r = importar_stock(file=csv("A,3,Norte", "B,2,Central", "C,7,Sur"), taller_id=self.taller.id)
+        self.assertEqual((r["procesados"], r["rechazados"]), (3, 0))
+        self.assertEqual((self.cantidad(self.rt_a, self.norte), self.cantidad(self.rt_b, self.central)), (3, 2))
+        self.assertEqual((self.cantidad(self.rt_a, self.central), self.cantidad(self.rt_b, self.norte)), (5, 8))
+
+        rt_c = RepuestoTaller.objects.get(taller=self.taller, repuesto__numero_pieza="C")
+        self.assertEqual(self.cantidad(rt_c, Deposito.objects.get(taller=self.taller, nombre="Sur")), 7)
+        self.assertEqual(Movimiento.objects.filter(tipo="INICIAL+").count(), 3)
+
+    def test_set_sobre_stock_existente_genera_el_delta(self):
+        r = importar_stock(file=csv("A,2,Central", "B,8,Norte"), taller_id=self.taller.id)
+        self.assertEqual(r["procesados"], 2)
+        self.assertEqual((self.cantidad(self.rt_a, self.central), self.cantidad(self.rt_b, self.norte)), (2, 8))
+        movimiento = Movimiento.objects.get()
+        self.assertEqual((movimiento.tipo, movimiento.cantidad, movimiento.stock_por_deposito_id),
+                         ("INICIAL-", 3, self.a_central.id))
+
+    def test_sum_consolida_filas_repetidas(self):
+        importar_stock(file=csv("A,3,Central", "A,4,Central", "B,-2,Norte"), taller_id=self.taller.id, mode="sum")
+        self.assertEqual((self.cantidad(self.rt_a, self.central), self.cantidad(self.rt_b, self.norte)), (12, 6))
+
+    def test_filas_invalidas(self):
+        r = importar_stock(file=csv("A,-9,Central", "B,abc,Central", "B,1,Norte"), taller_id=self.taller.id,
+                           mode="sum")
+        self.assertEqual((r["procesados"], r["rechazados"]), (1, 2))
+        motivos = sorted(e.get("motivo", e.get("Motivo")) for e in r["errores"])
+        self.assertIn("Stock insuficiente", motivos[0])
+        self.assertEqual(motivos[1], "invalid literal for int() with base 10: 'abc'")
+        self.assertEqual((self.cantidad(self.rt_a, self.central), self.cantidad(self.rt_b, self.norte)), (5, 9))
+        # Como antes, el par con cantidad inválida queda creado con stock 0
+        self.assertEqual(self.cantidad(self.rt_b, self.central), 0)
@@ -0,0 +1,86 @@
+import json
+from unittest import mock
+
+from django.test import TestCase
+
+from AI.services.instrumentacion import corrida, corrida_actual, etapa, registrar_filas
+from d_externo.models import EjecucionForecast
+from user.models import Taller
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class InstrumentacionTest(TestCase):
+    def setUp(self):
+        self.reloj = Reloj()
+        parche = mock.patch("AI.services.instrumentacion.time.perf_counter", self.reloj)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_corrida_con_etapas_anidadas(self):
+        with self.assertLogs("stockifai.forecast", level="INFO") as logs:
+            with corrida("prueba") as actual:
+                with etapa("taller", taller_id=7):
+                    Taller.objects.count()
+                    with etapa("preproceso", taller_id=7, segmento="intermitente"):
+                        Taller.objects.count()
+                        Taller.objects.count()
+                        registrar_filas(120)
+                        self.reloj.ahora += 2.0
+                    self.reloj.ahora += 1.0
+                with etapa("preproceso", taller_id=8):
+                    registrar_filas(30)
+                    self.reloj.ahora += 0.5
+                actual.resultado = {"ok": [{"taller_id": 7}], "errores": [{"taller_id": 8}]}
+
+        self.assertIsNone(corrida_actual())
+        # Tiempos y queries son inclusivos ("taller" cuenta los de su preproceso); las filas
+        # van solo a la etapa en curso, así el resumen no las suma dos veces
+        taller, preproceso_7, preproceso_8 = actual.etapas
+        self.assertEqual((taller.duracion_s, taller.queries, taller.filas), (3.0, 3, 0))
+        self.assertEqual((preproceso_7.duracion_s, preproceso_7.queries, preproceso_7.filas), (2.0, 2, 120))
+        self.assertEqual(preproceso_7.segmento, "intermitente")
+        self.assertEqual((preproceso_8.duracion_s, preproceso_8.queries, preproceso_8.filas), (0.5, 0, 30))
+        self.assertEqual((actual.duracion_s, actual.queries), (3.5, 3))
+
+        resumen = {fila["etapa"]: fila for fila in actual.resumen()}
+        self.assertEqual(list(resumen), ["taller", "preproceso"])
+        self.assertEqual((resumen["preproceso"]["veces"], resumen["preproceso"]["filas"]), (2, 150))
+        self.assertEqual(resumen["preproceso"]["duracion_s"], 2.5)
+
+        # Una línea JSON por etapa (al cerrar, la interna primero) y una por la corrida
+        lineas = [json.loads(r.getMessage()) for r in logs.records]
+        self.assertEqual([(l["evento"], l.get("nombre")) for l in lineas],
+                         [("etapa", "preproceso"), ("etapa", "taller"), ("etapa", "preproceso"), ("corrida", None)])
+        self.assertEqual(lineas[0]["corrida"], actual.id)
+        self.assertEqual((lineas[0]["taller_id"], lineas[0]["queries"], lineas[0]["filas"]), (7, 2, 120))
+        self.assertEqual((lineas[-1]["estado"], lineas[-1]["queries"]), ("ok", 3))
+
+        ejecucion = EjecucionForecast.objects.get(corrida_id=actual.id)
+        self.assertEqual((ejecucion.tipo, ejecucion.estado, ejecucion.talleres_ok, ejecucion.talleres_error),
+                         ("prueba", "ok", 1, 1))
+        self.assertEqual((ejecucion.duracion_s, ejecucion.queries), (3.5, 3))
+        self.assertEqual(ejecucion.resumen, actual.resumen())
+
+    def test_error_en_una_etapa(self):
+        with self.assertLogs("stockifai.forecast", level="INFO"):
+            with self.assertRaises(ValueError):
+                with corrida("prueba") as actual:
+                    with etapa("entrenamiento"):
+                        raise ValueError("sin datos")
+        self.assertEqual(actual.etapas[0].error, "ValueError: sin datos")
+        self.assertEqual(actual.resumen()[0]["errores"], 1)
+        self.assertEqual(EjecucionForecast.objects.get(corrida_id=actual.id).estado, "error")
+
+    def test_registrar_filas_fuera_de_una_etapa_no_hace_nada(self):
+        registrar_filas(10)
+        with self.assertLogs("stockifai.forecast", level="INFO"):
+            with etapa("suelta") as metricas:
+                registrar_filas(5)
+        self.assertEqual(metricas.filas, 5)
@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from catalogo.models import Categoria, Marca, Repuesto, RepuestoTaller
+from inventario.api.serializers import CAMPOS_REPUESTO_TALLER, RepuestoTallerSerializer, repuesto_taller_dict
+from inventario.models import Deposito, StockPorDeposito
+from inventario.services.version_datos import leer_versiones
+from user.models import Taller
+
+
+class ListadosConsultasTest(TestCase):
+    """Los listados arman los ítems desde .values(): la cantidad de queries no depende del tamaño de página."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.taller = Taller.objects.create(nombre="Taller")
+        marca = Marca.objects.create(nombre="Bosch")
+        categoria = Categoria.objects.create(nombre="Frenos", descripcion="Pastillas y discos")
+        depositos = [Deposito.objects.create(taller=cls.taller, nombre=n) for n in ("Central", "Norte")]
+        for i in range(30):
+            repuesto = Repuesto.objects.create(
+                numero_pieza=f"P{i:03d}", descripcion=f"Pastilla {i}", estado="ACTIVO",
+                marca=marca if i % 2 else None, categoria=categoria if i % 3 else None,
+            )
+            rt = RepuestoTaller.objects.create(repuesto=repuesto, taller=cls.taller, precio=Decimal("12.5"),
+                                               pred_1=i % 4, pred_2=2)
+            for deposito in depositos:
+                StockPorDeposito.objects.create(repuesto_taller=rt, deposito=deposito, cantidad=i)
+
+    def setUp(self):
+        # Sin respuestas cacheadas y con la versión de datos ya leída: se cuentan solo las queries de la vista
+        cache.clear()
+        leer_versiones(self.taller.id)
+
+    def test_stock_queries_constantes(self):
+        # COUNT + página + stock por depósito de la página
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/talleres/{self.taller.id}/stock?page_size=500")
+        self.assertEqual(response.json()["count"], 30)
+        self.assertEqual(len(response.json()["results"][0]["depositos"]), 2)
+
+    def test_forecasting_queries_constantes(self):
+        # COUNT + página (antes: una query por repuesto, taller, marca y categoría)
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/talleres/{self.taller.id}/forecasting?page_size=500")
+        self.assertEqual(len(response.json()["results"]), 30)
+
+    def test_formato_igual_al_serializer(self):
+        filas = RepuestoTaller.objects.order_by("id_repuesto_taller").values(*CAMPOS_REPUESTO_TALLER)
+        instancias = RepuestoTaller.objects.order_by("id_repuesto_taller")
+        for fila, rt in zip(filas, instancias):
+            self.assertEqual(repuesto_taller_dict(fila), RepuestoTallerSerializer(rt).data)
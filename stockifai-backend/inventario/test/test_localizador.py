@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from catalogo.models import Repuesto, RepuestoTaller
+from inventario.models import Deposito, StockPorDeposito
+from user.models import Grupo, GrupoTaller, Taller
+from user.services.alcance_grupos import reconstruir_alcance_grupos
+
+URL = "/api/localizador/repuestos"
+
+
+def crear_taller(nombre, lat, lon, grupo):
+    taller = Taller.objects.create(nombre=nombre, latitud=Decimal(str(lat)), longitud=Decimal(str(lon)))
+    GrupoTaller.objects.create(id_grupo=grupo, id_taller=taller)
+    return taller
+
+
+def dar_stock(taller, repuesto, cantidad=3):
+    deposito, _ = Deposito.objects.get_or_create(taller=taller, nombre="Central")
+    rt = RepuestoTaller.objects.create(repuesto=repuesto, taller=taller)
+    StockPorDeposito.objects.create(repuesto_taller=rt, deposito=deposito, cantidad=cantidad)
+
+
+class LocalizadorCercaniaTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        grupo = Grupo.objects.create(nombre="Red", descripcion="")
+        cls.origen = crear_taller("Origen", -34.6, -58.4, grupo)
+        # Todos a más de RADIO_INICIAL_KM: obliga a expandir el radio
+        cls.lejanos = {
+            "A 60 km": crear_taller("A 60 km", -35.14, -58.4, grupo),
+            "B 110 km": crear_taller("B 110 km", -35.59, -58.4, grupo),
+            "C 300 km": crear_taller("C 300 km", -37.3, -58.4, grupo),
+            "D 1000 km": crear_taller("D 1000 km", -43.6, -58.4, grupo),
+        }
+        cls.repuesto = Repuesto.objects.create(numero_pieza="P-1", descripcion="Filtro", estado="ACTIVO")
+        for taller in cls.lejanos.values():
+            dar_stock(taller, cls.repuesto)
+        cls.escaso = Repuesto.objects.create(numero_pieza="P-2", descripcion="Bomba", estado="ACTIVO")
+        dar_stock(cls.lejanos["C 300 km"], cls.escaso)
+        reconstruir_alcance_grupos()
+
+    def buscar(self, numero_pieza, **params):
+        return self.client.get(URL, {"numero_pieza": numero_pieza, "taller_id": self.origen.id, **params})
+
+    def test_limit_devuelve_los_k_mas_cercanos_en_orden(self):
+        # taller, repuesto, visibles y radios de 25, 100 y 400 km: el de 1000 km no se lee
+        with self.assertNumQueries(6):
+            response = self.buscar("P-1", limit=3)
+        talleres = response.json()["talleres"]
+        self.assertEqual([t["nombre"] for t in talleres], ["A 60 km", "B 110 km", "C 300 km"])
+        distancias = [t["distancia_km"] for t in talleres]
+        self.assertEqual(distancias, sorted(distancias))
+
+    def test_el_primer_radio_no_alcanza_y_se_expande_de_a_pasos(self):
+        # 25 km no encuentra nada y 100 km uno solo; 400 km completa el limit
+        with self.assertNumQueries(6):
+            response = self.buscar("P-1", limit=2)
+        self.assertEqual([t["nombre"] for t in response.json()["talleres"]], ["A 60 km", "B 110 km"])
+
+    def test_la_expansion_no_pasa_el_radius_km(self):
+        # 25, 100 y el tope de 150 km
+        with self.assertNumQueries(6):
+            response = self.buscar("P-1", limit=5, radius_km=150)
+        self.assertEqual([t["nombre"] for t in response.json()["talleres"]], ["A 60 km", "B 110 km"])
+
+    def test_repuesto_en_pocos_talleres_acota_las_queries(self):
+        # Seis radios hasta cubrir el planeta más la de talleres sin coordenadas
+        with self.assertNumQueries(10):
+            response = self.buscar("P-2", limit=10)
+        self.assertEqual([t["nombre"] for t in response.json()["talleres"]], ["C 300 km"])
+
+
+class LocalizadorBatchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        grupo = Grupo.objects.create(nombre="Red", descripcion="")
+        cls.origen = crear_taller("Origen", -34.6, -58.4, grupo)
+        cerca = crear_taller("Cerca", -34.65, -58.4, grupo)
+        lejos = crear_taller("Lejos", -35.6, -58.4, grupo)
+        cls.numeros = [f"P-{i}" for i in range(6)]
+        for i, numero in enumerate(cls.numeros):
+            repuesto = Repuesto.objects.create(numero_pieza=numero, descripcion=numero, estado="ACTIVO")
+            dar_stock(lejos, repuesto)
+            if i < 2:
+                dar_stock(cerca, repuesto)
+        reconstruir_alcance_grupos()
+
+    def post(self, numeros):
+        return self.client.post(f"{URL}/batch", {"taller_id": self.origen.id, "numeros_pieza": numeros},
+                                content_type="application/json")
+
+    def test_mezcla_de_encontrados_y_no_encontrados(self):
+        data = self.post(["P-0", "NO-EXISTE", "P-1", "P-5"]).json()
+        self.assertEqual(data["no_encontrados"], ["NO-EXISTE"])
+        self.assertEqual([r["numero_pieza"] for r in data["repuestos"]], ["P-0", "P-1", "P-5"])
+        # Primero por cobertura, después por distancia
+        talleres = [(t["nombre"], t["cobertura"], t["cobertura_completa"]) for t in data["talleres"]]
+        self.assertEqual(talleres, [("Lejos", 3, True), ("Cerca", 2, False)])
+        self.assertEqual([r["numero_pieza"] for r in data["talleres"][1]["repuestos"]], ["P-0", "P-1"])
+
+    def test_queries_no_dependen_del_tamano_del_batch(self):
+        with self.assertNumQueries(5):
+            self.post(self.numeros[:1])
+        with self.assertNumQueries(5):
+            self.post(self.numeros + ["NO-EXISTE"])
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+
+from AI.services import modelos_lgbm
+from AI.services.artefactos import listar_versiones, ruta_version, version_vigente
+from AI.services.modelos_lgbm import (
+    ARCHIVO_SIDECAR,
+    MODO_GLOBAL,
+    cargar_modelo,
+    guardar_modelo,
+    resolver_modelo,
+    ruta_modelo_global,
+    ruta_modelo_taller,
+)
+from AI.services.politica_reentrenamiento import FULL, INFERENCIA, WARM_START, Umbrales, decidir
+
+FEATURES = ["ventas_t_1", "media_ultimas_4", "mes_1"]
+
+
+def entrenar(semilla=0, arboles=5):
+    rng = np.random.default_rng(semilla)
+    x = pd.DataFrame(rng.random((60, len(FEATURES))), columns=FEATURES)
+    y = 3 * x["ventas_t_1"] + rng.random(60)
+    return lgb.train({"objective": "regression", "min_data_in_leaf": 5, "verbose": -1, "seed": semilla},
+                     lgb.Dataset(x, y), num_boost_round=arboles), x
+
+
+class ModelosLgbmTest(SimpleTestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        # Las rutas se arman con la constante del módulo, tomada de settings al importar
+        parche = mock.patch.object(modelos_lgbm, "RUTA_BASE_MODELOS", self.directorio)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.ruta = ruta_modelo_taller(7, "intermitente")
+
+    def test_guardar_y_cargar_ida_y_vuelta(self):
+        booster, x = entrenar()
+        version = guardar_modelo(booster, self.ruta, {"segmento": "intermitente"})
+
+        with open(os.path.join(ruta_version(self.ruta, version), ARCHIVO_SIDECAR), encoding="utf-8") as f:
+            sidecar = json.load(f)
+        self.assertEqual(sidecar, {"features": FEATURES, "num_arboles": 5, "segmento": "intermitente"})
+
+        modelo = cargar_modelo(self.ruta)
+        self.assertEqual((modelo.version, modelo.features), (version, FEATURES))
+        self.assertEqual(modelo.metadata["segmento"], "intermitente")
+        # Las columnas se toman por nombre, no por posición
+        np.testing.assert_allclose(modelo.predict(x[list(reversed(FEATURES))]), booster.predict(x))
+        self.assertIs(cargar_modelo(self.ruta), modelo)
+
+    def test_publicar_cambia_la_version_vigente(self):
+        guardar_modelo(entrenar(0)[0], self.ruta)
+        anterior = cargar_modelo(self.ruta)
+        nueva = guardar_modelo(entrenar(1, arboles=8)[0], self.ruta)
+
+        modelo = cargar_modelo(self.ruta)
+        self.assertEqual(modelo.version, nueva)
+        self.assertEqual(modelo.booster.num_trees(), 8)
+        # Quien ya tenía el modelo anterior lo sigue usando entero
+        self.assertEqual(anterior.booster.num_trees(), 5)
+
+    @override_settings(FORECAST_VERSIONES_A_CONSERVAR=2)
+    def test_poda_conserva_las_ultimas_versiones(self):
+        booster = entrenar()[0]
+        versiones = [guardar_modelo(booster, self.ruta) for _ in range(4)]
+        self.assertEqual(listar_versiones(self.ruta), versiones[-2:])
+        self.assertEqual(version_vigente(self.ruta), versiones[-1])
+
+    def test_sin_modelo_devuelve_none(self):
+        self.assertIsNone(cargar_modelo(self.ruta))
+
+    def test_modo_global_usa_el_ajustado_si_existe(self):
+        guardar_modelo(entrenar()[0], ruta_modelo_global("intermitente"))
+        self.assertEqual(resolver_modelo(7, "intermitente")[0], self.ruta)
+
+        with override_settings(FORECAST_MODO_ENTRENAMIENTO=MODO_GLOBAL):
+            self.assertEqual(resolver_modelo(7, "intermitente")[0], ruta_modelo_global("intermitente"))
+            ajustado = ruta_modelo_taller(7, "intermitente", "ajustado")
+            guardar_modelo(entrenar()[0], ajustado)
+            self.assertEqual(resolver_modelo(7, "intermitente")[0], ajustado)
+
+
+class PoliticaReentrenamientoTest(SimpleTestCase):
+    ahora = datetime(2025, 3, 1)
+
+    def metadata(self, dias=7, warm_starts=0):
+        return {
+            "fecha_entrenamiento_full": (self.ahora - timedelta(days=dias)).isoformat(),
+            "mae_referencia": 2.0,
+            "media_referencia": 10.0,
+            "features": FEATURES,
+            "warm_starts": warm_starts,
+        }
+
+    def decidir(self, metadata, mae=2.0, media=10.0, features=FEATURES):
+        return decidir(metadata, features, mae, media, ahora=self.ahora, umbrales=Umbrales()).accion
+
+    def test_decisiones(self):
+        self.assertEqual(self.decidir(None), FULL)
+        self.assertEqual(self.decidir(self.metadata(), features=FEATURES[:2]), FULL)
+        self.assertEqual(self.decidir(self.metadata(dias=40)), FULL)
+        self.assertEqual(self.decidir(self.metadata(), mae=2.1, media=10.5), INFERENCIA)
+        self.assertEqual(self.decidir(self.metadata(), mae=2.8), WARM_START)
+        self.assertEqual(self.decidir(self.metadata(), media=12.5), WARM_START)
+        self.assertEqual(self.decidir(self.metadata(warm_starts=4), mae=2.8), FULL)
+        self.assertEqual(self.decidir(self.metadata(), mae=4.0), FULL)
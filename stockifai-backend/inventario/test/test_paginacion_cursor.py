@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+
+from catalogo.models import Repuesto, RepuestoTaller
+from inventario.api.paginacion import CursorInvalido, codificar_cursor, decodificar_cursor
+from inventario.models import Deposito, Movimiento, StockPorDeposito
+from user.models import Taller
+
+
+class PaginacionCursorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.taller = Taller.objects.create(nombre="Taller")
+        deposito = Deposito.objects.create(taller=cls.taller, nombre="Central")
+        rt = RepuestoTaller.objects.create(
+            repuesto=Repuesto.objects.create(numero_pieza="A", descripcion="A", estado="ACTIVO"), taller=cls.taller)
+        spd = StockPorDeposito.objects.create(repuesto_taller=rt, deposito=deposito, cantidad=0)
+        base = datetime(2025, 3, 1, 10, tzinfo=timezone.utc)
+        # Cuatro movimientos por fecha: las páginas de 3 cortan en medio de un empate
+        Movimiento.objects.bulk_create([
+            Movimiento(stock_por_deposito=spd, tipo="EGRESO", cantidad=1, fecha=base - timedelta(days=i // 4))
+            for i in range(10)
+        ])
+        cls.url = f"/api/talleres/{cls.taller.id}/movimientos"
+        cls.esperados = list(Movimiento.objects.order_by("-fecha", "-id").values_list("id", flat=True))
+
+    def test_cursor_ida_y_vuelta(self):
+        fecha = datetime(2025, 3, 1, 10, 30, tzinfo=timezone.utc)
+        self.assertEqual(decodificar_cursor(codificar_cursor(fecha, 42)), (fecha, 42))
+
+    def test_recorre_todas_las_paginas_sin_repetir_ni_saltear_empates(self):
+        vistos, cursor, paginas = [], "", 0
+        while cursor is not None:
+            data = self.client.get(self.url, {"cursor": cursor, "page_size": 3}).json()
+            vistos += [m["id"] for m in data["results"]]
+            cursor = data["next_cursor"]
+            paginas += 1
+        self.assertEqual(vistos, self.esperados)
+        self.assertEqual(paginas, 4)
+
+    def test_ultima_pagina_exacta_no_tiene_siguiente(self):
+        data = self.client.get(self.url, {"cursor": "", "page_size": 10, "include_count": "1"}).json()
+        self.assertEqual((len(data["results"]), data["next_cursor"], data["count"]), (10, None, 10))
+
+    def test_cursor_invalido(self):
+        with self.assertRaises(CursorInvalido):
+            decodificar_cursor("no-es-un-cursor")
+        response = self.client.get(self.url, {"cursor": "no-es-un-cursor"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "Cursor inválido")
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from AI import model_training
+from AI.model_training import ARBOLES_WARM_START, ARBOLES_WARM_START_SIN_VALIDACION, train_segment_model
+from AI.services import modelos_lgbm
+from AI.services.artefactos import version_vigente
+from AI.services.modelos_lgbm import cargar_modelo, ruta_modelo_taller
+from AI.services.politica_reentrenamiento import FULL, INFERENCIA, WARM_START, Decision, leer_metadata
+from inventario.test.test_entrenamiento_global import SEGMENTO, escribir_csv
+
+TALLER = 1
+
+
+class TrainSegmentModelTest(SimpleTestCase):
+    def setUp(self):
+        self.modelos = tempfile.mkdtemp()
+        self.datos = tempfile.mkdtemp()
+        for directorio in (self.modelos, self.datos):
+            self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        for modulo in (modelos_lgbm, model_training):
+            parche = mock.patch.object(modulo, "RUTA_BASE_MODELOS", self.modelos)
+            parche.start()
+            self.addCleanup(parche.stop)
+        parche = mock.patch.object(model_training, "guardar_ultimo_registro_a_db")
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.ruta_modelo = ruta_modelo_taller(TALLER, SEGMENTO)
+
+    def entrenar(self, semanas=30, decision=None):
+        # Las semanas extra caen en julio: mismas dummies de mes, mismas features
+        escribir_csv(self.datos, TALLER, escala=3, semilla=1, inicio="2023-12-11", semanas=semanas)
+        if decision is None:
+            return train_segment_model(TALLER, SEGMENTO, self.datos)
+        with mock.patch.object(model_training, "decidir", return_value=Decision(decision, "forzada en el test")):
+            return train_segment_model(TALLER, SEGMENTO, self.datos)
+
+    def metadata(self):
+        return leer_metadata(os.path.join(self.modelos, str(TALLER), SEGMENTO))
+
+    def arboles(self):
+        return cargar_modelo(self.ruta_modelo).booster.num_trees()
+
+    def warm_start(self, semanas):
+        """Devuelve la acción y los n_estimators de cada regresor que se creó."""
+        with mock.patch.object(model_training, "nuevo_regresor", wraps=model_training.nuevo_regresor) as espia:
+            accion = self.entrenar(semanas=semanas, decision=WARM_START)
+        return accion, [c.kwargs["n_estimators"] for c in espia.call_args_list]
+
+    def test_full_y_luego_inferencia_si_los_datos_no_cambian(self):
+        self.assertEqual(self.entrenar(), FULL)
+        version = version_vigente(self.ruta_modelo)
+        self.assertEqual((self.metadata()["accion"], self.metadata()["warm_starts"]), (FULL, 0))
+
+        # Mismo test y misma media: error y drift dentro de los umbrales
+        self.assertEqual(self.entrenar(), INFERENCIA)
+        self.assertEqual(version_vigente(self.ruta_modelo), version)
+        self.assertEqual(self.metadata()["ultima_evaluacion"]["accion"], INFERENCIA)
+        # Los CSV de la corrida se consumen también sin entrenar
+        self.assertEqual(os.listdir(os.path.join(self.datos, str(TALLER), SEGMENTO)), [])
+
+    def test_warm_start_agrega_arboles_acotados_con_las_semanas_nuevas(self):
+        self.entrenar()
+        antes = self.metadata()
+        arboles = self.arboles()
+
+        accion, estimadores = self.warm_start(semanas=34)
+        self.assertEqual(accion, WARM_START)
+        # Pasada con early stopping sobre la última semana nueva y luego el incremento final
+        self.assertEqual(estimadores[0], ARBOLES_WARM_START)
+        self.assertTrue(1 <= estimadores[1] <= ARBOLES_WARM_START)
+        # Con tan pocas filas LightGBM puede no encontrar splits y cortar antes
+        self.assertLessEqual(self.arboles(), arboles + estimadores[1])
+
+        metadata = self.metadata()
+        self.assertEqual((metadata["accion"], metadata["warm_starts"]), (WARM_START, 1))
+        self.assertGreater(metadata["fecha_max_datos"], antes["fecha_max_datos"])
+        # La referencia del último full se conserva
+        self.assertEqual(metadata["fecha_entrenamiento_full"], antes["fecha_entrenamiento_full"])
+
+    def test_warm_start_con_una_sola_semana_nueva_agrega_pocos_arboles(self):
+        self.entrenar()
+        accion, estimadores = self.warm_start(semanas=31)
+        self.assertEqual((accion, estimadores), (WARM_START, [ARBOLES_WARM_START_SIN_VALIDACION]))
+        self.assertEqual(self.metadata()["warm_starts"], 1)
+
+    def test_warm_start_sin_semanas_nuevas_queda_en_inferencia(self):
+        self.entrenar()
+        version = version_vigente(self.ruta_modelo)
+        self.assertEqual(self.entrenar(decision=WARM_START), INFERENCIA)
+        self.assertEqual(version_vigente(self.ruta_modelo), version)
@@ -0,0 +1,37 @@
+"""
+Medidores compartidos por el perfilado web, la instrumentación del forecast y los
+benchmarks. Solo dependen de Django y de la biblioteca estándar.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+
+def rss_max_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso (None donde no hay ``resource``, p. ej. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+class ContadorSQL:
+    """``execute_wrapper`` que cuenta las queries y suma su duración."""
+
+    def __init__(self):
+        self.queries = 0
+        self.tiempo_s = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.tiempo_s += time.perf_counter() - inicio
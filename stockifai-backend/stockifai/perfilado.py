@@ -0,0 +1,116 @@
+"""
+Perfilado por request, opcional (``PERFILADO_ACTIVO``).
+
+``PerfiladoMiddleware`` mide una fracción de los requests (``PERFILADO_MUESTREO``):
+tiempo total, cantidad y tiempo de queries, las ``PERFILADO_TOP_QUERIES`` más lentas
+y las firmas de query repetidas ``PERFILADO_MIN_REPETICIONES`` veces o más (el
+patrón típico de un N+1). Emite una línea JSON por request en el logger
+``stockifai.perfilado`` y, con ``PERFILADO_SERVER_TIMING``, agrega el header
+``Server-Timing`` para verlo en las devtools del navegador.
+
+Desactivado, el middleware se quita solo de la cadena (``MiddlewareNotUsed``) y no
+cuesta nada. En respuestas streaming solo cuenta lo que pasa hasta armar la respuesta,
+no la iteración del contenido.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from stockifai.metricas import ContadorSQL
+
+logger = logging.getLogger("stockifai.perfilado")
+
+_LARGO_SQL = 500
+_LISTA_PARAMETROS = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def firma_sql(sql: str) -> str:
+    """SQL sin literales y con las listas ``IN (%s, %s, ...)`` colapsadas."""
+    sql = _LISTA_PARAMETROS.sub("(%s, ...)", sql)
+    return " ".join(_LITERALES.sub("?", sql).split())
+
+
+class RegistroSQL(ContadorSQL):
+    """``ContadorSQL`` que además guarda la duración de cada query."""
+
+    def __init__(self):
+        super().__init__()
+        self.detalle: List[Tuple[float, str]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.queries += 1
+            self.tiempo_s += duracion
+            self.detalle.append((duracion, sql))
+
+    def lentas(self, n: int) -> List[Dict]:
+        return [{"ms": round(d * 1000, 2), "sql": sql[:_LARGO_SQL]}
+                for d, sql in sorted(self.detalle, key=lambda q: q[0], reverse=True)[:n]]
+
+    def duplicadas(self, minimo: int) -> List[Dict]:
+        por_firma: Dict[str, List[float]] = defaultdict(list)
+        for duracion, sql in self.detalle:
+            por_firma[firma_sql(sql)].append(duracion)
+        repetidas = [{"veces": len(d), "ms": round(sum(d) * 1000, 2), "sql": firma[:_LARGO_SQL]}
+                     for firma, d in por_firma.items() if len(d) >= minimo]
+        return sorted(repetidas, key=lambda r: r["veces"], reverse=True)
+
+
+class PerfiladoMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "PERFILADO_ACTIVO", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.muestreo = float(getattr(settings, "PERFILADO_MUESTREO", 1.0))
+        self.top_queries = int(getattr(settings, "PERFILADO_TOP_QUERIES", 5))
+        self.min_repeticiones = int(getattr(settings, "PERFILADO_MIN_REPETICIONES", 3))
+        self.server_timing = bool(getattr(settings, "PERFILADO_SERVER_TIMING", False))
+
+    def __call__(self, request):
+        if self.muestreo < 1 and random.random() >= self.muestreo:
+            return self.get_response(request)
+
+        registro = RegistroSQL()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(registro):
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        match = getattr(request, "resolver_match", None)
+        duplicadas = registro.duplicadas(self.min_repeticiones)
+        logger.info(json.dumps({
+            "evento": "request",
+            "metodo": request.method,
+            "ruta": request.path,
+            "vista": match.view_name if match else None,
+            "status": response.status_code,
+            "duracion_ms": round(duracion * 1000, 2),
+            "queries": registro.queries,
+            "sql_ms": round(registro.tiempo_s * 1000, 2),
+            "lentas": registro.lentas(self.top_queries),
+            "duplicadas": duplicadas,
+        }, default=str))
+
+        if self.server_timing:
+            response["Server-Timing"] = ", ".join([
+                f'sql;dur={registro.tiempo_s * 1000:.1f};desc="{registro.queries} queries"',
+                f'dup;desc="{sum(d["veces"] for d in duplicadas)} repetidas"',
+                f"total;dur={duracion * 1000:.1f}",
+            ])
+        return response
@@ -27,6 +27,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero para medir toda la cadena; sin PERFILADO_ACTIVO se quita solo
+    "stockifai.perfilado.PerfiladoMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware","django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware","django.middleware.csrf.CsrfViewMiddleware",
@@ -82,6 +84,51 @@ STATIC_URL="static/"; DEFAULT_AUTO_FIELD="django.db.models.BigAutoField"
 
 ALLOW_AUTO_CREATE_REPUESTO=os.getenv("ALLOW_AUTO_CREATE_REPUESTO","False").lower() in ("1","true","yes","y")
 PERMITIR_STOCK_NEGATIVO=os.getenv("PERMITIR_STOCK_NEGATIVO","False").lower() in ("1","true","yes","y")
+# Geocodificación de talleres: "nominatim" o "stub" (sin red, para tests/desarrollo)
+GEOCODING_PROVEEDOR=os.getenv("GEOCODING_PROVEEDOR","nominatim")
+GEOCODING_ASYNC=os.getenv("GEOCODING_ASYNC","True").lower() in ("1","true","yes","y")
+# Límite entre workers solo con cache compartido (CACHE_DIR); ver user/services/geocoding.py
+GEOCODING_REQUESTS_POR_SEGUNDO=float(os.getenv("GEOCODING_REQUESTS_POR_SEGUNDO","1"))
+# Política de reentrenamiento del forecast (ver AI/services/politica_reentrenamiento.py)
+FORECAST_UMBRAL_DRIFT_INFERENCIA=float(os.getenv("FORECAST_UMBRAL_DRIFT_INFERENCIA","0.10"))
+FORECAST_UMBRAL_DRIFT_WARM_START=float(os.getenv("FORECAST_UMBRAL_DRIFT_WARM_START","0.30"))
+FORECAST_UMBRAL_MAE_INFERENCIA=float(os.getenv("FORECAST_UMBRAL_MAE_INFERENCIA","1.10"))
+FORECAST_UMBRAL_MAE_WARM_START=float(os.getenv("FORECAST_UMBRAL_MAE_WARM_START","1.50"))
+FORECAST_MAX_DIAS_SIN_FULL=int(os.getenv("FORECAST_MAX_DIAS_SIN_FULL","28"))
+FORECAST_MAX_WARM_STARTS=int(os.getenv("FORECAST_MAX_WARM_STARTS","4"))
+# "por_taller" (un modelo por taller y segmento) o "global" (un modelo por segmento para todos)
+FORECAST_MODO_ENTRENAMIENTO=os.getenv("FORECAST_MODO_ENTRENAMIENTO","por_taller")
+FORECAST_GLOBAL_MAX_FILAS_TALLER=int(os.getenv("FORECAST_GLOBAL_MAX_FILAS_TALLER","50000"))
+FORECAST_AJUSTE_POR_TALLER=os.getenv("FORECAST_AJUSTE_POR_TALLER","False").lower() in ("1","true","yes","y")
+# Artefactos de modelos (ver AI/services/artefactos.py)
+FORECAST_MODELOS_DIR=os.getenv("FORECAST_MODELOS_DIR","models")
+FORECAST_VERSIONES_A_CONSERVAR=int(os.getenv("FORECAST_VERSIONES_A_CONSERVAR","3"))
+
+# Cache HTTP de los listados (ETag por versión de datos del taller)
+DATOS_VERSION_CACHE_TTL=int(os.getenv("DATOS_VERSION_CACHE_TTL","30"))
+RESPUESTAS_CACHE_TTL=int(os.getenv("RESPUESTAS_CACHE_TTL","300"))
+# Cache de consultas casi estáticas: repuestos, marcas, categorías, depósitos (ver inventario/services/cache_consultas.py)
+CONSULTAS_CACHE_TTL=int(os.getenv("CONSULTAS_CACHE_TTL","600"))
+# Sin CACHE_DIR el cache es en memoria de cada proceso; con CACHE_DIR lo comparten los workers del host
+CACHE_DIR=os.getenv("CACHE_DIR","")
+CACHES={
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": CACHE_DIR,
+    } if CACHE_DIR else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "stockifai",
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES","5000"))},
+    },
+}
+
+# Perfilado por request: tiempo, queries, las más lentas y repetidas (ver stockifai/perfilado.py)
+PERFILADO_ACTIVO=os.getenv("PERFILADO_ACTIVO","False").lower() in ("1","true","yes","y")
+PERFILADO_MUESTREO=float(os.getenv("PERFILADO_MUESTREO","1.0"))
+PERFILADO_TOP_QUERIES=int(os.getenv("PERFILADO_TOP_QUERIES","5"))
+PERFILADO_MIN_REPETICIONES=int(os.getenv("PERFILADO_MIN_REPETICIONES","3"))
+PERFILADO_SERVER_TIMING=os.getenv("PERFILADO_SERVER_TIMING","False").lower() in ("1","true","yes","y")
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:4200",
     "http://127.0.0.1:4200",
@@ -122,17 +169,37 @@ REST_FRAMEWORK = {
 
 LOGGING = {
     'version': 1,
+    'formatters': {
+        'mensaje': {'format': '%(message)s'},
+    },
     'handlers': {
-        'file': {
-            'level': 'DEBUG',
+        # Métricas del forecast: una línea JSON por etapa y por corrida
+        'forecast_metricas': {
+            'level': 'INFO',
+            'class': 'logging.FileHandler',
+            'filename': os.getenv("FORECAST_METRICAS_LOG", "forecast_metricas.jsonl"),
+            'formatter': 'mensaje',
+            'delay': True,
+        },
+        # Perfilado por request: una línea JSON por request muestreado
+        'perfilado': {
+            'level': 'INFO',
             'class': 'logging.FileHandler',
-            'filename': 'import_debug.log',
+            'filename': os.getenv("PERFILADO_LOG", "perfilado.jsonl"),
+            'formatter': 'mensaje',
+            'delay': True,
         },
     },
     'loggers': {
-        'django.db.backends': {
-            'handlers': ['file'],
-            'level': 'DEBUG',
+        'stockifai.forecast': {
+            'handlers': ['forecast_metricas'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'stockifai.perfilado': {
+            'handlers': ['perfilado'],
+            'level': 'INFO',
+            'propagate': False,
         },
     }
 }
@@ -0,0 +1,40 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from catalogo.models import Marca
+from stockifai.perfilado import RegistroSQL, firma_sql
+
+
+class PerfiladoTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Marca.objects.create(nombre="Bosch")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_firma_ignora_literales_y_largo_de_listas(self):
+        self.assertEqual(firma_sql('SELECT * FROM t WHERE id IN (%s, %s, %s) AND x = 10'),
+                         firma_sql('SELECT * FROM t WHERE id IN (%s, %s)   AND x = 7'))
+
+    def test_duplicadas(self):
+        registro = RegistroSQL()
+        registro.detalle = [(0.001, f"SELECT * FROM r WHERE id = {i}") for i in range(4)] + [(0.5, "SELECT 1")]
+        self.assertEqual(registro.duplicadas(3)[0]["veces"], 4)
+        self.assertEqual(registro.lentas(1)[0]["sql"], "SELECT 1")
+
+    @override_settings(PERFILADO_ACTIVO=True, PERFILADO_SERVER_TIMING=True)
+    def test_loguea_request_y_agrega_server_timing(self):
+        with self.assertLogs("stockifai.perfilado", "INFO") as logs:
+            response = self.client.get("/api/marcas")
+        linea = json.loads(logs.records[0].getMessage())
+        self.assertEqual((linea["ruta"], linea["status"], linea["queries"]), ("/api/marcas", 200, 1))
+        self.assertIn('sql;dur=', response["Server-Timing"])
+
+    @override_settings(PERFILADO_ACTIVO=True, PERFILADO_MUESTREO=0)
+    def test_fuera_de_la_muestra_no_loguea(self):
+        with self.assertNoLogs("stockifai.perfilado"):
+            response = self.client.get("/api/marcas")
+        self.assertNotIn("Server-Timing", response)
@@ -9,7 +9,7 @@ from rest_framework.permissions import AllowAny
 from inventario.models import Movimiento
 from user.api.serializers.taller_serializer import TallerSerializer
 from user.models import Taller
-from user.services.geocoding import geocode_address
+from user.services.geocoding import buscar_en_cache, encolar_geocodificacion
 from user.services.phone import normalize_local_phone
 
 
@@ -28,6 +28,7 @@ class TallerViewSet(viewsets.ModelViewSet):
 
     def _enrich_taller(self, taller: Taller, data: dict) -> None:
         update_fields: set[str] = set()
+        geocodificar_pendiente = False
 
         if "direccion" in data:
             direccion = (data.get("direccion") or "").strip()
@@ -36,7 +37,8 @@ class TallerViewSet(viewsets.ModelViewSet):
                 update_fields.add("direccion")
 
             if direccion:
-                coords = geocode_address(direccion)
+                # Solo se consulta la cache; si no está, se geocodifica en segundo plano
+                vigente, coords = buscar_en_cache(direccion)
                 if coords:
                     lat, lon = coords
                     lat_dec = Decimal(str(lat))
@@ -47,6 +49,8 @@ class TallerViewSet(viewsets.ModelViewSet):
                     if taller.longitud != lon_dec:
                         taller.longitud = lon_dec
                         update_fields.add("longitud")
+                elif not vigente:
+                    geocodificar_pendiente = True
 
         if "telefono" in data:
             telefono = normalize_local_phone(data.get("telefono") or "")
@@ -57,6 +61,9 @@ class TallerViewSet(viewsets.ModelViewSet):
         if update_fields:
             taller.save(update_fields=list(update_fields))
 
+        if geocodificar_pendiente:
+            encolar_geocodificacion(taller.id, taller.direccion)
+
 
 class TallerView(APIView):
     """
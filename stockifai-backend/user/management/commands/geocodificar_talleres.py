@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from user.models import Taller
+from user.services.geocoding import geocodificar_talleres
+
+
+class Command(BaseCommand):
+    help = "Geocodifica en lote los talleres con dirección (por defecto, solo los que no tienen coordenadas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todos", action="store_true",
+                            help="Incluye talleres que ya tienen coordenadas")
+        parser.add_argument("--limite", type=int, default=None,
+                            help="Cantidad máxima de talleres a procesar")
+
+    def handle(self, *args, **options):
+        talleres = Taller.objects.exclude(direccion="").only("id", "direccion").order_by("id")
+        if not options["todos"]:
+            talleres = talleres.filter(Q(latitud__isnull=True) | Q(longitud__isnull=True))
+        if options["limite"]:
+            talleres = talleres[:options["limite"]]
+
+        ok, fallidos = geocodificar_talleres(talleres.iterator())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Talleres geocodificados: {ok}. Sin resultado: {fallidos}."
+        ))
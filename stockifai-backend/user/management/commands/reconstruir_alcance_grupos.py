@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from user.services.alcance_grupos import reconstruir_alcance_grupos
+
+
+class Command(BaseCommand):
+    help = ("Recalcula la tabla GrupoAlcance (visibilidad entre grupos del localizador). "
+            "Las señales de Grupo la mantienen al día; sirve tras cambios hechos sin señales.")
+
+    def handle(self, *args, **options):
+        filas = reconstruir_alcance_grupos()
+        self.stdout.write(self.style.SUCCESS(f"GrupoAlcance reconstruida: {filas} filas."))
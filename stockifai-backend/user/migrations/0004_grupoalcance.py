@@ -0,0 +1,74 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:37
+
+from collections import deque
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copia congelada de user.services.alcance_grupos.calcular_alcance: la migración no
+# debe cambiar si el servicio cambia después.
+def calcular_alcance(padres):
+    hijos = {}
+    for gid, parent_id in padres.items():
+        if parent_id is not None:
+            hijos.setdefault(parent_id, []).append(gid)
+
+    cache = {}
+    alcance = {}
+    for gid in padres:
+        ascendencia = {gid}
+        actual = padres.get(gid)
+        while actual is not None and actual not in ascendencia:
+            ascendencia.add(actual)
+            actual = padres.get(actual)
+
+        clave = frozenset(ascendencia)
+        if clave not in cache:
+            visibles = set(ascendencia)
+            queue = deque(ascendencia)
+            while queue:
+                for hijo in hijos.get(queue.popleft(), ()):
+                    if hijo not in visibles:
+                        visibles.add(hijo)
+                        queue.append(hijo)
+            cache[clave] = visibles
+        alcance[gid] = cache[clave]
+    return alcance
+
+
+def construir_alcance(apps, schema_editor):
+    Grupo = apps.get_model('user', 'Grupo')
+    GrupoAlcance = apps.get_model('user', 'GrupoAlcance')
+
+    padres = dict(Grupo.objects.values_list('id_grupo', 'grupo_padre_id'))
+    GrupoAlcance.objects.bulk_create(
+        [
+            GrupoAlcance(grupo_id=gid, grupo_visible_id=visible)
+            for gid, visibles in calcular_alcance(padres).items()
+            for visible in visibles
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0003_grupo_grupo_padre_taller_latitud_taller_longitud'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GrupoAlcance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grupo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alcance', to='user.grupo')),
+                ('grupo_visible', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='user.grupo')),
+            ],
+            options={
+                'unique_together': {('grupo', 'grupo_visible')},
+            },
+        ),
+        migrations.RunPython(construir_alcance, migrations.RunPython.noop),
+    ]
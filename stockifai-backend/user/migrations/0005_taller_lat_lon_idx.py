@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_grupoalcance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taller',
+            index=models.Index(fields=['latitud', 'longitud'], name='taller_lat_lon_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_taller_lat_lon_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DireccionGeocodificada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('direccion_normalizada', models.CharField(max_length=255, unique=True)),
+                ('latitud', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitud', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('encontrada', models.BooleanField(default=False)),
+                ('proveedor', models.CharField(max_length=30)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -20,6 +20,10 @@ class Taller(models.Model):
     longitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Búsqueda por bounding box del localizador (radius_km / limit)
+        indexes = [models.Index(fields=['latitud', 'longitud'], name='taller_lat_lon_idx')]
+
     def __str__(self):
         return self.nombre
 
@@ -46,6 +50,36 @@ class GrupoTaller(models.Model):
     def __str__(self):
         return f"{self.id_grupo.nombre} - {self.id_taller.nombre}"
 
+class GrupoAlcance(models.Model):
+    """
+    Tabla de clausura precalculada: para cada grupo, los grupos cuyos talleres puede ver
+    (todo el árbol bajo sus ancestros). Al crear, mover o borrar un Grupo se recalcula
+    solo su árbol (ver user.signals).
+    """
+    grupo = models.ForeignKey(Grupo, on_delete=models.CASCADE, related_name='alcance')
+    grupo_visible = models.ForeignKey(Grupo, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        unique_together = [('grupo', 'grupo_visible')]
+
+    def __str__(self):
+        return f"{self.grupo_id} -> {self.grupo_visible_id}"
+
+class DireccionGeocodificada(models.Model):
+    """
+    Cache persistente de geocodificación por dirección normalizada.
+    También guarda las direcciones sin resultado para no volver a consultarlas.
+    """
+    direccion_normalizada = models.CharField(max_length=255, unique=True)
+    latitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    encontrada = models.BooleanField(default=False)
+    proveedor = models.CharField(max_length=30)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.direccion_normalizada
+
 class User(AbstractUser):
     taller = models.ForeignKey(Taller, on_delete=models.SET_NULL, null=True, blank=True)
     grupo = models.ForeignKey(Grupo, on_delete=models.SET_NULL, null=True, blank=True)
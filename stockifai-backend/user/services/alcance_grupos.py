@@ -0,0 +1,108 @@
+"""Clausura de visibilidad entre grupos de talleres (usada por el localizador)."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from django.db import transaction
+
+from user.models import Grupo, GrupoAlcance, GrupoTaller
+
+CHUNK_SIZE = 2000
+
+
+def calcular_alcance(padres: Dict[int, Optional[int]],
+                     grupos: Optional[Iterable[int]] = None) -> Dict[int, Set[int]]:
+    """
+    Para cada grupo: sus ancestros y luego todo lo que cuelga de ellos
+    (misma semántica que recorría el localizador por request), o sea todo su árbol.
+    padres: {id_grupo: id_grupo_padre | None}
+    grupos: si se indica, solo se calcula el alcance de esos grupos
+    """
+    hijos: Dict[int, List[int]] = {}
+    for gid, parent_id in padres.items():
+        if parent_id is not None:
+            hijos.setdefault(parent_id, []).append(gid)
+
+    cache: Dict[FrozenSet[int], Set[int]] = {}
+    alcance: Dict[int, Set[int]] = {}
+
+    for gid in (padres if grupos is None else [g for g in grupos if g in padres]):
+        # ascender a los ancestros
+        ascendencia: Set[int] = {gid}
+        actual = padres.get(gid)
+        while actual is not None and actual not in ascendencia:
+            ascendencia.add(actual)
+            actual = padres.get(actual)
+
+        clave = frozenset(ascendencia)
+        if clave not in cache:
+            # descender a subgrupos desde toda la ascendencia
+            visibles = set(ascendencia)
+            queue = deque(ascendencia)
+            while queue:
+                for hijo in hijos.get(queue.popleft(), ()):
+                    if hijo not in visibles:
+                        visibles.add(hijo)
+                        queue.append(hijo)
+            cache[clave] = visibles
+        alcance[gid] = cache[clave]
+
+    return alcance
+
+
+def reconstruir_alcance_grupos(grupo_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recalcula la tabla GrupoAlcance. Con grupo_ids solo reescribe las filas de los
+    árboles que contienen a esos grupos (los demás árboles no cambian de alcance);
+    sin grupo_ids, la tabla entera. Devuelve la cantidad de filas escritas.
+    """
+    padres = dict(Grupo.objects.values_list("id_grupo", "grupo_padre_id"))
+    if grupo_ids is None:
+        alcance = calcular_alcance(padres)
+        borrar = GrupoAlcance.objects.all()
+    else:
+        # El alcance de un grupo es todo su árbol: los afectados son la unión de esos árboles
+        afectados: Set[int] = set()
+        for visibles in calcular_alcance(padres, grupo_ids).values():
+            afectados |= visibles
+        alcance = calcular_alcance(padres, afectados)
+        borrar = GrupoAlcance.objects.filter(grupo_id__in=afectados)
+
+    filas = [
+        GrupoAlcance(grupo_id=gid, grupo_visible_id=visible)
+        for gid, visibles in alcance.items()
+        for visible in visibles
+    ]
+    with transaction.atomic():
+        borrar.delete()
+        GrupoAlcance.objects.bulk_create(filas, batch_size=CHUNK_SIZE)
+    return len(filas)
+
+
+def programar_reconstruccion(grupo_ids: Iterable[int]) -> None:
+    """
+    Recalcula los árboles de los grupos indicados cuando commitea la transacción en
+    curso (inmediato en autocommit). Los ids que ya no existen se ignoran.
+    """
+    ids = [gid for gid in grupo_ids if gid is not None]
+    if ids:
+        transaction.on_commit(lambda: reconstruir_alcance_grupos(ids))
+
+
+def talleres_visibles(taller_id: int) -> Set[int]:
+    """
+    Talleres que puede ver el taller indicado (incluido él mismo), en una sola query.
+    Los cambios de GrupoTaller no requieren invalidar nada: la pertenencia se lee en vivo,
+    la clausura es a nivel grupo. Solo lee: si la clausura quedó desactualizada (cambios
+    a Grupo sin señales, p. ej. con update() o SQL directo) se corrige con
+    ``manage.py reconstruir_alcance_grupos``.
+    """
+    grupos_origen = GrupoTaller.objects.filter(id_taller_id=taller_id).values("id_grupo_id")
+    grupos_visibles = GrupoAlcance.objects.filter(grupo_id__in=grupos_origen).values("grupo_visible_id")
+    visibles = set(
+        GrupoTaller.objects.filter(id_grupo_id__in=grupos_visibles).values_list("id_taller_id", flat=True)
+    )
+    visibles.add(taller_id)
+    return visibles
@@ -1,50 +1,277 @@
-"""Utilities para geocodificar direcciones usando Nominatim (OpenStreetMap)."""
+"""Geocodificación de direcciones con cache persistente, rate limit y proveedor intercambiable.
+
+Flujo: dirección -> normalización -> cache (``DireccionGeocodificada``) -> proveedor.
+El proveedor se elige con ``settings.GEOCODING_PROVEEDOR`` ("nominatim" o "stub") y las
+llamadas a red pasan por un token bucket (Nominatim admite 1 request/segundo).
+
+El token bucket es por proceso; entre procesos el límite se comparte reservando un
+turno por llamada en el cache de Django (``LimitadorCompartido``). Eso solo vale entre
+workers si el cache es compartido (``CACHE_DIR`` u otro backend común): con el cache en
+memoria de cada proceso, N workers pueden sumar N requests/segundo. En ese caso conviene
+``GEOCODING_ASYNC=False`` más el backfill con ``manage.py geocodificar_talleres``, que
+corre en un solo proceso.
+"""
 
 from __future__ import annotations
 
 import logging
-from typing import Optional, Tuple
+import math
+import re
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
 
 import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from user.models import DireccionGeocodificada, Taller
 
 logger = logging.getLogger(__name__)
 
 NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 USER_AGENT = "stockifai-backend/1.0"
+TIMEOUT_SEGUNDOS = 10
+# Las direcciones sin resultado se vuelven a intentar pasado este plazo
+REINTENTO_NO_ENCONTRADAS = timedelta(days=30)
 
-def geocode_address(address: str) -> Optional[Tuple[float, float]]:
-    """Retorna (lat, lon) para la dirección indicada o ``None`` si no se pudo geocodificar."""
-    if not address:
+Coordenadas = Tuple[float, float]
+
+
+class ErrorGeocoding(Exception):
+    """Falla transitoria del proveedor (red, HTTP, JSON). No se guarda en cache."""
+
+
+class ProveedorGeocoding(ABC):
+    nombre = ""
+
+    @abstractmethod
+    def geocodificar(self, direccion: str) -> Optional[Coordenadas]:
+        """Retorna (lat, lon), ``None`` si no hay resultados o lanza ``ErrorGeocoding``."""
+
+
+class NominatimProveedor(ProveedorGeocoding):
+    nombre = "nominatim"
+
+    def geocodificar(self, direccion: str) -> Optional[Coordenadas]:
+        params = {
+            "q": direccion,
+            "format": "json",
+            "limit": 1,
+            "addressdetails": 0,
+        }
+        headers = {"User-Agent": USER_AGENT}
+
+        try:
+            resp = requests.get(NOMINATIM_URL, params=params, headers=headers, timeout=TIMEOUT_SEGUNDOS)
+            resp.raise_for_status()
+            data = resp.json()
+        except requests.RequestException as exc:  # pragma: no cover - dependiente de red
+            raise ErrorGeocoding(f"No se pudo geocodificar la dirección '{direccion}': {exc}") from exc
+        except ValueError as exc:  # pragma: no cover - JSON inesperado
+            raise ErrorGeocoding(f"Respuesta inválida de Nominatim para '{direccion}': {exc}") from exc
+
+        if not data:
+            logger.info("Nominatim no encontró resultados para '%s'", direccion)
+            return None
+
+        try:
+            return float(data[0]["lat"]), float(data[0]["lon"])
+        except (KeyError, TypeError, ValueError) as exc:  # pragma: no cover
+            raise ErrorGeocoding(f"Formato inesperado al parsear coordenadas para '{direccion}': {exc}") from exc
+
+
+class StubProveedor(ProveedorGeocoding):
+    """Proveedor local sin red: responde solo las direcciones registradas."""
+    nombre = "stub"
+
+    def __init__(self, direcciones: Optional[Dict[str, Coordenadas]] = None):
+        self.direcciones = {normalizar_direccion(k): v for k, v in (direcciones or {}).items()}
+
+    def geocodificar(self, direccion: str) -> Optional[Coordenadas]:
+        return self.direcciones.get(normalizar_direccion(direccion))
+
+
+PROVEEDORES = {
+    NominatimProveedor.nombre: NominatimProveedor,
+    StubProveedor.nombre: StubProveedor,
+}
+
+
+class TokenBucket:
+    """Rate limiter thread-safe: `tasa` tokens por segundo, ráfagas de hasta `capacidad`."""
+
+    def __init__(self, tasa: float, capacidad: float = 1.0):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self._tokens = capacidad
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self) -> None:
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.tasa
+            time.sleep(espera)
+
+
+class LimitadorCompartido(TokenBucket):
+    """
+    ``TokenBucket`` del proceso más un turno de 1/tasa segundos reservado con
+    ``cache.add`` (atómico), que limita también entre procesos que comparten el cache.
+    """
+
+    def __init__(self, tasa: float, capacidad: float = 1.0, clave: str = "geocoding:turno"):
+        super().__init__(tasa, capacidad)
+        self.clave = clave
+
+    def adquirir(self) -> None:
+        super().adquirir()
+        while True:
+            turno = math.floor(time.time() * self.tasa)
+            if cache.add(f"{self.clave}:{turno}", 1, timeout=max(1, math.ceil(2 / self.tasa))):
+                return
+            time.sleep(max(0.0, (turno + 1) / self.tasa - time.time()))
+
+
+_proveedor: Optional[ProveedorGeocoding] = None
+_limitador = LimitadorCompartido(getattr(settings, "GEOCODING_REQUESTS_POR_SEGUNDO", 1.0))
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def obtener_proveedor() -> ProveedorGeocoding:
+    global _proveedor
+    if _proveedor is None:
+        nombre = getattr(settings, "GEOCODING_PROVEEDOR", NominatimProveedor.nombre)
+        try:
+            _proveedor = PROVEEDORES[nombre]()
+        except KeyError:
+            raise ValueError(f"GEOCODING_PROVEEDOR desconocido: {nombre}")
+    return _proveedor
+
+
+def configurar_proveedor(proveedor: Optional[ProveedorGeocoding]) -> None:
+    """Reemplaza el proveedor activo (None vuelve al de settings). Útil en tests."""
+    global _proveedor
+    _proveedor = proveedor
+
+
+def normalizar_direccion(address: str) -> str:
+    texto = unicodedata.normalize("NFKC", address or "").casefold()
+    texto = re.sub(r"\s*,\s*", ", ", texto)
+    texto = re.sub(r"\s+", " ", texto)
+    return texto.strip(" ,.")[:255]
+
+
+def _a_coordenadas(entrada: DireccionGeocodificada) -> Optional[Coordenadas]:
+    if not entrada.encontrada or entrada.latitud is None or entrada.longitud is None:
         return None
+    return float(entrada.latitud), float(entrada.longitud)
+
+
+def buscar_en_cache(address: str) -> Tuple[bool, Optional[Coordenadas]]:
+    """(hay_entrada_vigente, coordenadas). Solo consulta la base, nunca la red."""
+    clave = normalizar_direccion(address)
+    if not clave:
+        return True, None
+
+    entrada = DireccionGeocodificada.objects.filter(direccion_normalizada=clave).first()
+    if entrada is None:
+        return False, None
+    if not entrada.encontrada and timezone.now() - entrada.fecha_actualizacion > REINTENTO_NO_ENCONTRADAS:
+        return False, None
+    return True, _a_coordenadas(entrada)
 
-    params = {
-        "q": address,
-        "format": "json",
-        "limit": 1,
-        "addressdetails": 0,
-    }
-    headers = {"User-Agent": USER_AGENT}
 
+def geocode_address(address: str) -> Optional[Coordenadas]:
+    """Retorna (lat, lon) para la dirección indicada o ``None`` si no se pudo geocodificar."""
+    vigente, coords = buscar_en_cache(address)
+    if vigente:
+        return coords
+
+    proveedor = obtener_proveedor()
+    _limitador.adquirir()
     try:
-        resp = requests.get(NOMINATIM_URL, params=params, headers=headers, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-    except requests.RequestException as exc:  # pragma: no cover - dependiente de red
-        logger.warning("No se pudo geocodificar la dirección '%s': %s", address, exc)
-        return None
-    except ValueError as exc:  # pragma: no cover - JSON inesperado
-        logger.warning("Respuesta inválida de Nominatim para '%s': %s", address, exc)
+        coords = proveedor.geocodificar(address)
+    except ErrorGeocoding as exc:
+        logger.warning("%s", exc)
         return None
 
-    if not data:
-        logger.info("Nominatim no encontró resultados para '%s'", address)
-        return None
+    DireccionGeocodificada.objects.update_or_create(
+        direccion_normalizada=normalizar_direccion(address),
+        defaults={
+            "latitud": Decimal(str(round(coords[0], 6))) if coords else None,
+            "longitud": Decimal(str(round(coords[1], 6))) if coords else None,
+            "encontrada": coords is not None,
+            "proveedor": proveedor.nombre,
+        },
+    )
+    return coords
+
+
+def geocodificar_taller(taller_id: int, direccion: str) -> bool:
+    """
+    Geocodifica y guarda las coordenadas del taller. Solo actualiza si la dirección
+    sigue siendo la misma, para no pisar un cambio posterior con un resultado viejo.
+    """
+    coords = geocode_address(direccion)
+    if not coords:
+        return False
+    return Taller.objects.filter(pk=taller_id, direccion=direccion).update(
+        latitud=Decimal(str(round(coords[0], 6))),
+        longitud=Decimal(str(round(coords[1], 6))),
+    ) > 0
+
 
+def _geocodificar_en_segundo_plano(taller_id: int, direccion: str) -> None:
     try:
-        lat = float(data[0]["lat"])
-        lon = float(data[0]["lon"])
-    except (KeyError, TypeError, ValueError) as exc:  # pragma: no cover
-        logger.warning("Formato inesperado al parsear coordenadas para '%s': %s", address, exc)
-        return None
+        geocodificar_taller(taller_id, direccion)
+    except Exception:  # pragma: no cover - no debe matar el worker
+        logger.exception("Error geocodificando el taller %s", taller_id)
+    finally:
+        close_old_connections()
+
+
+def _obtener_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Un solo worker: el rate limit del proveedor serializa igual las llamadas
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geocoding")
+        return _executor
+
+
+def encolar_geocodificacion(taller_id: int, direccion: str) -> None:
+    """Agenda la geocodificación para después del commit, sin bloquear el request."""
+    if not getattr(settings, "GEOCODING_ASYNC", True):
+        transaction.on_commit(lambda: geocodificar_taller(taller_id, direccion))
+        return
+
+    transaction.on_commit(
+        lambda: _obtener_executor().submit(_geocodificar_en_segundo_plano, taller_id, direccion)
+    )
+
 
-    return lat, lon
+def geocodificar_talleres(talleres: Iterable[Taller]) -> Tuple[int, int]:
+    """Backfill sincrónico (respeta el rate limit). Devuelve (geocodificados, sin_resultado)."""
+    ok = fallidos = 0
+    for taller in talleres:
+        if geocodificar_taller(taller.id, taller.direccion):
+            ok += 1
+        else:
+            fallidos += 1
+    return ok, fallidos
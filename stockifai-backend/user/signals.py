@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from user.models import Grupo, Taller
+from user.services.alcance_grupos import programar_reconstruccion
+
+
+_SIN_PADRE_ANTERIOR = object()
+
+
+@receiver(pre_save, sender=Grupo)
+def recordar_padre_anterior(sender, instance: Grupo, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    anterior = Grupo.objects.filter(pk=instance.pk).values_list("grupo_padre_id", flat=True)
+    instance._padre_anterior = anterior[0] if anterior else _SIN_PADRE_ANTERIOR
+
+
+@receiver(post_save, sender=Grupo)
+def invalidar_alcance_al_guardar(sender, instance: Grupo, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, "_padre_anterior", _SIN_PADRE_ANTERIOR)
+    if not created and anterior == instance.grupo_padre_id:
+        # Cambió el nombre o la descripción: la clausura es la misma
+        return
+    # El árbol nuevo del grupo y el que dejó (si se movió)
+    programar_reconstruccion([instance.pk, None if anterior is _SIN_PADRE_ANTERIOR else anterior])
+
+
+@receiver(post_delete, sender=Grupo)
+def invalidar_alcance_al_borrar(sender, instance: Grupo, raw=False, **kwargs):
+    if raw:
+        return
+    # Sus filas se borran en cascada; el resto de su árbol pierde el subárbol
+    programar_reconstruccion([instance.grupo_padre_id])
+
+
+@receiver(post_save, sender=Taller)
+def invalidar_version_taller(sender, instance: Taller, raw=False, created=False, **kwargs):
+    # El nombre del taller va en los listados cacheados por ETag
+    if raw or created:
+        return
+    from inventario.services.version_datos import incrementar_version_taller
+    incrementar_version_taller(instance.id)
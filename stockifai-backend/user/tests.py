@@ -1,3 +1,205 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from user.models import DireccionGeocodificada, Grupo, GrupoAlcance, GrupoTaller, Taller
+from user.services.alcance_grupos import talleres_visibles
+from user.services import geocoding
+from user.services.geocoding import (
+    LimitadorCompartido,
+    ProveedorGeocoding,
+    StubProveedor,
+    TokenBucket,
+    configurar_proveedor,
+    geocode_address,
+    normalizar_direccion,
+)
+
+DIRECCION = "Av. Siempre Viva 742, Springfield"
+
+
+class StubContador(StubProveedor):
+    def __init__(self, direcciones):
+        super().__init__(direcciones)
+        self.llamadas = 0
+
+    def geocodificar(self, direccion):
+        self.llamadas += 1
+        return super().geocodificar(direccion)
+
+
+class RelojFalso:
+    """Reemplaza time.time/monotonic/sleep: dormir avanza el reloj y registra la espera."""
+
+    def __init__(self, ahora=100.0):
+        self.ahora = ahora
+        self.esperas = []
+
+    def dormir(self, segundos):
+        self.esperas.append(segundos)
+        self.ahora += segundos
+
+    def __enter__(self):
+        self.parches = [
+            mock.patch("user.services.geocoding.time.time", lambda: self.ahora),
+            mock.patch("user.services.geocoding.time.monotonic", lambda: self.ahora),
+            mock.patch("user.services.geocoding.time.sleep", self.dormir),
+        ]
+        for parche in self.parches:
+            parche.start()
+        return self
+
+    def __exit__(self, *exc):
+        for parche in self.parches:
+            parche.stop()
+
+
+class LimitadoresTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_token_bucket_espera_cuando_se_agota_la_rafaga(self):
+        with RelojFalso() as reloj:
+            bucket = TokenBucket(tasa=2, capacidad=2)
+            for _ in range(3):
+                bucket.adquirir()
+        self.assertEqual(reloj.esperas, [0.5])
+
+    def test_limitador_compartido_entre_procesos(self):
+        # Dos limitadores con el mismo cache hacen de dos workers: el segundo espera el turno siguiente
+        with RelojFalso() as reloj:
+            LimitadorCompartido(1, clave="test:turno").adquirir()
+            LimitadorCompartido(1, clave="test:turno").adquirir()
+        self.assertEqual(reloj.esperas, [1.0])
+
+    def test_proveedor_es_abstracto(self):
+        with self.assertRaises(TypeError):
+            ProveedorGeocoding()
+
+
+@override_settings(GEOCODING_ASYNC=False)
+class GeocodingTest(TestCase):
+    def setUp(self):
+        self.stub = StubContador({DIRECCION: (-34.6037, -58.3816)})
+        configurar_proveedor(self.stub)
+        self.addCleanup(configurar_proveedor, None)
+        parche = mock.patch.object(geocoding, "_limitador", LimitadorCompartido(1000))
+        parche.start()
+        self.addCleanup(parche.stop)
+        cache.clear()
+
+    def test_normalizacion(self):
+        self.assertEqual(normalizar_direccion("  AV. Siempre   Viva 742 ,Springfield. "),
+                         "av. siempre viva 742, springfield")
+
+    def test_cache_por_direccion_normalizada(self):
+        self.assertEqual(geocode_address(DIRECCION), (-34.6037, -58.3816))
+        self.assertEqual(geocode_address("av. siempre viva 742 ,SPRINGFIELD"), (-34.6037, -58.3816))
+        self.assertEqual(self.stub.llamadas, 1)
+        entrada = DireccionGeocodificada.objects.get()
+        self.assertEqual((entrada.encontrada, entrada.proveedor), (True, "stub"))
+
+    def test_sin_resultado_se_cachea_y_se_reintenta_al_vencer(self):
+        self.assertIsNone(geocode_address("Calle Falsa 123"))
+        self.assertIsNone(geocode_address("Calle Falsa 123"))
+        self.assertEqual(self.stub.llamadas, 1)
+
+        DireccionGeocodificada.objects.update(fecha_actualizacion=timezone.now() - timedelta(days=31))
+        geocode_address("Calle Falsa 123")
+        self.assertEqual(self.stub.llamadas, 2)
+
+    def test_alta_de_taller_geocodifica_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/talleres/", {"nombre": "Taller", "direccion": DIRECCION},
+                                        content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        # La respuesta no espera a la geocodificación
+        self.assertIsNone(response.json()["latitud"])
+        taller = Taller.objects.get(pk=response.json()["id"])
+        self.assertEqual((taller.latitud, taller.longitud), (Decimal("-34.603700"), Decimal("-58.381600")))
+
+    def test_direccion_en_cache_se_aplica_en_el_request(self):
+        geocode_address(DIRECCION)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/talleres/", {"nombre": "Taller", "direccion": DIRECCION},
+                                        content_type="application/json")
+        # No se encola geocodificación: el proveedor solo se llamó para llenar el cache
+        self.assertEqual(self.stub.llamadas, 1)
+        self.assertEqual(Decimal(response.json()["latitud"]), Decimal("-34.6037"))
+
+
+class AlcanceGruposTest(TestCase):
+    def crear_grupo(self, nombre, padre=None):
+        grupo = Grupo.objects.create(nombre=nombre, descripcion="", grupo_padre=padre)
+        taller = Taller.objects.create(nombre=f"Taller {nombre}")
+        GrupoTaller.objects.create(id_grupo=grupo, id_taller=taller)
+        return grupo, taller
+
+    def setUp(self):
+        # raiz -> (a -> nieto, b); otro queda aparte
+        with self.captureOnCommitCallbacks(execute=True):
+            self.raiz, self.t_raiz = self.crear_grupo("raiz")
+            self.a, self.t_a = self.crear_grupo("a", self.raiz)
+            self.b, self.t_b = self.crear_grupo("b", self.raiz)
+            self.nieto, self.t_nieto = self.crear_grupo("nieto", self.a)
+            self.otro, self.t_otro = self.crear_grupo("otro")
+
+    def test_ancestros_y_todo_lo_que_cuelga_de_ellos(self):
+        self.assertEqual(talleres_visibles(self.t_nieto.id),
+                         {self.t_raiz.id, self.t_a.id, self.t_b.id, self.t_nieto.id})
+        self.assertEqual(talleres_visibles(self.t_otro.id), {self.t_otro.id})
+
+    def test_senal_al_mover_un_grupo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.otro.grupo_padre = self.b
+            self.otro.save()
+        self.assertIn(self.t_otro.id, talleres_visibles(self.t_nieto.id))
+        self.assertIn(self.t_raiz.id, talleres_visibles(self.t_otro.id))
+
+    def test_senal_al_borrar_un_grupo(self):
+        id_b = self.b.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.b.delete()
+        self.assertFalse(GrupoAlcance.objects.filter(grupo_visible_id=id_b).exists())
+        self.assertNotIn(self.t_b.id, talleres_visibles(self.t_nieto.id))
+
+    def filas_de(self, grupo):
+        return set(GrupoAlcance.objects.filter(grupo=grupo).values_list("pk", flat=True))
+
+    def test_renombrar_no_reconstruye(self):
+        antes = set(GrupoAlcance.objects.values_list("pk", flat=True))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.raiz.nombre = "Raíz"
+            self.raiz.save()
+        self.assertEqual(callbacks, [])
+        self.assertEqual(set(GrupoAlcance.objects.values_list("pk", flat=True)), antes)
+
+    def test_mover_solo_reescribe_los_arboles_afectados(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo, t_nuevo = self.crear_grupo("nuevo")
+        filas_nuevo = self.filas_de(nuevo)
+        self.assertTrue(filas_nuevo)
+        filas_otro = self.filas_de(self.otro)
+
+        # nieto pasa del árbol de raiz al de otro; nuevo no se toca
+        with self.captureOnCommitCallbacks(execute=True):
+            self.nieto.grupo_padre = self.otro
+            self.nieto.save()
+        self.assertEqual(self.filas_de(nuevo), filas_nuevo)
+        self.assertNotEqual(self.filas_de(self.otro), filas_otro)
+        self.assertEqual(talleres_visibles(self.t_nieto.id), {self.t_nieto.id, self.t_otro.id})
+        self.assertNotIn(self.t_nieto.id, talleres_visibles(self.t_a.id))
+        self.assertEqual(talleres_visibles(t_nuevo.id), {t_nuevo.id})
+
+    def test_lectura_no_reconstruye_y_el_comando_si(self):
+        GrupoAlcance.objects.all().delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(talleres_visibles(self.t_nieto.id), {self.t_nieto.id})
+        call_command("reconstruir_alcance_grupos", stdout=StringIO())
+        self.assertIn(self.t_raiz.id, talleres_visibles(self.t_nieto.id))